@@ -0,0 +1,113 @@
+"""
+Benchmarks BitfinexWSS's two-thread pipeline (receive -> receiver_q ->
+process) against inline dispatch on the receiver thread.
+
+Messages are replayed from memory instead of a socket, so the numbers
+measure the client alone: throughput in messages per second, and the
+dispatch latency from reading a message to publishing its data. Replaying
+as fast as possible measures throughput, but latencies then include the
+receiver_q's backlog; a paced run (one message per interval) shows the
+latency of each message on its own.
+
+Usage:
+    python benchmarks/bitfinex_dispatch.py [messages] [interval in us]
+"""
+
+# Import Built-Ins
+import logging
+import json
+import sys
+import threading
+import time
+
+# Import Third-Party
+from websocket import WebSocketTimeoutException
+
+# Import Homebrew
+from bitex.api.WSS.bitfinex import BitfinexWSS
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class ReplayConnection:
+    """
+    Stands in for a websocket connection, returning recorded messages.
+    """
+    def __init__(self, messages, interval=0):
+        self.messages = iter(messages)
+        self.interval = interval
+
+    def recv(self):
+        if self.interval:
+            time.sleep(self.interval)
+        try:
+            return next(self.messages)
+        except StopIteration:
+            time.sleep(0.01)
+            raise WebSocketTimeoutException()
+
+    def close(self):
+        pass
+
+
+def messages(n):
+    ticker = [1, ['6500.1', '1.5', '6500.2', '2.5', '10', '0.01', '6500.1',
+                  '12000', '6600', '6400']]
+    trade = [2, 'te', [1, 1500000000000, '0.5', '6500.1']]
+    book = [3, ['6500.1', 2, '1.5']]
+    raw = [json.dumps(m) for m in (ticker, trade, book)]
+    return [raw[i % 3] for i in range(n)]
+
+
+def run(n, inline, interval=0):
+    client = BitfinexWSS(inline=inline)
+    client._handle_subscribed(0, chanId=1, channel='ticker', pair='BTCUSD')
+    client._handle_subscribed(0, chanId=2, channel='trades', pair='BTCUSD')
+    client._handle_subscribed(0, chanId=3, channel='book', pair='BTCUSD',
+                              prec='P0')
+    done = threading.Event()
+    received = [0]
+
+    def count(item):
+        received[0] += 1
+        if received[0] == n:
+            done.set()
+
+    client.add_listener(callback=count)
+    client.conn = ReplayConnection(messages(n), interval)
+    client.running = True
+    threads = [threading.Thread(target=client.receive, daemon=True)]
+    if not inline:
+        threads.append(threading.Thread(target=client.process, daemon=True))
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    done.wait()
+    elapsed = time.perf_counter() - start
+    client.running = False
+    for thread in threads:
+        thread.join()
+
+    stats = client.latency.stats()
+    return {'throughput': n / elapsed,
+            'dispatch': {channel: (stats[channel]['dispatch']['p50'],
+                                   stats[channel]['dispatch']['p99'])
+                         for channel in stats}}
+
+
+def main(n=100000, interval=200):
+    for pacing, wait in (('saturated', 0), ('paced', interval / 1e6)):
+        count = n if not wait else min(n, 10000)
+        print("%s, %s messages:" % (pacing, count))
+        for name, inline in (('two-thread', False), ('inline', True)):
+            result = run(count, inline, wait)
+            print("  %-10s %10.0f msg/s" % (name, result['throughput']))
+            for channel, (p50, p99) in sorted(result['dispatch'].items()):
+                print("             %-12s p50 %8.1fus  p99 %8.1fus" %
+                      (channel, p50 * 1e6, p99 * 1e6))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
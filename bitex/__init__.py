@@ -1,9 +1,35 @@
+# Import Built-Ins
 import logging
+
+# Import Homebrew
+from bitex._lazy import lazy_module
+
 logging.getLogger(__name__).warning("The API clients available in this package are deprecated "
                                     "and will be no longer available in their current form "
                                     "starting with version 2.0!")
-from bitex.interfaces import Kraken, Bitfinex, Bitstamp, CCEX, Coincheck
-from bitex.interfaces import Cryptopia, Gemini, ItBit, OKCoin, RockTradingLtd
-from bitex.interfaces import Yunbi, Bittrex, Poloniex, Quoine, QuadrigaCX
-from bitex.interfaces import Vaultoro, HitBtc, Bter, GDAX
+
+_EXPORTS = {'Kraken': 'bitex.interfaces.kraken',
+            'Bitfinex': 'bitex.interfaces.bitfinex',
+            'Bitstamp': 'bitex.interfaces.bitstamp',
+            'CCEX': 'bitex.interfaces.ccex',
+            'Coincheck': 'bitex.interfaces.coincheck',
+            'Cryptopia': 'bitex.interfaces.cryptopia',
+            'Gemini': 'bitex.interfaces.gemini',
+            'ItBit': 'bitex.interfaces.itbit',
+            'OKCoin': 'bitex.interfaces.okcoin',
+            'RockTradingLtd': 'bitex.interfaces.rocktrading',
+            'Yunbi': 'bitex.interfaces.yunbi',
+            'Bittrex': 'bitex.interfaces.bittrex',
+            'Poloniex': 'bitex.interfaces.poloniex',
+            'Quoine': 'bitex.interfaces.quoine',
+            'QuadrigaCX': 'bitex.interfaces.quadriga',
+            'Vaultoro': 'bitex.interfaces.vaultoro',
+            'HitBtc': 'bitex.interfaces.hitbtc',
+            'Bter': 'bitex.interfaces.bter',
+            'GDAX': 'bitex.interfaces.gdax'}
+_SUBMODULES = ('api', 'formatters', 'interfaces', 'utils')
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_module(__name__, _EXPORTS, _SUBMODULES)
 
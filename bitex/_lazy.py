@@ -0,0 +1,45 @@
+"""
+Lazy package exports.
+
+Packages list the names they export and the modules defining them; each
+module is imported on first access to one of its names, so that importing
+a package stays cheap and using a single REST client doesn't import the
+websocket libraries (or any other exchange's modules).
+"""
+
+# Import Built-Ins
+import sys
+from importlib import import_module
+
+# Import Third-Party
+
+# Import Homebrew
+
+
+def lazy_module(name, exports, submodules=()):
+    """
+    Returns module-level __getattr__ and __dir__ functions for package name.
+    :param name: str, the package's __name__
+    :param exports: dict of exported name: defining module pairs
+    :param submodules: iterable of sub package names, imported on access
+    :return: tuple of (__getattr__, __dir__)
+    """
+    namespace = vars(sys.modules[name])
+    submodules = tuple(submodules)
+
+    def __getattr__(attr):
+        if attr in submodules:
+            return import_module(name + '.' + attr)
+        try:
+            module = exports[attr]
+        except KeyError:
+            raise AttributeError("module %r has no attribute %r" %
+                                 (name, attr))
+        value = getattr(import_module(module), attr)
+        namespace[attr] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(exports) | set(submodules))
+
+    return __getattr__, __dir__
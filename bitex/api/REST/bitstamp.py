@@ -18,6 +18,9 @@ class BitstampREST(APIClient):
     def __init__(self, user_id='', key=None, secret=None, api_version=None,
                  url='https://www.bitstamp.net/api', timeout=5):
         self.id = user_id
+        # Endpoints are relative to the url's '/api' path, which urljoin()
+        # only keeps if the url ends with a slash
+        url = url if url.endswith('/') else url + '/'
         super(BitstampREST, self).__init__(url, api_version=api_version,
                                            key=key, secret=secret,
                                            timeout=timeout)
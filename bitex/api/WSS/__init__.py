@@ -1,7 +1,17 @@
-from bitex.api.WSS.bitfinex import BitfinexWSS
-from bitex.api.WSS.bitstamp import BitstampWSS
-from bitex.api.WSS.gdax import GDAXWSS
-from bitex.api.WSS.gemini import GeminiWSS
-from bitex.api.WSS.hitbtc import HitBTCWSS
-from bitex.api.WSS.okcoin import OKCoinWSS
-from bitex.api.WSS.poloniex import PoloniexWSS
+# Import Homebrew
+from bitex._lazy import lazy_module
+
+_EXPORTS = {'AsyncWSSAPI': 'bitex.api.WSS.aio',
+            'BitfinexWSS': 'bitex.api.WSS.bitfinex',
+            'BitstampWSS': 'bitex.api.WSS.bitstamp',
+            'GDAXWSS': 'bitex.api.WSS.gdax',
+            'GeminiWSS': 'bitex.api.WSS.gemini',
+            'HitBTCWSS': 'bitex.api.WSS.hitbtc',
+            'OKCoinWSS': 'bitex.api.WSS.okcoin',
+            'PoloniexWSS': 'bitex.api.WSS.poloniex',
+            'ShardedBitfinexWSS': 'bitex.api.WSS.bitfinex'}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_module(__name__, _EXPORTS)
+
@@ -0,0 +1,211 @@
+"""
+Account state of authenticated websocket channels.
+
+Bitfinex sends the state of an account on its authenticated channel (0) as
+a snapshot per category once authenticated - open orders ('os'), positions
+('ps'), wallets ('ws'), balance ('bs') and margin info ('mis') - followed by
+deltas as it changes. BitfinexAccount reduces these into dicts keyed by the
+entity's id, so its current state can be read in O(1) instead of polling
+the REST API's orders() or balance() endpoints.
+
+Rows are stored as sent by the exchange:
+    order:    [ID, GID, CID, SYMBOL, MTS_CREATE, MTS_UPDATE, AMOUNT,
+               AMOUNT_ORIG, TYPE, TYPE_PREV, .., .., FLAGS, STATUS, ..,
+               .., PRICE, PRICE_AVG, ..]
+    position: [SYMBOL, STATUS, AMOUNT, BASE_PRICE, MARGIN_FUNDING,
+               MARGIN_FUNDING_TYPE, PL, PL_PERC, PRICE_LIQ, LEVERAGE, ..]
+    wallet:   [WALLET_TYPE, CURRENCY, BALANCE, UNSETTLED_INTEREST,
+               BALANCE_AVAILABLE, ..]
+    balance:  [AUM, AUM_NET]
+    margin:   [USER_PL, USER_SWAPS, MARGIN_BALANCE, MARGIN_NET, ..] ('base')
+              or [TRADABLE_BALANCE, GROSS_BALANCE, BUY, SELL] (per symbol)
+"""
+
+# Import Built-Ins
+import logging
+import threading
+
+# Import Third-Party
+
+# Import Homebrew
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class BitfinexAccount:
+    """
+    Open orders, positions, wallets, balance and margin info of a Bitfinex
+    account, maintained from the snapshots and deltas of the authenticated
+    channel.
+
+    Like OrderBook, it's updated by a single writer (the client's processing
+    thread); all methods are thread-safe, and views return copies.
+    """
+    # Snapshot and delta events of each category
+    SNAPSHOTS = {'os': 'orders', 'ps': 'positions', 'ws': 'wallets',
+                 'bs': 'balance', 'mis': 'margin'}
+    DELTAS = {'on': 'orders', 'ou': 'orders', 'oc': 'orders',
+              'pn': 'positions', 'pu': 'positions', 'pc': 'positions',
+              'wu': 'wallets', 'bu': 'balance', 'miu': 'margin'}
+
+    def __init__(self):
+        self.orders = {}  # Open orders, by order id
+        self.positions = {}  # Open positions, by symbol
+        self.wallets = {}  # Wallets, by (wallet type, currency)
+        self.balance = None
+        self.margin = {}  # Margin info, by symbol; 'base' for the account
+        self.snapshots = set()  # Categories whose snapshot was received
+        self.updates = 0
+        self.errors = 0
+        self.ts = None
+        self.lock = threading.RLock()
+
+    def apply(self, event, payload, ts=None):
+        """
+        Applies a snapshot or delta of the authenticated channel; events of
+        other categories (trades, funding, historical data) are ignored.
+        :param event: str, event code, i.e. 'os' or 'wu'
+        :param payload: list, the event's data
+        :param ts: timestamp, declares when data was received by the client
+        :return: bool, True if the account's state was updated
+        """
+        if event in self.SNAPSHOTS:
+            category = self.SNAPSHOTS[event]
+        elif event in self.DELTAS:
+            category = self.DELTAS[event]
+        else:
+            return False
+
+        with self.lock:
+            if category == 'orders':
+                self._apply_orders(event, payload)
+            elif category == 'positions':
+                self._apply_positions(event, payload)
+            elif category == 'wallets':
+                if event == 'ws':
+                    self.wallets = {}
+                    rows = payload
+                else:
+                    rows = [payload]
+                for row in rows:
+                    self.wallets[row[0], row[1]] = row
+            elif category == 'balance':
+                self.balance = payload
+            else:
+                self._apply_margin(event, payload)
+            if event in self.SNAPSHOTS:
+                self.snapshots.add(category)
+            self.updates += 1
+            self.ts = ts
+        return True
+
+    def _apply_orders(self, event, payload):
+        if event == 'os':
+            self.orders = {row[0]: row for row in payload}
+        elif event == 'oc':
+            # Closed orders were either executed or canceled
+            self.orders.pop(payload[0], None)
+        else:
+            self.orders[payload[0]] = payload
+
+    def _apply_positions(self, event, payload):
+        if event == 'ps':
+            self.positions = {row[0]: row for row in payload
+                              if row[1] != 'CLOSED'}
+        elif event == 'pc' or payload[1] == 'CLOSED':
+            self.positions.pop(payload[0], None)
+        else:
+            self.positions[payload[0]] = payload
+
+    def _apply_margin(self, event, payload):
+        if payload and payload[0] == 'base':
+            self.margin['base'] = payload[1]
+        elif payload and payload[0] == 'sym':
+            self.margin[payload[1]] = payload[2]
+        else:
+            log.debug("BitfinexAccount: Unknown margin info %s - %s", event,
+                      payload)
+
+    def clear(self):
+        """
+        Forgets the account's state, i.e. after the connection was lost; it's
+        restored by the snapshots sent after authenticating again.
+        """
+        with self.lock:
+            self.orders = {}
+            self.positions = {}
+            self.wallets = {}
+            self.balance = None
+            self.margin = {}
+            self.snapshots = set()
+
+    def invalidate(self, event):
+        """
+        Marks the category of event as out of sync, i.e. after one of its
+        deltas couldn't be applied; it's in sync again with its next
+        snapshot.
+        :param event: str, event code, i.e. 'ou'
+        :return:
+        """
+        category = self.SNAPSHOTS.get(event) or self.DELTAS.get(event)
+        with self.lock:
+            self.errors += 1
+            self.snapshots.discard(category)
+
+    @property
+    def synced(self):
+        """
+        True once snapshots of orders, positions and wallets were received.
+        """
+        return {'orders', 'positions', 'wallets'} <= self.snapshots
+
+    def order(self, order_id):
+        """
+        Returns an open order.
+        :param order_id: int
+        :return: list, the order's row, or None if it isn't open
+        """
+        return self.orders.get(order_id)
+
+    def open_orders(self, symbol=None):
+        """
+        Returns the open orders, optionally of a single symbol only.
+        :param symbol: str, i.e. 'tBTCUSD'
+        :return: dict of order rows, by order id
+        """
+        with self.lock:
+            if symbol is None:
+                return dict(self.orders)
+            return {order_id: row for order_id, row in self.orders.items()
+                    if row[3] == symbol}
+
+    def position(self, symbol):
+        """
+        Returns the open position of a symbol.
+        :param symbol: str, i.e. 'tBTCUSD'
+        :return: list, the position's row, or None if there is none
+        """
+        return self.positions.get(symbol)
+
+    def wallet(self, currency, wallet_type='exchange'):
+        """
+        Returns a wallet.
+        :param currency: str, i.e. 'BTC'
+        :param wallet_type: str, 'exchange', 'margin' or 'funding'
+        :return: list, the wallet's row, or None if it doesn't exist
+        """
+        return self.wallets.get((wallet_type, currency))
+
+    def available(self, currency, wallet_type='exchange'):
+        """
+        Returns a wallet's available balance.
+        :param currency: str, i.e. 'BTC'
+        :param wallet_type: str, 'exchange', 'margin' or 'funding'
+        :return: float, or None if unknown; Bitfinex only sends it when
+                 requested via a 'calc' input message
+        """
+        row = self.wallets.get((wallet_type, currency))
+        if row is None or len(row) < 5 or row[4] is None:
+            return None
+        return float(row[4])
@@ -0,0 +1,463 @@
+"""
+Asyncio-based Base Class for websocket clients.
+
+Unlike the thread-based WSSAPI clients, which run one or more threads per
+connection, AsyncWSSAPI runs any number of websocket connections - and their
+heartbeats and reconnect timers - on a single event loop in a single thread.
+Consumers in other threads keep using the thread-safe get() and send().
+"""
+
+# Import Built-Ins
+import logging
+import json
+import queue
+import asyncio
+import threading
+from collections import deque
+
+# Import Third-Party
+from autobahn.asyncio.websocket import WebSocketClientProtocol
+from autobahn.asyncio.websocket import WebSocketClientFactory
+from autobahn.websocket.util import parse_url
+
+# Import Homebrew
+from bitex.api.WSS.base import WSSAPI, Backoff
+from bitex.api.WSS.latency import stamp
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class _ClientProtocol(WebSocketClientProtocol):
+    """
+    Forwards protocol events to the WSSConnection owning the factory.
+    """
+    def onOpen(self):
+        self.factory.connection.opened(self)
+
+    def onMessage(self, payload, isBinary):
+        self.factory.connection.received(payload, isBinary, stamp())
+
+    def onClose(self, wasClean, code, reason):
+        self.factory.connection.closed(wasClean, code, reason)
+
+
+class WSSConnection:
+    """
+    A single websocket connection, managed by an AsyncWSSAPI. All methods
+    must be called on the client's event loop.
+    """
+    def __init__(self, client, name, addr, heartbeat=None,
+                 heartbeat_timeout=None):
+        """
+        Initialize Object.
+        :param client: AsyncWSSAPI obj
+        :param name: str, name of the connection
+        :param addr: str, websocket address
+        :param heartbeat: float, seconds between websocket pings; off if None
+        :param heartbeat_timeout: float, seconds to wait for a pong before
+                                  dropping the connection; defaults to
+                                  heartbeat
+        """
+        self.client = client
+        self.name = name
+        self.addr = addr
+        self.heartbeat = heartbeat
+        self.heartbeat_timeout = heartbeat_timeout or heartbeat
+        self.active = True
+        self.protocol = None
+        self.reconnects = 0
+        self.backoff = Backoff(base=client.reconnect_delay)
+        self._done = None
+        self._task = None
+
+    @property
+    def connected(self):
+        return self.protocol is not None
+
+    def factory(self):
+        factory = WebSocketClientFactory(self.addr,
+                                         loop=self.client.loop)
+        factory.protocol = _ClientProtocol
+        factory.connection = self
+        if self.heartbeat:
+            factory.setProtocolOptions(autoPingInterval=self.heartbeat,
+                                       autoPingTimeout=self.heartbeat_timeout)
+        return factory
+
+    def opened(self, protocol):
+        self.protocol = protocol
+        self.backoff.reset()
+        log.info("%s: Connection %s established", self.client.name, self.name)
+        self.client.on_open(self)
+
+    def received(self, payload, is_binary, ts):
+        try:
+            self.client.on_message(self, payload, is_binary, ts)
+        except Exception:
+            log.exception("%s: Error handling message on %s: %s",
+                          self.client.name, self.name, payload)
+
+    def closed(self, was_clean, code, reason):
+        log.info("%s: Connection %s closed (%s, %s)", self.client.name,
+                 self.name, code, reason)
+        self.protocol = None
+        self.client.on_close(self)
+        if self._done is not None and not self._done.done():
+            self._done.set_result(None)
+
+    def send(self, payload):
+        """
+        Sends payload; dicts and lists are sent as json.
+        :param payload: str, bytes, dict or list
+        :return: bool, False if not connected
+        """
+        if self.protocol is None:
+            log.warning("%s: Can't send on %s - not connected! %s",
+                        self.client.name, self.name, payload)
+            return False
+        if isinstance(payload, (dict, list)):
+            payload = json.dumps(payload)
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        self.protocol.sendMessage(payload)
+        return True
+
+    def drop(self):
+        """
+        Closes the connection; it is reopened unless it was deactivated.
+        :return:
+        """
+        if self.protocol is not None:
+            self.protocol.sendClose()
+
+    async def run(self):
+        """
+        Connects, waits for the connection to close, and reconnects with
+        jittered exponential backoff, until deactivated or the client stops.
+        :return:
+        """
+        loop = self.client.loop
+        while self.client.running and self.active:
+            is_secure, host, port, *_ = parse_url(self.addr)
+            self._done = loop.create_future()
+            try:
+                await loop.create_connection(self.factory(), host, port,
+                                             ssl=is_secure)
+                await self._done
+            except (OSError, asyncio.TimeoutError):
+                log.exception("%s: Could not connect %s to %s",
+                              self.client.name, self.name, self.addr)
+            if not (self.client.running and self.active):
+                break
+            self.reconnects += 1
+            await asyncio.sleep(self.backoff.delay())
+
+
+class AsyncWSSAPI(WSSAPI):
+    """
+    Base Class for websocket clients running on a single asyncio event loop.
+
+    Subclasses register connections via add_connection() and override the
+    on_open(), on_message() and on_close() hooks, which are all called on
+    the event loop thread. By default, on_message() decodes messages as
+    json, maps them to (channel, pair, data) via parse() - which subclasses
+    should override - and publishes them as (channel, pair, data, ts).
+
+    Nothing may block the event loop: items are put on the data_q without
+    blocking, and if it's full (policy 'block'), kept in a backlog on the
+    loop until consumers make room; listener queues must not block either.
+
+    Commands put on the _controller_q are evaluated on the event loop, too -
+    'restart' drops and reopens all connections, 'stop' stops the client.
+    """
+    def __init__(self, addr, name, reconnect_delay=1, maxsize=0,
+                 overflow='block', conflate=None):
+        """
+        Initialize Object.
+        :param addr: str, default address for connections
+        :param name: str, name of the client
+        :param reconnect_delay: float, seconds to wait before reconnecting
+                                the first time; doubled on every failed
+                                attempt
+        :param maxsize: int, maximum number of items on the data_q
+        :param overflow: str, data_q overflow policy (see WSSAPI)
+        :param conflate: list of channel names to conflate (see WSSAPI)
+        """
+        super(AsyncWSSAPI, self).__init__(addr, name, maxsize, overflow,
+                                          conflate)
+        self.reconnect_delay = reconnect_delay
+        self.connections = {}
+        self.loop = None
+        self._loop_thread = None
+        self._controller_timer = None
+        self._backlog = deque()  # Items waiting for room on the data_q
+        self._flush_timer = None
+
+    ##
+    # Event Loop Management
+    ##
+
+    def start(self):
+        """
+        Starts the event loop thread and opens all registered connections.
+        :return:
+        """
+        if self._loop_thread is not None and self._loop_thread.is_alive():
+            log.info("%s.start(): Already running!", self.name)
+            return
+        log.info("%s.start(): Starting event loop..", self.name)
+        self.running = True
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        self._loop_thread = threading.Thread(target=self._run_loop,
+                                             args=(started,), daemon=True,
+                                             name='%s Event Loop' % self.name)
+        self._loop_thread.start()
+        started.wait()
+        self.call_soon(self._open_all)
+
+    def _run_loop(self, started):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(started.set)
+        self._controller_timer = self.loop.call_later(0.5, self._controller)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def _open_all(self):
+        for conn in self.connections.values():
+            self._open(conn)
+
+    def _open(self, conn):
+        if conn._task is None or conn._task.done():
+            conn._task = self.loop.create_task(conn.run())
+
+    def stop(self):
+        """
+        Closes all connections and stops the event loop.
+        :return:
+        """
+        log.info("%s.stop(): Stopping..", self.name)
+        self.running = False
+        if self.loop is None or self.loop.is_closed():
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._shutdown)
+        except RuntimeError:
+            # Loop was closed in the meantime
+            return
+        if threading.current_thread() is not self._loop_thread:
+            self._loop_thread.join()
+
+    def _shutdown(self):
+        if self._controller_timer:
+            self._controller_timer.cancel()
+        if self._flush_timer:
+            self._flush_timer.cancel()
+        for conn in self.connections.values():
+            conn.drop()
+            if conn._task:
+                conn._task.cancel()
+        # Give close handshakes a moment before stopping the loop
+        self.loop.call_later(0.1, self.loop.stop)
+
+    def restart(self):
+        """
+        Drops and reopens all connections.
+        :return:
+        """
+        self.call_soon(self._restart)
+
+    def _restart(self):
+        for conn in self.connections.values():
+            conn.drop()
+
+    def _controller(self):
+        """
+        Evaluates commands on the _controller_q; runs on the event loop
+        every 0.5 seconds.
+        :return:
+        """
+        while True:
+            try:
+                cmd = self._controller_q.get_nowait()
+            except queue.Empty:
+                break
+            log.debug("%s._controller(): Received command: %s", self.name, cmd)
+            try:
+                self.eval_command(cmd)
+            except Exception:
+                log.exception("%s._controller(): Error evaluating %s",
+                              self.name, cmd)
+        if self.running:
+            self._controller_timer = self.loop.call_later(0.5, self._controller)
+
+    def eval_command(self, cmd):
+        if cmd == 'restart':
+            self._restart()
+        elif cmd == 'stop':
+            self.stop()
+        else:
+            raise ValueError("Unknown Command passed to controller! %s" % cmd)
+
+    ##
+    # Thread-safe Interface
+    ##
+
+    def call_soon(self, callback, *args):
+        """
+        Schedules callback to be called on the event loop; safe to call from
+        any thread.
+        :param callback: callable
+        :param args: arguments for callback
+        :return:
+        """
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def call_later(self, delay, callback, *args):
+        """
+        Schedules callback to be called on the event loop after delay
+        seconds; safe to call from any thread.
+        :param delay: float
+        :param callback: callable
+        :param args: arguments for callback
+        :return:
+        """
+        self.loop.call_soon_threadsafe(self.loop.call_later, delay, callback,
+                                       *args)
+
+    def add_listener(self, channel=None, pair=None, callback=None, maxsize=0,
+                     overflow='block'):
+        if callback is None and maxsize > 0 and overflow == 'block':
+            raise ValueError("Listener queues of %s must not block the "
+                             "event loop - pass another overflow policy!" %
+                             self.name)
+        return super(AsyncWSSAPI, self).add_listener(channel, pair, callback,
+                                                     maxsize, overflow)
+
+    def _enqueue(self, item):
+        """
+        Puts item on the data_q without blocking; items which don't fit
+        are kept in a backlog, which is flushed as room becomes available.
+        """
+        if not self._backlog:
+            try:
+                self.data_q.put(item, block=False)
+                return
+            except queue.Full:
+                log.debug("%s._enqueue(): data_q full, backlogging",
+                          self.name)
+        self._backlog.append(item)
+        if self._flush_timer is None and self.loop is not None:
+            self._flush_timer = self.loop.call_later(0.01, self._flush)
+
+    def _flush(self):
+        """
+        Moves backlogged items to the data_q, as far as there is room;
+        runs on the event loop until the backlog is empty.
+        """
+        self._flush_timer = None
+        while self._backlog:
+            try:
+                self.data_q.put(self._backlog[0], block=False)
+            except queue.Full:
+                if self.running:
+                    self._flush_timer = self.loop.call_later(0.01,
+                                                             self._flush)
+                return
+            self._backlog.popleft()
+
+    def add_connection(self, name, addr=None, heartbeat=None,
+                       heartbeat_timeout=None):
+        """
+        Registers a connection, and opens it if the client is running.
+        :param name: str, name of the connection
+        :param addr: str, websocket address; defaults to self.addr
+        :param heartbeat: float, seconds between websocket pings
+        :param heartbeat_timeout: float, seconds to wait for a pong
+        :return: WSSConnection obj
+        """
+        if name in self.connections:
+            raise ValueError("Connection %s already exists!" % name)
+        conn = WSSConnection(self, name, addr if addr else self.addr,
+                             heartbeat, heartbeat_timeout)
+        self.connections[name] = conn
+        if self.running:
+            self.call_soon(self._open, conn)
+        return conn
+
+    def remove_connection(self, name):
+        """
+        Closes and unregisters a connection.
+        :param name: str
+        :return:
+        """
+        conn = self.connections.pop(name)
+        conn.active = False
+        if self.running:
+            self.call_soon(conn.drop)
+
+    def send(self, payload, connection=None):
+        """
+        Sends payload on the given connection; safe to call from any thread.
+        :param payload: str, bytes, dict or list
+        :param connection: str, connection name; may be omitted if there is
+                           only one connection
+        :return:
+        """
+        if connection is None:
+            if len(self.connections) != 1:
+                raise ValueError("Must specify a connection when the client "
+                                 "has %s connections!" % len(self.connections))
+            conn, = self.connections.values()
+        else:
+            conn = self.connections[connection]
+        self.call_soon(conn.send, payload)
+
+    ##
+    # Hooks - called on the event loop
+    ##
+
+    def on_open(self, conn):
+        """
+        Called when a connection was (re-)established; send subscriptions
+        here. Does nothing by default.
+        :param conn: WSSConnection obj
+        :return:
+        """
+        pass
+
+    def on_message(self, conn, payload, is_binary, ts):
+        """
+        Called for every message received.
+        :param conn: WSSConnection obj
+        :param payload: bytes
+        :param is_binary: bool
+        :param ts: Timestamp obj, declares when data was received
+        :return:
+        """
+        item = self.parse(conn, json.loads(payload.decode('utf-8')))
+        if item is not None:
+            channel, pair, data = item
+            self.publish((channel, pair, data, ts), ts)
+
+    def parse(self, conn, msg):
+        """
+        Maps a decoded message to the channel and pair it belongs to.
+        Override this in children; by default, the connection's name is
+        used as channel, and the pair is unknown.
+        :param conn: WSSConnection obj
+        :param msg: decoded json
+        :return: tuple of (channel, pair, data), or None to drop msg
+        """
+        return conn.name, None, msg
+
+    def on_close(self, conn):
+        """
+        Called when a connection was closed. Does nothing by default.
+        :param conn: WSSConnection obj
+        :return:
+        """
+        pass
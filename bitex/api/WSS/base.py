@@ -1,11 +1,18 @@
 # Import Built-Ins
 import logging
+import random
+import time
+from collections import OrderedDict
 from queue import Queue, Empty
-from threading import Thread
+from threading import Thread, Lock
 
 # Import Third-Party
 
 # Import Homebrew
+from bitex.api.WSS.queues import BoundedQueue, channels_key
+from bitex.api.WSS.bus import TopicBus, Listener
+from bitex.api.WSS.latency import LatencyMonitor, Timestamp
+from bitex.api.WSS.events import NORMALIZERS, normalize
 
 # Init Logging Facilities
 log = logging.getLogger(__name__)
@@ -17,11 +24,24 @@ class WSSAPI:
     subclass, as the various wss APIs are too diverse in order to distill a
     sensible pool of common attributes.
     """
-    def __init__(self, addr, name):
+    def __init__(self, addr, name, maxsize=0, overflow='block',
+                 conflate=None):
         """
         Initialize Object.
         :param addr:
         :param name:
+        :param maxsize: int, maximum number of items on the data_q; unbounded
+                        if <= 0
+        :param overflow: str, data_q overflow policy - 'block', 'drop-oldest',
+                         'drop-newest' or 'conflate' (see BoundedQueue)
+        :param conflate: list of channel names, i.e. ['ticker', 'order_book'];
+                         if given, the data_q holds at most one pending item
+                         per (channel, pair) of these channels, replacing it
+                         with newer ones in place, while items of all other
+                         channels are delivered losslessly. Overrides
+                         overflow. Only conflate channels whose items carry
+                         full state (i.e. tickers or book snapshots) -
+                         conflated incremental updates are lost.
         """
         log.debug("WSSAPI.__init__(): Initializing Websocket API")
         self.addr = addr
@@ -35,7 +55,21 @@ class WSSAPI:
         self._controller_q = Queue()
 
         # Queue storing all received data
-        self.data_q = Queue()
+        if conflate:
+            self.data_q = BoundedQueue(maxsize, 'conflate',
+                                       key=channels_key(conflate))
+        else:
+            self.data_q = BoundedQueue(maxsize, overflow)
+
+        # Listeners for data of specific channels and pairs
+        self.bus = TopicBus()
+
+        # Feed and dispatch latency histograms per channel
+        self.latency = LatencyMonitor(name)
+
+        # Converts data to normalized events, if enabled via normalize()
+        self.normalizer = None
+        self.normalize_errors = 0
 
         # Internal Controller thread, responsible for starts / restarts / stops
         self._controller_thread = None
@@ -107,5 +141,268 @@ class WSSAPI:
         else:
             raise ValueError("Unknown Command passed to controller! %s" % cmd)
 
+    def publish(self, item, ts=None):
+        """
+        Routes received data to all matching listeners; data no listener is
+        interested in is put on the data_q.
+        :param item: tuple of (channel, pair, data, ..)
+        :param ts: Timestamp obj of the message item was received with; if
+                   given, its latencies are recorded
+        :return:
+        """
+        if isinstance(ts, Timestamp):
+            self.latency.record(item[0], ts)
+        if self.normalizer is not None:
+            try:
+                events = self.normalizer(self.name, item, ts)
+            except Exception:
+                self.normalize_errors += 1
+                log.exception("WSSAPI.publish(): Failed to normalize %s",
+                              item)
+                return
+            for event in events:
+                if not self.bus.dispatch(event):
+                    self._enqueue(event)
+            return
+        if not self.bus.dispatch(item):
+            self._enqueue(item)
+
+    def _enqueue(self, item):
+        """
+        Puts item on the data_q; blocks while it is full, if its overflow
+        policy is 'block'.
+        """
+        self.data_q.put(item)
+
+    def normalize(self, enabled=True):
+        """
+        Enables (or disables) the normalization stage: instead of data in
+        the client's own format, normalized events (BookUpdate, Trade,
+        Ticker, Candle and AccountUpdate, see bitex.api.WSS.events) are
+        routed to listeners and put on the data_q. Data which has no event
+        type (i.e. Bitfinex's raw order books) is dropped.
+        :param enabled: bool
+        :return:
+        """
+        if enabled and self.name not in NORMALIZERS:
+            raise ValueError("No normalizer for %s!" % self.name)
+        self.normalizer = normalize if enabled else None
+
+    def add_listener(self, channel=None, pair=None, callback=None, maxsize=0,
+                     overflow='block'):
+        """
+        Registers a listener for data of channels and pairs matching the given
+        patterns (i.e. channel='trades', pair='*USD'); None matches anything.
+        Data routed to listeners is no longer put on the data_q.
+        :param channel: str, channel pattern
+        :param pair: str, pair pattern
+        :param callback: callable, called with each item on the thread
+                         receiving it; if None, items are put on the
+                         listener's queue, read via listener.get()
+        :param maxsize: int, maximum size of the listener's queue
+        :param overflow: str, overflow policy of the listener's queue
+        :return: Listener obj
+        """
+        return self.bus.add(Listener(channel, pair, callback, maxsize,
+                                     overflow))
+
+    def remove_listener(self, listener):
+        self.bus.remove(listener)
+
     def get(self, **kwargs):
         return self.data_q.get(**kwargs)
+
+    def get_batch(self, max_items=None, timeout=None):
+        """
+        Returns up to max_items items from the data_q at once.
+        :param max_items: int, all items available if None
+        :param timeout: float, seconds to wait for the first item; forever if
+                        None, not at all if 0
+        :return: list
+        """
+        return self.data_q.get_batch(max_items, timeout)
+
+    def drain(self):
+        """
+        Returns an iterator over all items currently on the data_q.
+        :return: iterator
+        """
+        return self.data_q.drain()
+
+
+class Backoff:
+    """
+    Jittered exponential backoff: the n-th delay is drawn uniformly from
+    [(1 - jitter) * d, d], with d = min(cap, base * factor ** n). The
+    jitter keeps many clients from reconnecting in lockstep after an
+    exchange-wide outage.
+    """
+    def __init__(self, base=0.5, cap=30, factor=2, jitter=0.5):
+        """
+        Initialize Object.
+        :param base: float, seconds to wait before the first retry
+        :param cap: float, maximum number of seconds to wait
+        :param factor: float, growth of the delay per attempt
+        :param jitter: float, fraction of the delay to randomize
+        """
+        self.base = base
+        self.cap = cap
+        self.factor = factor
+        self.jitter = jitter
+        self.attempts = 0
+
+    def delay(self):
+        """
+        Returns the delay before the next attempt, and counts the attempt.
+        :return: float
+        """
+        d = min(self.cap, self.base * self.factor ** self.attempts)
+        self.attempts += 1
+        return d * (1 - self.jitter * random.random())
+
+    def reset(self):
+        self.attempts = 0
+
+
+class Supervisor:
+    """
+    Supervises a single websocket connection of a client: (re-)connects with
+    jittered exponential backoff, replays all registered subscriptions after
+    each reconnect, and measures the gaps in received data caused by
+    disconnects.
+
+    Clients call connect() from the thread owning the connection, both for
+    the initial connection and after a disconnect, which they report via
+    disconnected(); received() is called for every message, to timestamp the
+    end of a gap.
+    """
+    def __init__(self, client, connect, send=None, backoff=None, name=None,
+                 active=None):
+        """
+        Initialize Object.
+        :param client: WSSAPI obj; reconnecting stops once client.running
+                       is False
+        :param connect: callable, opening the connection; raises an
+                        Exception on failure
+        :param send: callable, sending a subscription payload
+        :param backoff: Backoff obj
+        :param name: str, name of the connection, for logging
+        :param active: callable returning False once the connection is no
+                       longer wanted, even though the client is running
+        """
+        self.client = client
+        self._connect = connect
+        self._send = send
+        self.backoff = backoff if backoff else Backoff()
+        self.name = name if name else client.name
+        self._active = active
+        self.subscriptions = OrderedDict()
+        self._lock = Lock()
+
+        # Metrics
+        self.disconnects = 0
+        self.connect_attempts = 0
+        self.last_gap = None
+        self.max_gap = 0
+        self.total_gap = 0
+        self._down = False
+        self._gap_start = None
+        self._last_received = None
+
+    @property
+    def running(self):
+        return self.client.running and (self._active is None or
+                                        self._active())
+
+    def register(self, key, payload):
+        """
+        Adds a subscription to the registry; registering a key again
+        replaces its payload.
+        :param key: hashable, identifying the subscription
+        :param payload: subscription payload, passed to send
+        :return:
+        """
+        with self._lock:
+            self.subscriptions[key] = payload
+
+    def unregister(self, key):
+        with self._lock:
+            self.subscriptions.pop(key, None)
+
+    def replay(self):
+        """
+        Sends all registered subscriptions, in the order they were made.
+        :return:
+        """
+        with self._lock:
+            payloads = list(self.subscriptions.values())
+        for payload in payloads:
+            self._send(payload)
+
+    def connect(self):
+        """
+        Connects, retrying with backoff until it succeeds or the client is
+        stopped, and replays all registered subscriptions.
+        :return: bool, False if the client was stopped before connecting
+        """
+        while self.running:
+            self.connect_attempts += 1
+            try:
+                self._connect()
+                self.replay()
+            except Exception:
+                delay = self.backoff.delay()
+                log.exception("%s: Connecting failed - retrying in %.2fs",
+                              self.name, delay)
+                self._sleep(delay)
+                continue
+            log.info("%s: Connected.", self.name)
+            self.backoff.reset()
+            return True
+        return False
+
+    def _sleep(self, seconds):
+        # Sleep in slices, so stopping the client isn't delayed by backoff
+        deadline = time.monotonic() + seconds
+        while self.running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 0.5))
+
+    def disconnected(self):
+        """
+        Marks the connection as down; the gap lasts from the last message
+        received until the first one after reconnecting.
+        :return:
+        """
+        if self._down:
+            return
+        self._down = True
+        self.disconnects += 1
+        self._gap_start = (self._last_received if self._last_received
+                           else time.monotonic())
+        log.warning("%s: Connection lost!", self.name)
+
+    def received(self):
+        now = time.monotonic()
+        if self._down:
+            self._down = False
+            gap = now - self._gap_start
+            self.last_gap = gap
+            self.total_gap += gap
+            self.max_gap = max(self.max_gap, gap)
+            log.info("%s: Receiving data again after %.3fs", self.name, gap)
+        self._last_received = now
+
+    def stats(self):
+        """
+        Returns the connection's metrics; gaps are given in seconds.
+        :return: dict
+        """
+        return {'connected': not self._down,
+                'subscriptions': len(self.subscriptions),
+                'disconnects': self.disconnects,
+                'connect_attempts': self.connect_attempts,
+                'last_gap': self.last_gap, 'max_gap': self.max_gap,
+                'total_gap': self.total_gap}
@@ -4,6 +4,9 @@ import json
 import time
 import queue
 import threading
+import zlib
+import math
+import functools
 from threading import Thread
 
 # Import Third-Party
@@ -11,7 +14,17 @@ from websocket import create_connection, WebSocketTimeoutException
 from websocket import WebSocketConnectionClosedException
 
 # Import Homebrew
-from bitex.api.WSS.base import WSSAPI
+from bitex.api.WSS.base import WSSAPI, Supervisor
+from bitex.api.WSS.account import BitfinexAccount
+from bitex.api.WSS.latency import stamp
+from bitex.api.WSS.timers import TimerWheel
+from bitex.api.book import OrderBook, RawOrderBook
+
+try:
+    from bitex.api.candles import CandleStore
+    numpy_available = True
+except ImportError:
+    numpy_available = False
 
 # import Server-side Exceptions
 from bitex.api.WSS.exceptions import InvalidBookLengthError, GenericSubscriptionError
@@ -29,6 +42,55 @@ from bitex.api.WSS.exceptions import FaultyPayloadError
 log = logging.getLogger(__name__)
 
 
+def _checksum_str(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def book_checksum(bids, asks):
+    """
+    Computes a Bitfinex book checksum: the CRC32 of the best 25 bids and
+    asks, interleaved, as 'bid_price:bid_amount:ask_price:ask_amount:..'
+    (raw books use order ids instead of prices).
+    :param bids: list of (price or id, amount) tuples as received, best first
+    :param asks: list of (price or id, amount) tuples as received, best first
+    :return: int, CRC32 as signed 32 bit integer
+    """
+    values = []
+    for i in range(25):
+        if i < len(bids):
+            values.extend(bids[i])
+        if i < len(asks):
+            values.extend(asks[i])
+    crc = zlib.crc32(':'.join(_checksum_str(v) for v in values).encode())
+    return crc - (1 << 32) if crc >= 1 << 31 else crc
+
+
+KINDS = ('ticker', 'ohlc', 'order_book', 'raw_order_book', 'trades')
+_CHANNEL_KINDS = {'ticker': 'ticker', 'trades': 'trades', 'candles': 'ohlc',
+                  'raw_book': 'raw_order_book'}
+
+
+def _topic(channel, fields):
+    """
+    Returns the (kind, pair) topic of a subscription, i.e. ('ohlc', 'BTCUSD').
+    :param channel: str, channel name of a subscribe payload or channel label
+    :param fields: dict, the payload or label
+    :return: tuple
+    """
+    if channel == 'book':
+        kind = ('raw_order_book' if str(fields.get('prec', '')).startswith('R')
+                else 'order_book')
+    else:
+        kind = _CHANNEL_KINDS.get(channel, channel)
+    pair = (fields.get('pair') or fields.get('symbol') or
+            fields.get('key', '').split(':')[-1])
+    if len(pair) > 1 and pair[0] == 't' and pair[1:].isupper():
+        pair = pair[1:]
+    return kind, pair
+
+
 class BitfinexWSS(WSSAPI):
     """
     Client Class to connect to Bitfinex Websocket API. Data is stored in attributes.
@@ -36,34 +98,65 @@ class BitfinexWSS(WSSAPI):
     the Server issues a connection reset.
     """
 
-    def __init__(self, pairs=None):
+    PAIRS = ['ETHBTC', 'BTCUSD', 'ETHUSD', 'ETCUSD', 'ETCBTC', 'ZECUSD',
+             'ZECBTC', 'XMRUSD', 'XMRBTC', 'LTCUSD', 'LTCBTC', 'DSHUSD',
+             'DSHBTC']
+
+    def __init__(self, pairs=None, maxsize=0, overflow='block',
+                 conflate=None, inline=False, subscriptions=None,
+                 candles=None, integrity_checks=False):
         """
         Initializes BitfinexWSS Instance.
         :param key: Api Key as string
         :param secret: Api secret as string
         :param addr: Websocket API Address
+        :param maxsize: int, maximum number of items on the data_q
+        :param overflow: str, data_q overflow policy (see WSSAPI)
+        :param conflate: list of channel names to conflate (see WSSAPI)
+        :param inline: bool, decode and dispatch messages on the receiver
+                       thread, instead of handing them to a processing
+                       thread via the receiver_q. Saves a queue hop and a
+                       thread switch per message, but handlers (and
+                       listener callbacks) then delay reading the socket.
+        :param subscriptions: list of (kind, pair) tuples, i.e.
+                              [('ticker', 'BTCUSD')], to subscribe to instead
+                              of all channels of pairs; kinds are names of
+                              the subscription methods (see KINDS)
+        :param candles: int, number of bars of each pair and timeframe to
+                        keep in self.candles, a CandleStore; requires numpy
+        :param integrity_checks: bool, configure the connection to send
+                                 sequence numbers and book checksums, and
+                                 resync books on gaps and mismatches. Costs
+                                 a CRC32 per checksum message and changes
+                                 the message format, so it's off by default
         """
-        super(BitfinexWSS, self).__init__('wss://api.bitfinex.com/ws/2', 'Bitfinex')
+        super(BitfinexWSS, self).__init__('wss://api.bitfinex.com/ws/2', 'Bitfinex',
+                                          maxsize, overflow, conflate)
         self.conn = None
         if pairs:
             self.pairs = pairs
         else:
-            self.pairs = ['ETHBTC', 'BTCUSD', 'ETHUSD', 'ETCUSD', 'ETCBTC',
-                          'ZECUSD', 'ZECBTC', 'XMRUSD', 'XMRBTC', 'LTCUSD',
-                          'LTCBTC', 'DSHUSD', 'DSHBTC']
+            self.pairs = list(self.PAIRS)
+        self.subscriptions = subscriptions
 
         # Set up variables for receiver and main loop threads
-        self._receiver_lock = threading.Lock()
-        self._processor_lock = threading.Lock()
+        self.inline = inline
+        self._unpaused = threading.Event()
+        self._unpaused.set()
         self.receiver_q = queue.Queue()
         self.receiver_thread = None
         self.processing_thread = None
 
         self.ping_timer = None
         self.timeout = 5
+        self.heartbeat_timeout = 10
         self._heartbeats = {}
         self._late_heartbeats = {}
 
+        # Heartbeat and ping deadlines, fired by the processing thread
+        self.timers = TimerWheel()
+        self._heartbeat_timers = {}
+
         # Set up book-keeping variables & configurations
         self.api_version = None
         self.channels = {}  # Dict for matching channel ids with handlers
@@ -71,6 +164,28 @@ class BitfinexWSS(WSSAPI):
         self.channel_states = {}  # Dict for matching channel ids with status of each channel (alive/dead)
         self.channel_configs = {}  # Variables, as set by subscribe command
         self.wss_config = {}  # Config as passed by 'config' command
+        self.books = {}  # Local order books of 'book' channels, by pair
+        self.raw_books = {}  # Local order books of 'raw_book' channels
+        self.account = BitfinexAccount()  # State of the auth channel
+        if candles and not numpy_available:
+            raise ImportError("candles require numpy (pip install "
+                              "BitEx[numpy])!")
+        self.candles = CandleStore(candles) if candles else None
+
+        # Sequence numbers and book checksums, if enabled via config()
+        self.integrity_checks = integrity_checks
+        self.sequencing = False
+        self.checksums = False
+        self._seq = None
+        self._auth_seq = None
+        self._raw_levels = {}  # Levels as received, by pair, for checksums
+        self._raw_orders = {}  # Order amounts as received, by pair
+        self._resyncing = {}  # Subscribe payloads of channels being resynced
+        self.integrity = {'sequence_gaps': 0, 'checksum_errors': 0,
+                          'resyncs': 0}
+
+        # Reconnects with backoff and replays config & subscriptions
+        self.supervisor = Supervisor(self, self._connect, self.send)
 
         self._event_handlers = {'error': self._raise_error,
                                 'unsubscribed': self._handle_unsubscribed,
@@ -79,7 +194,8 @@ class BitfinexWSS(WSSAPI):
                                 'unauth': self._handle_unsubscribed,
                                 'info': self._handle_info,
                                 'pong': self._handle_pong,
-                                'conf': self._handle_conf}
+                                'conf': self._handle_conf,
+                                'reconnecting': self._handle_reconnecting}
         self._data_handlers = {'ticker': self._handle_ticker,
                                'book': self._handle_book,
                                'raw_book': self._handle_raw_book,
@@ -107,76 +223,104 @@ class BitfinexWSS(WSSAPI):
     def eval_command(self, cmd):
         """
         Thread func to allow restarting / stopping of threads, for example
-        when receiving a connection reset info message from the wss server.
+        when receiving a connection reset info message from the wss server,
+        and unsubscribing on behalf of other threads.
+        :param cmd: str, 'restart' or 'stop'; or tuple of ('unsubscribe',
+                    kind, pair)
         :return:
         """
         if cmd == 'restart':
             self.restart(soft=True)
         elif cmd == 'stop':
             self.stop()
+        elif isinstance(cmd, tuple) and cmd[0] == 'unsubscribe':
+            self.unsubscribe(*cmd[1:])
 
-    def _check_heartbeats(self, ts, *args, **kwargs):
+    def _watch_heartbeat(self, chan_id, delay=None):
         """
-        Checks if the heartbeats are on-time. If not, the channel id is escalated
-        to self._late_heartbeats and a warning is issued; once a hb is received
-        again from this channel, it'll be removed from this dict, and an Info
-        message logged.
-        :param ts: timestamp, declares when data was received by the client
+        Schedules the check of a channel's heartbeat, by default
+        self.heartbeat_timeout seconds from now.
+        :param chan_id: int, channel id
+        :param delay: float, seconds
         :return:
         """
-        for chan_id in self._heartbeats:
-            if ts - self._heartbeats[chan_id] >= 10:
-                if chan_id not in self._late_heartbeats:
-                    try:
-                        # This is newly late; escalate
-                        log.warning("BitfinexWSS.heartbeats: Channel %s hasn't "
-                                    "sent a heartbeat in %s seconds!",
-                                    self.channel_labels[chan_id],
-                                    ts - self._heartbeats[chan_id])
-                        self._late_heartbeats[chan_id] = ts
-                    except KeyError:
-                        # This channel ID Is not known to us - log and raise
-                        log.error("BitfinexWSS.heartbeats: Channel %s is not "
-                                  "registered in the connector's registry! "
-                                  "Restarting Connection to avoid errors..",
-                                  chan_id)
-                        raise UnknownChannelError
-                else:
-                    # We know of this already
-                    continue
-            else:
-                # its not late
-                try:
-                    self._late_heartbeats.pop(chan_id)
-                except KeyError:
-                    # wasn't late before, check next channel
-                    continue
-                log.info("BitfinexWSS.heartbeats: Channel %s has sent a "
-                         "heartbeat again!", self.channel_labels[chan_id])
-            self.ping()
+        self._unwatch_heartbeat(chan_id)
+        self._heartbeat_timers[chan_id] = self.timers.schedule(
+            self.heartbeat_timeout if delay is None else delay,
+            self._heartbeat_due, chan_id)
+
+    def _unwatch_heartbeat(self, chan_id):
+        try:
+            self._heartbeat_timers.pop(chan_id).cancel()
+        except KeyError:
+            pass
 
-    def _check_ping(self):
+    def _heartbeat_due(self, chan_id):
         """
-        Checks if the ping command timed out and raises TimeoutError if so.
+        Called when a channel's heartbeat deadline expired. If the channel sent
+        data in the meantime, the check is moved to its new deadline. Otherwise
+        the channel id is escalated to self._late_heartbeats, a warning is
+        issued and the server pinged; once data is received again from this
+        channel, it'll be removed from this dict, and an Info message logged.
+        :param chan_id: int, channel id
         :return:
         """
-        if time.time() - self.ping_timer > self.timeout:
-            raise TimeoutError("Ping Command timed out!")
+        try:
+            last = self._heartbeats[chan_id]
+        except KeyError:
+            # Unsubscribed in the meantime
+            return
+        age = time.time() - last
+        if age < self.heartbeat_timeout:
+            self._watch_heartbeat(chan_id, self.heartbeat_timeout - age)
+            return
+        if chan_id not in self._late_heartbeats:
+            # This is newly late; escalate
+            log.warning("BitfinexWSS.heartbeats: Channel %s hasn't sent a "
+                        "heartbeat in %s seconds!",
+                        self.channel_labels.get(chan_id, chan_id), age)
+            self._late_heartbeats[chan_id] = last
+            if not self.ping_timer:
+                self.ping()
+        self._watch_heartbeat(chan_id)
+
+    def _heartbeat_recovered(self, chan_id):
+        self._late_heartbeats.pop(chan_id, None)
+        log.info("BitfinexWSS.heartbeats: Channel %s has sent a heartbeat "
+                 "again!", self.channel_labels.get(chan_id, chan_id))
+
+    def _ping_due(self, sent):
+        """
+        Called self.timeout seconds after a ping was sent; if it hasn't been
+        answered, the connection is closed, which makes the receiver thread
+        reconnect.
+        :param sent: float, time the ping was sent
+        :return:
+        """
+        if self.ping_timer != sent:
+            # Answered, or superseded by a newer ping
+            return
+        log.error("BitfinexWSS.ping(): TimedOut! (%ss)", sent)
+        self.ping_timer = None
+        try:
+            self.conn.close()
+        except (WebSocketConnectionClosedException, AttributeError, OSError):
+            pass
 
     def pause(self):
         """
         Pauses the client
         :return:
         """
-        self._receiver_lock.acquire()
+        self._unpaused.clear()
         log.info("BitfinexWSS.pause(): Pausing client..")
 
     def unpause(self):
         """
-        Unpauses the client
+        Unpauses the client; the receiver thread resumes immediately.
         :return:
         """
-        self._receiver_lock.release()
+        self._unpaused.set()
         log.info("BitfinexWSS.pause(): Unpausing client..")
 
     def start(self):
@@ -187,12 +331,10 @@ class BitfinexWSS(WSSAPI):
         super(BitfinexWSS, self).start()
 
         log.info("BitfinexWSS.start(): Initializing Websocket connection..")
-        while self.conn is None:
-            try:
-                self.conn = create_connection(self.addr, timeout=10)
-            except WebSocketTimeoutException:
-                self.conn = None
-                print("Couldn't create websocket connection - retrying!")
+        # Subscriptions made before a soft restart are replayed on connect
+        resubscribe = bool(self.supervisor.subscriptions)
+        if not self.supervisor.connect():
+            return
 
         log.info("BitfinexWSS.start(): Initializing receiver thread..")
         if not self.receiver_thread:
@@ -203,14 +345,18 @@ class BitfinexWSS(WSSAPI):
                      "self.receiver_thread is populated!")
 
         log.info("BitfinexWSS.start(): Initializing processing thread..")
-        if not self.processing_thread:
+        if self.inline:
+            log.info("BitfinexWSS.start(): Dispatching inline, on the "
+                     "receiver thread!")
+        elif not self.processing_thread:
             self.processing_thread = Thread(target=self.process, name='Processing Thread')
             self.processing_thread.start()
         else:
             log.info("BitfinexWSS.start(): Thread not started! "
                      "self.processing_thread is populated!")
 
-        self.setup_subscriptions()
+        if not resubscribe:
+            self.setup_subscriptions()
 
     def stop(self):
         """
@@ -259,50 +405,98 @@ class BitfinexWSS(WSSAPI):
         :return:
         """
         log.info("BitfinexWSS.restart(): Restarting client..")
-        super(BitfinexWSS, self).restart()
+        if not soft:
+            self.supervisor.subscriptions.clear()
+        self.stop()
+        # Channel ids are assigned per connection - drop the old connection's
+        # unprocessed data and clear them before the new connection's
+        # subscription responses arrive
+        self.receiver_q = queue.Queue()
+        self._reset_channels()
+        self.start()
 
-        # cache channel labels temporarily if soft == True
-        channel_labels = [self.channel_labels[k] for k in self.channel_labels] if soft else None
+    def _connect(self):
+        self.conn = create_connection(self.addr, timeout=10)
+        if self.inline:
+            # The receiver thread advances the timers between reads
+            self.conn.settimeout(1)
 
-        # clear previous channel caches
+    def _reset_channels(self):
         self.channels = {}
         self.channel_labels = {}
         self.channel_states = {}
-
-        if channel_labels:
-            # re-subscribe to channels
-            for channel_name, kwargs in channel_labels:
-                self._subscribe(channel_name, **kwargs)
+        self.channel_configs = {}
+        self._heartbeats = {}
+        self._late_heartbeats = {}
+        for timer in self._heartbeat_timers.values():
+            timer.cancel()
+        self._heartbeat_timers = {}
+        self._seq = None
+        self._auth_seq = None
+        self._resyncing = {}
+        self.account.clear()
 
     def receive(self):
         """
         Receives incoming websocket messages, and puts them on the Client queue
-        for processing.
+        for processing - or, if self.inline is set, processes them right away.
         :return:
         """
         while self.running:
-            if self._receiver_lock.acquire(blocking=False):
-                try:
-                    raw = self.conn.recv()
-                except WebSocketTimeoutException:
-                    self._receiver_lock.release()
-                    continue
-                except WebSocketConnectionClosedException:
-                    # this needs to restart the client, while keeping track
-                    # of the currently subscribed channels!
-                    self.conn = None
-                    self._controller_q.put('restart')
-                except AttributeError:
-                    # self.conn is None, idle loop until shutdown of thread
-                    self._receiver_lock.release()
-                    continue
-                msg = time.time(), json.loads(raw)
-                log.debug("receiver Thread: Data Received: %s", msg)
-                self.receiver_q.put(msg)
-                self._receiver_lock.release()
-            else:
-                # The receiver_lock was locked, idling until available
-                time.sleep(0.5)
+            if not self._unpaused.wait(timeout=0.5):
+                # Paused; wait for unpause() or shutdown
+                continue
+            if self.inline:
+                # Fires expired heartbeat and ping deadlines
+                self.timers.advance()
+            try:
+                raw = self.conn.recv()
+            except WebSocketTimeoutException:
+                continue
+            except (WebSocketConnectionClosedException, OSError):
+                self._reconnect()
+                continue
+            except AttributeError:
+                # self.conn is None, idle loop until shutdown of thread
+                time.sleep(0.1)
+                continue
+            ts = stamp()
+            self.supervisor.received()
+            try:
+                data = json.loads(raw)
+                log.debug("receiver Thread: Data Received: %s", data)
+                if self.inline:
+                    self.dispatch(ts, data)
+                else:
+                    self.receiver_q.put((ts, data))
+            except Exception:
+                # Keeps the receiver alive; the restart resyncs all channels
+                log.exception("receiver Thread: Failed to process %s, "
+                              "initiating restart", raw)
+                self._controller_q.put('restart')
+
+    def _reconnect(self):
+        """
+        Reconnects after the connection dropped, on the receiver thread.
+        The processing thread is told to clear its channel registry once it
+        has handled all data of the old connection; the supervisor then
+        replays config and subscriptions on the new one.
+        :return:
+        """
+        self.supervisor.disconnected()
+        if self.inline:
+            self._reset_channels()
+        else:
+            self.receiver_q.put((time.time(), {'event': 'reconnecting'}))
+        self._drop_connection()
+        self.supervisor.connect()
+
+    def _drop_connection(self):
+        try:
+            self.conn.close()
+        except (WebSocketConnectionClosedException, AttributeError, OSError):
+            pass
+        self.conn = None
 
     def process(self):
         """
@@ -310,58 +504,40 @@ class BitfinexWSS(WSSAPI):
         methods.
         :return:
         """
-
         while self.running:
-            if self._processor_lock.acquire(blocking=False):
-
-                if self.ping_timer:
-                    try:
-                        self._check_ping()
-                    except TimeoutError:
-                        log.exception("BitfinexWSS.ping(): TimedOut! (%ss)" %
-                                      self.ping_timer)
-                    except (WebSocketConnectionClosedException,
-                            ConnectionResetError):
-                        log.exception("BitfinexWSS.ping(): Connection Error!")
-                        self.conn = None
-                if not self.conn:
-                    # The connection was killed - initiate restart
-                    self._controller_q.put('restart')
-
-                skip_processing = False
-
-                try:
-                    ts, data = self.receiver_q.get(timeout=0.1)
-                except queue.Empty:
-                    skip_processing = True
-                    ts = time.time()
-                    data = None
-
-                if not skip_processing:
-                    log.debug("Processing Data: %s", data)
-                    if isinstance(data, list):
-                        self.handle_data(ts, data)
-                    else:  # Not a list, hence it could be a response
-                        try:
-                            self.handle_response(ts, data)
-                        except UnknownEventError:
-
-                            # We don't know what event this is- Raise an
-                            # error & log data!
-                            log.exception("main() - UnknownEventError: %s",
-                                          data)
-                            log.info("main() - Shutting Down due to "
-                                     "Unknown Error!")
-                            self._controller_q.put('stop')
-                        except ConnectionResetError:
-                            log.info("processor Thread: Connection Was reset, "
-                                     "initiating restart")
-                            self._controller_q.put('restart')
-
-                self._check_heartbeats(ts)
-                self._processor_lock.release()
-            else:
-                time.sleep(0.5)
+            # Fires expired heartbeat and ping deadlines
+            self.timers.advance()
+
+            try:
+                ts, data = self.receiver_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.dispatch(ts, data)
+
+    def dispatch(self, ts, data):
+        """
+        Passes a decoded message to handle_data() or handle_response().
+        :param ts: timestamp, declares when data was received by the client
+        :param data: list or dict of websocket data
+        :return:
+        """
+        log.debug("Processing Data: %s", data)
+        if isinstance(data, list):
+            self.handle_data(ts, data)
+        else:  # Not a list, hence it could be a response
+            try:
+                self.handle_response(ts, data)
+            except UnknownEventError:
+
+                # We don't know what event this is- Raise an
+                # error & log data!
+                log.exception("main() - UnknownEventError: %s", data)
+                log.info("main() - Shutting Down due to Unknown Error!")
+                self._controller_q.put('stop')
+            except ConnectionResetError:
+                log.info("processor Thread: Connection Was reset, "
+                         "initiating restart")
+                self._controller_q.put('restart')
 
     ##
     # Response Message Handlers
@@ -412,6 +588,7 @@ class BitfinexWSS(WSSAPI):
             raise AlreadyRegisteredError()
 
         self._heartbeats[chanId] = time.time()
+        self._watch_heartbeat(chanId)
 
         try:
             channel_key = ('raw_'+channel
@@ -425,6 +602,12 @@ class BitfinexWSS(WSSAPI):
         except KeyError:
             raise UnknownChannelError()
 
+        # Payload to resubscribe with, should the channel need a resync
+        config = {'event': 'subscribe', 'channel': channel}
+        config.update((k, v) for k, v in kwargs.items()
+                      if k in ('symbol', 'key', 'prec', 'freq', 'len'))
+        self.channel_configs[chanId] = config
+
         # prep kwargs to be used as secondary value in dict key
         try:
             kwargs.pop('event')
@@ -441,6 +624,12 @@ class BitfinexWSS(WSSAPI):
         except KeyError:
             pass
 
+        if channel == 'candles':
+            # Parse the key once, instead of on every message
+            _, timeframe, symbol = kwargs['key'].split(':')
+            kwargs['pair'] = symbol[1:]
+            kwargs['timeframe'] = timeframe
+
         self.channel_labels[chanId] = (channel_key, kwargs)
 
     def _handle_unsubscribed(self, *args, chanId=None, **kwargs):
@@ -455,6 +644,14 @@ class BitfinexWSS(WSSAPI):
         except KeyError:
             raise NotRegisteredError()
 
+        channel, label = self.channel_labels.get(chanId, (None, {}))
+        if channel == 'book':
+            self.books.pop(label.get('pair'), None)
+            self._raw_levels.pop(label.get('pair'), None)
+        elif channel == 'raw_book':
+            self.raw_books.pop(label.get('pair'), None)
+            self._raw_orders.pop(label.get('pair'), None)
+
         try:
             self._heartbeats.pop(chanId)
         except KeyError:
@@ -464,6 +661,12 @@ class BitfinexWSS(WSSAPI):
             self._late_heartbeats.pop(chanId)
         except KeyError:
             pass
+        self._unwatch_heartbeat(chanId)
+
+        payload = self._resyncing.pop(chanId, None)
+        if payload is not None:
+            log.info("_handle_unsubscribed: Resubscribing %s", payload)
+            self.send(payload)
 
     def _raise_error(self, *args, **kwargs):
         """
@@ -517,8 +720,32 @@ class BitfinexWSS(WSSAPI):
                  ts - self.ping_timer)
         self.ping_timer = None
 
-    def _handle_conf(self, ts, *args, **kwargs):
-        pass
+    def _handle_conf(self, ts, *args, status=None, flags=0, **kwargs):
+        """
+        Handles responses to config() commands; once the server acknowledged
+        them, messages carry sequence numbers and checksums as configured.
+        :param ts: timestamp, declares when data was received by the client
+        :param status: str, 'OK' if the config was applied
+        :param flags: int, flags as applied
+        :return:
+        """
+        if status != 'OK':
+            log.error("_handle_conf: Config not applied! %s - %s", status,
+                      kwargs)
+            return
+        self.wss_config['flags'] = flags
+        self.sequencing = bool(flags & 65536)
+        self.checksums = bool(flags & 131072)
+
+    def _handle_reconnecting(self, ts, *args, **kwargs):
+        """
+        Handles the marker put on the receiver_q before reconnecting; all data
+        of the old connection has been processed, so its channel ids are
+        cleared.
+        :param ts: timestamp, declares when data was received by the client
+        :return:
+        """
+        self._reset_channels()
 
     ##
     # Data Message Handlers
@@ -537,16 +764,146 @@ class BitfinexWSS(WSSAPI):
         except ValueError as e:
             # Too many or too few values
             raise FaultyPayloadError("handle_data(): %s - %s" % (msg, e))
+        if self.sequencing:
+            self._check_sequence(chan_id, data)
         self._heartbeats[chan_id] = ts
+        if chan_id in self._late_heartbeats:
+            self._heartbeat_recovered(chan_id)
+        if chan_id in self._resyncing:
+            # Data of the corrupted book; it's rebuilt from a new snapshot
+            return
         if data[0] == 'hb':
             self._handle_hearbeat(ts, chan_id)
             return
+        if data[0] == 'cs':
+            self._verify_checksum(chan_id, data[1])
+            return
         try:
             self.channels[chan_id](ts, chan_id, data)
         except KeyError:
             raise NotRegisteredError("handle_data: %s not registered - "
                                      "Payload: %s" % (chan_id, msg))
 
+    def _check_sequence(self, chan_id, data):
+        """
+        Removes the sequence numbers appended to data, and checks them for
+        gaps. Sequence numbers count all public messages of a connection,
+        so a gap doesn't tell which channel lost a message - all book
+        channels are resynced, as their state would be corrupted; stateless
+        channels recover with their next message.
+        :param chan_id: int, channel id
+        :param data: list of data received via wss
+        :return:
+        """
+        if chan_id == 0:
+            # Account messages carry the public sequence number, followed by
+            # their own; notifications of requests ('on-req', ..) carry none
+            cut = 1 if data[0] == 'hb' else 2
+            seqs = data[cut:]
+            del data[cut:]
+            if (data[0] == 'n' and isinstance(data[1], list) and
+                    str(data[1][1]).endswith('-req')):
+                return
+            if len(seqs) > 1:
+                auth_seq = seqs[1]
+                if (self._auth_seq is not None and
+                        auth_seq != self._auth_seq + 1):
+                    self.integrity['sequence_gaps'] += 1
+                    log.warning("BitfinexWSS: Gap in account sequence "
+                                "numbers (%s -> %s)!", self._auth_seq,
+                                auth_seq)
+                self._auth_seq = auth_seq
+            if seqs:
+                self._advance_sequence(seqs[0])
+            return
+
+        self._advance_sequence(data.pop())
+
+    def _advance_sequence(self, seq):
+        """
+        Advances the public sequence number of the connection to seq, and
+        resyncs all book channels if messages were skipped.
+        :param seq: int
+        :return:
+        """
+        last, self._seq = self._seq, seq
+        if last is None or seq == last + 1:
+            return
+        self.integrity['sequence_gaps'] += 1
+        log.warning("BitfinexWSS: Gap in sequence numbers (%s -> %s)! "
+                    "Resyncing books..", last, seq)
+        for book_id, (channel, _) in list(self.channel_labels.items()):
+            if channel in ('book', 'raw_book') and book_id in self.channels:
+                self.resync(book_id)
+
+    def _verify_checksum(self, chan_id, checksum):
+        """
+        Compares the checksum sent for a book channel with the checksum of
+        the local book, and resyncs the channel if they differ.
+        :param chan_id: int, channel id
+        :param checksum: int, CRC32 as signed integer
+        :return:
+        """
+        channel, label = self.channel_labels[chan_id]
+        pair = label.get('pair')
+        if channel == 'book':
+            local = self._book_checksum(pair)
+        elif channel == 'raw_book':
+            local = self._raw_book_checksum(pair)
+        else:
+            return
+        if local is None or local == checksum:
+            return
+        self.integrity['checksum_errors'] += 1
+        log.warning("BitfinexWSS: Checksum mismatch on %s %s (%s != %s)! "
+                    "Resyncing..", channel, pair, local, checksum)
+        self.resync(chan_id)
+
+    def _book_checksum(self, pair):
+        try:
+            book, raw = self.books[pair], self._raw_levels[pair]
+        except KeyError:
+            return None
+        with book.lock:
+            bids = [raw['bids', price] for price, _ in book.bids.top(25)]
+            asks = [raw['asks', price] for price, _ in book.asks.top(25)]
+        return book_checksum(bids, asks)
+
+    def _raw_book_checksum(self, pair):
+        try:
+            book, raw = self.raw_books[pair], self._raw_orders[pair]
+        except KeyError:
+            return None
+        sides = []
+        with book.lock:
+            for ladder in (book.levels.bids, book.levels.asks):
+                orders = []
+                for price in ladder.prices():
+                    orders += [(order_id, raw[order_id]) for order_id, _
+                               in sorted(book.queue(ladder.side, price))]
+                    if len(orders) >= 25:
+                        break
+                sides.append(orders[:25])
+        return book_checksum(*sides)
+
+    def resync(self, chan_id):
+        """
+        Rebuilds a single channel's data by unsubscribing and subscribing to
+        it again; its data is dropped until then, and its local book cleared.
+        :param chan_id: int, channel id
+        :return:
+        """
+        if chan_id in self._resyncing or chan_id not in self.channel_configs:
+            return
+        self.integrity['resyncs'] += 1
+        self._resyncing[chan_id] = self.channel_configs[chan_id]
+        channel, label = self.channel_labels[chan_id]
+        book = (self.books if channel == 'book'
+                else self.raw_books).get(label.get('pair'))
+        if book is not None:
+            book.clear()
+        self.send({'event': 'unsubscribe', 'chanId': chan_id})
+
     @staticmethod
     def _handle_hearbeat(*args, **kwargs):
         """
@@ -568,7 +925,7 @@ class BitfinexWSS(WSSAPI):
         """
         pair = self.channel_labels[chan_id][1]['pair']
         entry = (*data, ts)
-        self.data_q.put(('ticker', pair, entry))
+        self.publish(('ticker', pair, entry), ts)
 
     def _handle_book(self, ts, chan_id, data):
         """
@@ -579,8 +936,57 @@ class BitfinexWSS(WSSAPI):
         :return:
         """
         pair = self.channel_labels[chan_id][1]['pair']
+        self._update_book(pair, data[0], ts)
         entry = data, ts
-        self.data_q.put(('order_book', pair, entry))
+        self.publish(('order_book', pair, entry), ts)
+
+    def _update_book(self, pair, levels, ts):
+        """
+        Applies a snapshot or level update to the pair's local order book.
+        Levels are [PRICE, COUNT, AMOUNT]; positive amounts are bids,
+        negative ones asks, and a count of 0 removes the level.
+        :param pair: str
+        :param levels: list of levels (snapshot) or a single level
+        :param ts: timestamp, declares when data was received by the client
+        :return:
+        """
+        try:
+            book = self.books[pair]
+        except KeyError:
+            book = self.books[pair] = OrderBook()
+
+        if not levels or isinstance(levels[0], list):
+            bids, asks = [], []
+            raw = {}
+            for price, count, amount in levels:
+                size = float(amount)
+                side, ladder = (('bids', bids) if size > 0 else
+                                ('asks', asks))
+                ladder.append((float(price), abs(size), count))
+                raw[side, float(price)] = price, amount
+            book.replace(bids, asks, ts)
+            if self.checksums:
+                self._raw_levels[pair] = raw
+        else:
+            price, count, amount = levels
+            size = float(amount)
+            side = 'bids' if size > 0 else 'asks'
+            book.update(side, float(price), abs(size) if count else 0,
+                        count, ts)
+            if self.checksums and pair in self._raw_levels:
+                if count:
+                    self._raw_levels[pair][side, float(price)] = price, amount
+                else:
+                    self._raw_levels[pair].pop((side, float(price)), None)
+
+    def get_book(self, pair):
+        """
+        Returns the local order book of pair, maintained from its 'book'
+        channel; use its views (top(), depth(), mid(), ..) to read it.
+        :param pair: str, i.e. 'BTCUSD'
+        :return: OrderBook obj, or None if not subscribed
+        """
+        return self.books.get(pair)
 
     def _handle_raw_book(self, ts, chan_id, data):
         """
@@ -591,8 +997,55 @@ class BitfinexWSS(WSSAPI):
         :return:
         """
         pair = self.channel_labels[chan_id][1]['pair']
+        self._update_raw_book(pair, data[0], ts)
         entry = data, ts
-        self.data_q.put(('raw_order_book', pair, entry))
+        self.publish(('raw_order_book', pair, entry), ts)
+
+    def _update_raw_book(self, pair, orders, ts):
+        """
+        Applies a snapshot or order update to the pair's local raw order
+        book. Orders are [ORDER_ID, PRICE, AMOUNT]; positive amounts are
+        bids, negative ones asks, and a price of 0 removes the order.
+        :param pair: str
+        :param orders: list of orders (snapshot) or a single order
+        :param ts: timestamp, declares when data was received by the client
+        :return:
+        """
+        try:
+            book = self.raw_books[pair]
+        except KeyError:
+            book = self.raw_books[pair] = RawOrderBook()
+
+        if not orders or isinstance(orders[0], list):
+            book.replace(((order_id, 'bids' if float(amount) > 0 else 'asks',
+                           float(price), abs(float(amount)))
+                          for order_id, price, amount in orders), ts)
+            if self.checksums:
+                self._raw_orders[pair] = {order_id: amount
+                                          for order_id, _, amount in orders}
+        else:
+            order_id, price, amount = orders
+            raw = self._raw_orders.get(pair) if self.checksums else None
+            if float(price):
+                size = float(amount)
+                book.update(order_id, 'bids' if size > 0 else 'asks',
+                            float(price), abs(size), ts)
+                if raw is not None:
+                    raw[order_id] = amount
+            else:
+                book.cancel(order_id, ts)
+                if raw is not None:
+                    raw.pop(order_id, None)
+
+    def get_raw_book(self, pair):
+        """
+        Returns the local order-level book of pair, maintained from its
+        'raw_book' channel; its aggregated levels are available as
+        get_raw_book(pair).levels.
+        :param pair: str, i.e. 'BTCUSD'
+        :return: RawOrderBook obj, or None if not subscribed
+        """
+        return self.raw_books.get(pair)
 
     def _handle_trades(self, ts, chan_id, data):
         """
@@ -603,22 +1056,72 @@ class BitfinexWSS(WSSAPI):
         :return:
         """
         pair = self.channel_labels[chan_id][1]['pair']
+        if data[0] in ('te', 'tu'):
+            # Trade updates carry their execution time, in milliseconds
+            ts.exchange_ts = data[1][1] / 1000
         entry = data, ts
-        self.data_q.put(('trades', pair, entry))
+        self.publish(('trades', pair, entry), ts)
 
     def _handle_candles(self, ts, chan_id, data):
         """
-        Stores OHLC data received via wss in self.candles[chan_id]
+        Merges OHLC data into self.candles, if enabled, and publishes it.
         :param ts: timestamp, declares when data was received by the client
         :param chan_id: int, channel id
         :param data: list of data received via wss
         :return:
         """
-        pair = self.channel_labels[chan_id][1]['key'].split(':')[-1][1:]
+        label = self.channel_labels[chan_id][1]
+        pair = label['pair']
+        if self.candles is not None:
+            self._update_candles(pair, label['timeframe'], data[0], ts)
         entry = data, ts
-        self.data_q.put(('ohlc', pair, entry))
+        self.publish(('ohlc', pair, entry), ts)
+
+    def _update_candles(self, pair, timeframe, candles, ts):
+        """
+        Merges a snapshot or candle update into the pair's candle buffer.
+        Candles are [MTS, OPEN, CLOSE, HIGH, LOW, VOLUME], and stored as
+        (start in seconds, open, high, low, close, volume).
+        :param pair: str
+        :param timeframe: str, i.e. '1m'
+        :param candles: list of candles (snapshot) or a single candle
+        :param ts: timestamp, declares when data was received by the client
+        :return:
+        """
+        if not candles or isinstance(candles[0], list):
+            self.candles.replace(pair, timeframe,
+                                 [(mts / 1000, float(o), float(h), float(l),
+                                   float(c), float(v))
+                                  for mts, o, c, h, l, v in candles], ts)
+        else:
+            mts, o, c, h, l, v = candles
+            self.candles.update(pair, timeframe,
+                                (mts / 1000, float(o), float(h), float(l),
+                                 float(c), float(v)), ts)
+
+    def get_candles(self, pair, timeframe='1m', n=None):
+        """
+        Returns the last n bars of pair and timeframe, oldest first, as
+        columns start, open, high, low, close and volume.
+        :param pair: str, i.e. 'BTCUSD'
+        :param timeframe: str, i.e. '1m'
+        :param n: int, number of bars; all stored bars if None
+        :return: read-only np.ndarray view (see CandleBuffer.last())
+        """
+        if self.candles is None:
+            raise ValueError("Candle store not enabled - pass candles= to "
+                             "BitfinexWSS!")
+        return self.candles.last(pair, timeframe, n)
 
     def _handle_auth(self, ts, chan_id, data):
+        """
+        Applies account data to self.account and passes it on to the
+        handler of its event.
+        :param ts: timestamp, declares when data was received by the client
+        :param chan_id: int, channel id
+        :param data: list of data received via wss
+        :return:
+        """
         keys = {'hts': self._handle_auth_trades,
                 'te': self._handle_auth_trades, 'tu': self._handle_auth_trades,
                 'ps': self._handle_auth_positions,
@@ -647,70 +1150,93 @@ class BitfinexWSS(WSSAPI):
                 'hfls': self._handle_auth_loans,
                 'hfts': self._handle_auth_funding_trades,
                 'fte': self._handle_auth_funding_trades,
-                'ftu': self._handle_auth_funding_trades}
+                'ftu': self._handle_auth_funding_trades,
+                'n': self._handle_auth_notifications}
 
         event, *_ = data
 
         try:
-            keys[event](ts, data)
+            handler = keys[event]
         except KeyError:
             log.exception('%s; %s', chan_id, data)
             raise UnknownEventError('The Passed event in data[0] is not '
                                     'associated with any data handler!')
+
+        if len(data) > 1:
+            try:
+                self.account.apply(event, data[1], ts)
+            except Exception:
+                # The account's state is off until its next snapshot, but
+                # the client carries on
+                log.exception("_handle_auth: Failed to apply %s to account "
+                              "- %s", event, data)
+                self.account.invalidate(event)
+
+        try:
+            handler(ts, data)
         except Exception:
             log.exception("_handle_auth: %s - %s, %s", chan_id, event, data)
             raise
 
     def _handle_auth_trades(self, ts, data):
         entry = data, ts
-        self.data_q.put(('account_trades', 'NA', entry))
+        self.publish(('account_trades', 'NA', entry), ts)
 
     def _handle_auth_positions(self, ts, data):
         entry = data, ts
-        self.data_q.put(('account_positions', 'NA', entry))
+        self.publish(('account_positions', 'NA', entry), ts)
 
     def _handle_auth_orders(self, ts, data):
         entry = data, ts
-        self.data_q.put(('account_orders', 'NA', entry))
+        self.publish(('account_orders', 'NA', entry), ts)
 
     def _handle_auth_wallet(self, ts, data):
         entry = data, ts
-        self.data_q.put(('account_wallet', 'NA', entry))
+        self.publish(('account_wallet', 'NA', entry), ts)
 
     def _handle_auth_balance(self, ts, data):
         entry = data, ts
-        self.data_q.put(('account_balance', 'NA', entry))
+        self.publish(('account_balance', 'NA', entry), ts)
 
     def _handle_auth_margin_info(self, ts, data):
         entry = data, ts
-        self.data_q.put(('account_margin_info', 'NA', entry))
+        self.publish(('account_margin_info', 'NA', entry), ts)
 
     def _handle_auth_funding_info(self, ts, data):
         entry = data, ts
-        self.data_q.put(('account_funding_info', 'NA', entry))
+        self.publish(('account_funding_info', 'NA', entry), ts)
 
     def _handle_auth_offers(self, ts, data):
         entry = data, ts
-        self.data_q.put(('account_offers', 'NA', entry))
+        self.publish(('account_offers', 'NA', entry), ts)
 
     def _handle_auth_credits(self, ts, data):
         entry = data, ts
-        self.data_q.put(('account_credits', 'NA', entry))
+        self.publish(('account_credits', 'NA', entry), ts)
 
-    def _handle_auth_loans(self, event, data):
-        entry = data, time.time()
-        self.data_q.put(('account_loans', 'NA', entry))
+    def _handle_auth_loans(self, ts, data):
+        entry = data, ts
+        self.publish(('account_loans', 'NA', entry), ts)
 
-    def _handle_auth_funding_trades(self, event, data):
-        entry = data, time.time()
-        self.data_q.put(('account_funding_trades', 'NA', entry))
+    def _handle_auth_funding_trades(self, ts, data):
+        entry = data, ts
+        self.publish(('account_funding_trades', 'NA', entry), ts)
+
+    def _handle_auth_notifications(self, ts, data):
+        entry = data, ts
+        self.publish(('account_notifications', 'NA', entry), ts)
 
     ##
     # Commands
     ##
 
     def send(self, payload):
-        self.conn.send(json.dumps(payload))
+        try:
+            self.conn.send(json.dumps(payload))
+        except AttributeError:
+            # self.conn is None; the supervisor replays subscriptions once
+            # the connection is back
+            log.error("BitfinexWSS.send(): Not connected! %s", payload)
 
     def ping(self):
         """
@@ -720,9 +1246,16 @@ class BitfinexWSS(WSSAPI):
         """
         self.ping_timer = time.time()
         self.send({'event': 'ping'})
+        self.timers.schedule(self.timeout, self._ping_due, self.ping_timer)
 
     def setup_subscriptions(self):
-        self.config(decimals_as_strings=True)
+        self.config(decimals_as_strings=True,
+                    sequencing=self.integrity_checks,
+                    checksum=self.integrity_checks)
+        if self.subscriptions is not None:
+            for kind, pair in self.subscriptions:
+                self.subscribe(kind, pair)
+            return
         for pair in self.pairs:
             self.ticker(pair)
             self.ohlc(pair)
@@ -730,13 +1263,45 @@ class BitfinexWSS(WSSAPI):
             self.raw_order_book(pair)
             self.trades(pair)
 
+    def subscribe(self, kind, pair, **kwargs):
+        """
+        Subscribes to a channel by kind, i.e. subscribe('ohlc', 'BTCUSD').
+        :param kind: str, any of KINDS
+        :param pair: str, Pair to request data for.
+        :param kwargs: passed on to the kind's subscription method
+        :return:
+        """
+        if kind not in KINDS:
+            raise ValueError("kind must be any of %s" % (KINDS,))
+        getattr(self, kind)(pair, **kwargs)
+
+    def unsubscribe(self, kind, pair):
+        """
+        Unsubscribes from a channel subscribed to via subscribe(kind, pair)
+        or the corresponding subscription method; it's no longer replayed
+        after reconnects either.
+        :param kind: str, any of KINDS
+        :param pair: str
+        :return:
+        """
+        for key, payload in list(self.supervisor.subscriptions.items()):
+            if (key != 'conf' and
+                    _topic(payload['channel'], payload) == (kind, pair)):
+                self.supervisor.unregister(key)
+        for chan_id, (channel, label) in list(self.channel_labels.items()):
+            if (chan_id in self.channels and
+                    _topic(channel, label) == (kind, pair)):
+                self.send({'event': 'unsubscribe', 'chanId': chan_id})
+
     def config(self, decimals_as_strings=True, ts_as_dates=False,
-               sequencing=False, **kwargs):
+               sequencing=False, checksum=False, **kwargs):
         """
         Send configuration to websocket server
         :param decimals_as_strings: bool, turn on/off decimals as strings
         :param ts_as_dates: bool, decide to request timestamps as dates instead
-        :param sequencing: bool, turn on sequencing
+        :param sequencing: bool, turn on sequencing; gaps resync all books
+        :param checksum: bool, turn on book checksums; books whose checksum
+                         doesn't match are resynced
         :param kwargs:
         :return:
         """
@@ -747,8 +1312,11 @@ class BitfinexWSS(WSSAPI):
             flags += 32
         if sequencing:
             flags += 65536
+        if checksum:
+            flags += 131072
         payload = {'event': 'conf', 'flags': flags}
         payload.update(kwargs)
+        self.supervisor.register('conf', payload)
         self.send(payload)
 
     def _subscribe(self, channel_name, **kwargs):
@@ -759,6 +1327,7 @@ class BitfinexWSS(WSSAPI):
         payload = {'event': 'subscribe', 'channel': channel_name}
         payload.update(**kwargs)
         log.debug("_subscribe: %s", payload)
+        self.supervisor.register(json.dumps(payload, sort_keys=True), payload)
         self.send(payload)
 
     def ticker(self, pair, **kwargs):
@@ -817,3 +1386,302 @@ class BitfinexWSS(WSSAPI):
         pair = 't' + pair if not pair.startswith('t') else pair
         key = 'trade:' + timeframe + ':' + pair
         self._subscribe('candles', key=key, **kwargs)
+
+
+class ShardedBitfinexWSS(WSSAPI):
+    """
+    Spreads the channels of pairs across several BitfinexWSS connections
+    (shards), and merges their data into this client's data_q and listeners.
+    Each shard holds at most max_channels channels, and channels are
+    balanced by weight: initially by their expected message rate, after
+    calling rebalance() by their measured one.
+
+    Each shard reconnects, resyncs and pings on its own, so a busy or broken
+    connection doesn't delay the others; see stats() for per-shard health.
+
+    Each channel's data is published from a single shard only. While a
+    channel is moved, its old shard's data is published until the new one
+    sends its first message, the channel's snapshot; a marker item
+    ('resync', pair, (kind, ts)) is published right before it, and the old
+    shard is unsubscribed.
+    """
+    # Expected relative message rates, used until rates were measured
+    WEIGHTS = {'raw_order_book': 8, 'order_book': 4, 'trades': 2,
+               'ticker': 1, 'ohlc': 1}
+
+    def __init__(self, pairs=None, shards=None, max_channels=25, maxsize=0,
+                 overflow='block', conflate=None, inline=False,
+                 rebalance_interval=None, integrity_checks=False):
+        """
+        Initializes ShardedBitfinexWSS Instance.
+        :param pairs: list of pairs to subscribe all channels of
+        :param shards: int, number of connections; by default, as few as
+                       max_channels allows
+        :param max_channels: int, maximum number of channels per connection
+        :param maxsize: int, maximum number of items on the data_q
+        :param overflow: str, data_q overflow policy (see WSSAPI)
+        :param conflate: list of channel names to conflate (see WSSAPI)
+        :param inline: bool, dispatch inline on the shards' receiver threads
+        :param rebalance_interval: float, seconds between automatic calls of
+                                   rebalance(); never if None
+        :param integrity_checks: bool, enable sequence numbers and book
+                                 checksums on all shards (see BitfinexWSS)
+        """
+        super(ShardedBitfinexWSS, self).__init__('wss://api.bitfinex.com/ws/2',
+                                                 'Bitfinex', maxsize, overflow,
+                                                 conflate)
+        self.pairs = pairs if pairs else list(BitfinexWSS.PAIRS)
+        self.topics = [(kind, pair) for pair in self.pairs for kind in KINDS]
+        self.max_channels = max_channels
+        needed = math.ceil(len(self.topics) / max_channels)
+        if shards is not None and shards < needed:
+            log.warning("ShardedBitfinexWSS: %s channels need at least %s "
+                        "shards of %s channels!", len(self.topics), needed,
+                        max_channels)
+        n = max(shards or 0, needed, 1)
+
+        self.shards = []
+        for i in range(n):
+            shard = BitfinexWSS(pairs=self.pairs, inline=inline,
+                                subscriptions=[],
+                                integrity_checks=integrity_checks)
+            shard.name = 'Bitfinex Shard %s' % i
+            shard.supervisor.name = shard.name
+            shard.add_listener(callback=functools.partial(self._merge, i))
+            self.shards.append(shard)
+
+        # Messages received per topic, and when counting started
+        self.counts = {topic: 0 for topic in self.topics}
+        self._counted_since = time.monotonic()
+        self.rebalance_interval = rebalance_interval
+        self._rebalance_thread = None
+        self.moves = 0
+
+        self.assignment = {}
+        self._assign({topic: self.WEIGHTS[topic[0]] for topic in self.topics})
+
+        # Shard whose data of a topic is published; differs from the
+        # assignment while the topic is moved, until its new shard confirms
+        self._sources = dict(self.assignment)
+        self._sources_lock = threading.Lock()
+
+    def _assign(self, weights):
+        """
+        Assigns all topics to shards, heaviest first, each to the least
+        loaded shard which has room left.
+        :param weights: dict of topic: weight
+        :return:
+        """
+        loads = [0] * len(self.shards)
+        channels = [0] * len(self.shards)
+        for topic in sorted(self.topics, key=lambda t: -weights[t]):
+            i = min((i for i in range(len(self.shards))
+                     if channels[i] < self.max_channels),
+                    key=lambda i: loads[i])
+            loads[i] += weights[topic]
+            channels[i] += 1
+            self.assignment[topic] = i
+        for i, shard in enumerate(self.shards):
+            shard.subscriptions = [topic for topic in self.topics
+                                   if self.assignment[topic] == i]
+
+    def _merge(self, i, item):
+        """
+        Publishes an item received by shard i, unless another shard's data
+        of its topic is published.
+        :param i: int, index of the shard
+        :param item: data_q item
+        :return:
+        """
+        topic = item[0], item[1]
+        switched = None
+        with self._sources_lock:
+            source = self._sources.get(topic, i)
+            if source != i:
+                if self.assignment.get(topic) != i:
+                    # Data of a channel which was moved away from shard i
+                    return
+                # First message of the channel's new shard
+                self._sources[topic] = switched = i
+        if switched is not None:
+            old = self.shards[source]
+            if old.running:
+                # Sent by the old shard's controller, not on shard i's thread
+                old._controller_q.put(('unsubscribe',) + topic)
+            ts = stamp()
+            self.publish(('resync', topic[1], (topic[0], ts)))
+
+        try:
+            self.counts[topic] += 1
+        except KeyError:
+            pass
+        entry = item[2]
+        self.publish(item, entry[-1] if isinstance(entry, tuple) else None)
+
+    def start(self):
+        super(ShardedBitfinexWSS, self).start()
+        for shard in self.shards:
+            shard.start()
+        if self.rebalance_interval and (self._rebalance_thread is None or
+                                        not self._rebalance_thread.is_alive()):
+            self._rebalance_thread = Thread(target=self._rebalancer,
+                                            daemon=True,
+                                            name='Rebalance Thread')
+            self._rebalance_thread.start()
+
+    def stop(self):
+        super(ShardedBitfinexWSS, self).stop()
+        for shard in self.shards:
+            shard.stop()
+
+    def restart(self, soft=True):
+        """
+        Restarts all shards; see BitfinexWSS.restart().
+        :return:
+        """
+        for shard in self.shards:
+            shard.restart(soft=soft)
+
+    def _rebalancer(self):
+        while self.running:
+            deadline = time.monotonic() + self.rebalance_interval
+            while self.running and time.monotonic() < deadline:
+                time.sleep(min(0.5, max(0, deadline - time.monotonic())))
+            if self.running:
+                self.rebalance()
+
+    def rates(self):
+        """
+        Returns the message rate of each topic since counting (re)started.
+        :return: dict of topic: messages per second
+        """
+        elapsed = max(time.monotonic() - self._counted_since, 1e-9)
+        return {topic: n / elapsed for topic, n in self.counts.items()}
+
+    def rebalance(self, max_moves=None, tolerance=0.1):
+        """
+        Moves channels from the busiest shard to the least busy one, by
+        measured message rate - or swaps them with less busy channels, if
+        it is full - until their difference can't be reduced any further or
+        is within tolerance of the busiest shard's load. Moved channels are
+        subscribed on their new shard before they are unsubscribed on their
+        old one, once the new shard sent their snapshot (see class
+        docstring), so no data is missed; a swap thus briefly holds one
+        channel more than max_channels, which should be kept below the
+        exchange's limit. Counting restarts afterwards.
+        :param max_moves: int, maximum number of channels to move
+        :param tolerance: float, fraction of the busiest shard's load
+        :return: list of (topic, from shard, to shard) tuples
+        """
+        rates = self.rates()
+        moves = []
+        while max_moves is None or len(moves) < max_moves:
+            loads = [0.0] * len(self.shards)
+            topics = [[] for _ in self.shards]
+            for topic, i in self.assignment.items():
+                loads[i] += rates[topic]
+                topics[i].append(topic)
+            busiest = max(range(len(loads)), key=lambda i: loads[i])
+            calmest = min(range(len(loads)), key=lambda i: loads[i])
+            gap = loads[busiest] - loads[calmest]
+            if gap <= tolerance * loads[busiest]:
+                break
+
+            # The move or swap which evens out the two shards best
+            options = []
+            for topic in topics[busiest]:
+                if len(topics[calmest]) < self.max_channels:
+                    options.append((rates[topic], topic, None))
+                for other in topics[calmest]:
+                    options.append((rates[topic] - rates[other], topic,
+                                    other))
+            options = [option for option in options if 0 < option[0] < gap]
+            if not options:
+                break
+            _, topic, other = min(options, key=lambda o: abs(gap - 2 * o[0]))
+            self._move(topic, calmest)
+            moves.append((topic, busiest, calmest))
+            if other is not None:
+                self._move(other, busiest)
+                moves.append((other, calmest, busiest))
+
+        self.counts = {topic: 0 for topic in self.topics}
+        self._counted_since = time.monotonic()
+        return moves
+
+    def _move(self, topic, target):
+        """
+        Subscribes topic on shard target; its current shard is unsubscribed
+        by _merge(), once the target sent its first message.
+        :param topic: tuple of (kind, pair)
+        :param target: int, index of the shard
+        :return:
+        """
+        previous = self.assignment[topic]
+        source = self.shards[previous]
+        shard = self.shards[target]
+        log.info("ShardedBitfinexWSS: Moving %s from %s to %s", topic,
+                 source.name, shard.name)
+        with self._sources_lock:
+            self.assignment[topic] = target
+            publishing = self._sources[topic]
+            if publishing == target or not shard.running:
+                # Nothing to wait for
+                self._sources[topic] = target
+        source.subscriptions.remove(topic)
+        shard.subscriptions.append(topic)
+        if shard.running and publishing != target:
+            shard.subscribe(*topic)
+        # Shards which neither publish nor receive the topic any longer
+        for i in {previous, publishing} - {self._sources[topic], target}:
+            if self.shards[i].running:
+                self.shards[i].unsubscribe(*topic)
+        self.moves += 1
+
+    def shard(self, kind, pair):
+        """
+        Returns the shard a channel is assigned to.
+        :param kind: str, any of KINDS
+        :param pair: str
+        :return: BitfinexWSS obj
+        """
+        return self.shards[self.assignment[kind, pair]]
+
+    def get_book(self, pair):
+        """
+        Returns the local order book of pair, kept by the shard whose data
+        of its 'book' channel is published.
+        :param pair: str, i.e. 'BTCUSD'
+        :return: OrderBook obj, or None if not subscribed
+        """
+        i = self._sources.get(('order_book', pair))
+        return None if i is None else self.shards[i].get_book(pair)
+
+    def get_raw_book(self, pair):
+        """
+        Returns the local order-level book of pair, kept by the shard whose
+        data of its 'raw_book' channel is published.
+        :param pair: str, i.e. 'BTCUSD'
+        :return: RawOrderBook obj, or None if not subscribed
+        """
+        i = self._sources.get(('raw_order_book', pair))
+        return None if i is None else self.shards[i].get_raw_book(pair)
+
+    def stats(self):
+        """
+        Returns the health of each connection: its channels and their message
+        rate, connection metrics (see Supervisor.stats()), sequence and
+        checksum errors, late heartbeats and dispatch latencies.
+        :return: list of dicts, one per shard
+        """
+        rates = self.rates()
+        stats = []
+        for i, shard in enumerate(self.shards):
+            topics = [topic for topic, j in self.assignment.items() if j == i]
+            stats.append({'name': shard.name, 'channels': len(topics),
+                          'rate': sum(rates[topic] for topic in topics),
+                          'connection': shard.supervisor.stats(),
+                          'integrity': dict(shard.integrity),
+                          'late_heartbeats': len(shard._late_heartbeats),
+                          'latency': shard.latency.stats()})
+        return stats
@@ -1,11 +1,17 @@
 # Import Built-Ins
 import logging
+import json
+import threading
+import time
 
 # Import Third-Party
 import pusherclient
 
 # Import Homebrew
 from bitex.api.WSS.base import WSSAPI
+from bitex.api.REST.bitstamp import BitstampREST
+from bitex.api.book import OrderBook
+from bitex.api.WSS.latency import stamp
 
 # Init Logging Facilities
 log = logging.getLogger(__name__)
@@ -19,25 +25,57 @@ class BitstampWSS(WSSAPI):
     By Default, data is printed to stdout. If you'd like to customize this
     behaviour, subclass this class, and overwrite the *_callback() methods.
 
+    Like all other clients, it publishes items of (channel, pair, data, ts);
+    data is passed on as received, and ts carries the exchange's
+    microtimestamp as exchange_ts.
+
     If you need to have per-channel customization, you will have to overwrite
     the _register_*_channel() methods accordingly.
     """
-    def __init__(self, key=None, exclude=None, include_only=None, **kwargs):
+    MAX_SNAPSHOT_RETRY = 60
+
+    def __init__(self, key=None, exclude=None, include_only=None, maxsize=0,
+                 overflow='block', conflate=None, books=False, rest=None,
+                 snapshot_retry=1.0, **kwargs):
         """
         Initializes Instance.
 
         Pusher Class Attributes:
         :param key: Pusher key, str; stored in self.addr
+        :param maxsize: int, maximum number of items on the data_q
+        :param overflow: str, data_q overflow policy (see WSSAPI)
+        :param conflate: list of channel names to conflate (see WSSAPI)
+        :param books: bool, maintain local order books of pairs from their
+                      diff_order_book channels, synchronized with snapshots
+                      of the REST API (see get_book())
+        :param rest: BitstampREST obj to fetch snapshots with
+        :param snapshot_retry: float, seconds to wait before fetching a
+                               snapshot again after a failed fetch; doubled
+                               with every further failure, up to
+                               MAX_SNAPSHOT_RETRY
         :param kwargs: Keyword arguments passed to pusher object.
         """
 
         key = key if key else 'de504dc5763aeef9ff52'
 
-        super(BitstampWSS, self).__init__(key, 'Bitstamp')
+        super(BitstampWSS, self).__init__(key, 'Bitstamp', maxsize, overflow,
+                                          conflate)
 
         self.pusher = None
         self.__pusher_options = kwargs
 
+        # Local order books, by pair, once synchronized with a snapshot
+        self.book_sync = books
+        self.rest = rest if rest else BitstampREST()
+        self.books = {}
+        self._book_lock = threading.RLock()
+        self._book_buffers = {}  # Diffs received while fetching a snapshot
+        self._snapshot_ts = {}  # Timestamp of each book's snapshot
+        self._book_resets = 0
+        self.snapshot_retry = snapshot_retry
+        self._snapshot_failures = {}  # Consecutive failed fetches, by pair
+        self._retry_at = {}  # Earliest time of the next fetch, by pair
+
         self.channels = ['live_trades', 'live_trades_btceur',
                          'live_trades_eurusd', 'live_trades_xrpusd',
                          'live_trades_xrpeur', 'live_trades_xrpbtc',
@@ -81,6 +119,22 @@ class BitstampWSS(WSSAPI):
         super(BitstampWSS, self).stop()
         self.pusher = None
 
+    def _received(self, data):
+        """
+        Stamps data on receipt, with the exchange's timestamp if it has one.
+        :param data: str or dict, as received
+        :return: tuple of decoded data and Timestamp obj
+        """
+        ts = stamp()
+        decoded = data
+        try:
+            if isinstance(data, (str, bytes)):
+                decoded = json.loads(data)
+            ts.exchange_ts = self._timestamp(decoded) / 1000000
+        except (ValueError, KeyError, TypeError):
+            pass
+        return decoded, ts
+
     """
     Custom Callbacks
     """
@@ -94,7 +148,8 @@ class BitstampWSS(WSSAPI):
         :param data:
         :return:
         """
-        self.data_q.put(('live_trades', pair, data))
+        _, ts = self._received(data)
+        self.publish(('live_trades', pair, data, ts), ts)
 
     def btcusd_lt_callback(self, data):
         self.live_trades_callback('BTCUSD', data)
@@ -125,7 +180,8 @@ class BitstampWSS(WSSAPI):
         :param data:
         :return:
         """
-        self.data_q.put(('order_book', pair, data))
+        _, ts = self._received(data)
+        self.publish(('order_book', pair, data, ts), ts)
 
     def btcusd_ob_callback(self, data):
         self.order_book_callback('BTCUSD', data)
@@ -157,7 +213,10 @@ class BitstampWSS(WSSAPI):
         :param data:
         :return:
         """
-        self.data_q.put(('diff_order_book', pair, data))
+        diff, ts = self._received(data)
+        if self.book_sync:
+            self._update_book(pair, diff)
+        self.publish(('diff_order_book', pair, data, ts), ts)
 
     def btcusd_dob_callback(self, data):
         self.diff_order_book_callback('BTCUSD', data)
@@ -189,7 +248,8 @@ class BitstampWSS(WSSAPI):
         :param data:
         :return:
         """
-        self.data_q.put(('live_orders', pair, data))
+        _, ts = self._received(data)
+        self.publish(('live_orders', pair, data, ts), ts)
 
     def btcusd_lo_callback(self, data):
         self.live_orders_callback('BTCUSD', data)
@@ -209,6 +269,132 @@ class BitstampWSS(WSSAPI):
     def xrpbtc_lo_callback(self, data):
         self.live_orders_callback('XRPBTC', data)
 
+    """
+    Local Order Books
+    """
+
+    @staticmethod
+    def _timestamp(data):
+        """
+        Returns the timestamp of a snapshot or diff, in microseconds.
+        """
+        if 'microtimestamp' in data:
+            return int(data['microtimestamp'])
+        return int(data['timestamp']) * 1000000
+
+    def _update_book(self, pair, data):
+        """
+        Applies a diff to the pair's local order book. Until the book was
+        synchronized with a snapshot, diffs are buffered, and a snapshot is
+        fetched on a separate thread - unless a fetch failed recently, in
+        which case the diff is dropped; the next snapshot contains it.
+        :param pair: str
+        :param data: str or dict, diff as received
+        :return:
+        """
+        diff = json.loads(data) if isinstance(data, (str, bytes)) else data
+        with self._book_lock:
+            buffer = self._book_buffers.get(pair)
+            if buffer is None and pair in self.books:
+                self._apply_diff(pair, diff)
+                return
+            if buffer is None:
+                if time.monotonic() < self._retry_at.get(pair, 0):
+                    return
+                buffer = self._book_buffers[pair] = []
+                thread = threading.Thread(target=self.sync_book, args=(pair,),
+                                          daemon=True,
+                                          name='Bitstamp Book %s' % pair)
+                thread.start()
+            buffer.append(diff)
+
+    def _apply_diff(self, pair, diff):
+        """
+        Applies a diff to a synchronized book, unless it's already contained
+        in the book's snapshot. Levels with an amount of 0 are removed.
+        :param pair: str
+        :param diff: dict
+        :return: bool, True if applied
+        """
+        if self._timestamp(diff) <= self._snapshot_ts[pair]:
+            return False
+        book = self.books[pair]
+        ts = time.time()
+        with book.lock:
+            for side in ('bids', 'asks'):
+                for price, amount in diff.get(side, ()):
+                    book.update(side, float(price), float(amount), ts=ts)
+        return True
+
+    def sync_book(self, pair):
+        """
+        Fetches a snapshot of pair's order book, replaces the local book
+        with it and applies the diffs buffered in the meantime, discarding
+        those older than the snapshot. Should the request fail or return an
+        error status, the first diff after snapshot_retry seconds retries.
+        :param pair: str, i.e. 'BTCUSD'
+        :return: bool, True if the book was synchronized
+        """
+        resets = self._book_resets
+        try:
+            resp = self.rest.query('GET', 'v2/order_book/%s/' % pair.lower())
+            resp.raise_for_status()
+            snapshot = resp.json()
+            snapshot_ts = self._timestamp(snapshot)
+        except Exception:
+            log.exception("BitstampWSS.sync_book(): Failed to fetch snapshot "
+                          "of %s", pair)
+            with self._book_lock:
+                failures = self._snapshot_failures.get(pair, 0) + 1
+                self._snapshot_failures[pair] = failures
+                self._retry_at[pair] = time.monotonic() + min(
+                    self.snapshot_retry * 2 ** (failures - 1),
+                    self.MAX_SNAPSHOT_RETRY)
+                if resets == self._book_resets:
+                    self._book_buffers.pop(pair, None)
+            return False
+
+        with self._book_lock:
+            if resets != self._book_resets:
+                # Books were reset while fetching; a new sync is under way
+                return False
+            book = self.books.get(pair) or OrderBook()
+            book.replace(((float(p), float(a), None)
+                          for p, a in snapshot['bids']),
+                         ((float(p), float(a), None)
+                          for p, a in snapshot['asks']), time.time())
+            self.books[pair] = book
+            self._snapshot_ts[pair] = snapshot_ts
+            self._snapshot_failures.pop(pair, None)
+            self._retry_at.pop(pair, None)
+            buffered = self._book_buffers.pop(pair, [])
+            applied = sum(self._apply_diff(pair, diff) for diff in buffered)
+        log.debug("BitstampWSS.sync_book(): Synchronized %s; applied %s of "
+                  "%s buffered diffs", pair, applied, len(buffered))
+        return True
+
+    def reset_books(self):
+        """
+        Discards all local order books; they're synchronized again with the
+        next diff of their pair, i.e. after reconnecting.
+        :return:
+        """
+        with self._book_lock:
+            self.books = {}
+            self._snapshot_ts = {}
+            self._book_buffers = {}
+            self._book_resets += 1
+
+    def get_book(self, pair):
+        """
+        Returns the local order book of pair, maintained from its
+        'diff_order_book' channel; use its views (top(), depth(), mid(), ..)
+        to read it.
+        :param pair: str, i.e. 'BTCUSD'
+        :return: OrderBook obj, or None if not synchronized yet
+        """
+        return self.books.get(pair)
+
     """
     Register Methods
     """
@@ -219,6 +405,9 @@ class BitstampWSS(WSSAPI):
         Responsible for binding callbacks to channels before we connect.
         :return:
         """
+        if self.book_sync:
+            # Diffs may have been missed while disconnected
+            self.reset_books()
         self._register_diff_order_book_channels()
         self._register_live_orders_channels()
         self._register_live_trades_channels()
@@ -0,0 +1,153 @@
+"""
+Topic-based dispatch for websocket clients.
+
+Instead of pulling every item off a client's data_q and filtering it,
+consumers add listeners for (channel, pair) patterns to the client's
+TopicBus. Each item is routed once, to the callbacks or queues of all
+matching listeners.
+"""
+
+# Import Built-Ins
+import logging
+import threading
+from fnmatch import fnmatchcase
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.WSS.queues import BoundedQueue
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+def topic(item):
+    """
+    Returns the (channel, pair) topic of a data_q item.
+    :param item: tuple of (channel, pair, data, ..)
+    :return: tuple, (None, None) for items of other shapes
+    """
+    if isinstance(item, tuple) and len(item) > 1:
+        return item[0], item[1]
+    return None, None
+
+
+class Listener:
+    """
+    Receives all items whose topic matches its channel and pair patterns.
+    Patterns are matched with fnmatch (i.e. '*USD'); None matches anything.
+
+    Items are passed to callback if one is given - on the thread which
+    published them, so callbacks should return quickly. Otherwise they are
+    put on the listener's own queue, and read via get().
+    """
+    def __init__(self, channel=None, pair=None, callback=None, maxsize=0,
+                 overflow='block'):
+        """
+        Initialize Object.
+        :param channel: str, channel pattern
+        :param pair: str, pair pattern
+        :param callback: callable, called with each item
+        :param maxsize: int, maximum size of the listener's queue
+        :param overflow: str, overflow policy of the listener's queue
+        """
+        self.channel = channel
+        self.pair = pair
+        self.callback = callback
+        self.q = None if callback else BoundedQueue(maxsize, overflow)
+
+    def matches(self, channel, pair):
+        return (self._match(self.channel, channel) and
+                self._match(self.pair, pair))
+
+    @staticmethod
+    def _match(pattern, value):
+        if pattern is None:
+            return True
+        if value is None:
+            return False
+        return pattern == value or fnmatchcase(str(value), pattern)
+
+    def deliver(self, item):
+        if self.callback is None:
+            self.q.put(item)
+            return
+        try:
+            self.callback(item)
+        except Exception:
+            log.exception("Listener.deliver(): Error in callback %s for %s",
+                          self.callback, item)
+
+    def get(self, **kwargs):
+        return self.q.get(**kwargs)
+
+    def get_batch(self, max_items=None, timeout=None):
+        return self.q.get_batch(max_items, timeout)
+
+    def drain(self):
+        return self.q.drain()
+
+
+class TopicBus:
+    """
+    Routes items to the listeners matching their topic. Matching listeners
+    are looked up once per topic and cached, so routing an item costs a
+    single dict lookup; the cache is reset whenever listeners change.
+    """
+    def __init__(self):
+        self._listeners = []
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._listeners)
+
+    def add(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+            self._routes = {}
+        return listener
+
+    def remove(self, listener):
+        with self._lock:
+            try:
+                self._listeners.remove(listener)
+            except ValueError:
+                return
+            self._routes = {}
+
+    def route(self, channel, pair):
+        """
+        Returns the listeners matching (channel, pair).
+        :param channel: str
+        :param pair: str
+        :return: tuple of Listener objs
+        """
+        key = channel, pair
+        routes = self._routes
+        try:
+            return routes[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable topic
+            return tuple(l for l in self._listeners
+                         if l.matches(channel, pair))
+        with self._lock:
+            listeners = tuple(l for l in self._listeners
+                              if l.matches(channel, pair))
+            self._routes[key] = listeners
+        return listeners
+
+    def dispatch(self, item):
+        """
+        Delivers item to all matching listeners.
+        :param item: tuple of (channel, pair, data, ..)
+        :return: bool, False if no listener matched
+        """
+        if not self._listeners:
+            return False
+        listeners = self.route(*topic(item))
+        for listener in listeners:
+            listener.deliver(item)
+        return bool(listeners)
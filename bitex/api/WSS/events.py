@@ -0,0 +1,294 @@
+"""
+Normalized events for websocket clients.
+
+Each client puts data on its data_q in its own shape - Bitfinex wraps
+payloads and timestamps in tuples, GDAX passes on decoded json, Gemini and
+Bitstamp raw strings. Once a client's normalization stage is enabled (see
+WSSAPI.normalize()), its data is published as the events below instead.
+
+Events are named tuples, so they are compact (no per-instance dict),
+immutable, picklable and serialize to json arrays. Like all other data_q
+items, they start with channel and symbol, so they can be routed by the
+TopicBus and conflated by a BoundedQueue. Symbols are canonical, i.e.
+'BTC-USD' for all exchanges; prices and sizes are floats, and book levels
+with a size of 0 are deletions.
+"""
+
+# Import Built-Ins
+import logging
+import json
+from collections import namedtuple
+from functools import lru_cache
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.WSS.latency import stamp
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+BookUpdate = namedtuple('BookUpdate', ['channel', 'symbol', 'exchange',
+                                       'bids', 'asks', 'snapshot', 'ts'])
+BookUpdate.__doc__ = """
+Changed price levels of an order book; bids and asks are tuples of
+(price, size). If snapshot is True, the levels replace the entire book.
+"""
+
+Trade = namedtuple('Trade', ['channel', 'symbol', 'exchange', 'id', 'price',
+                             'size', 'side', 'exchange_ts', 'ts'])
+Trade.__doc__ = """
+A single trade; side is the taker's side, 'buy' or 'sell', and exchange_ts
+the trade's time in seconds since the epoch, if known.
+"""
+
+Ticker = namedtuple('Ticker', ['channel', 'symbol', 'exchange', 'bid', 'ask',
+                               'last', 'volume', 'ts'])
+Ticker.__doc__ = """
+Best bid and ask, last price and 24h volume; fields the exchange doesn't
+send are None.
+"""
+
+Candle = namedtuple('Candle', ['channel', 'symbol', 'exchange', 'timeframe',
+                               'start', 'open', 'high', 'low', 'close',
+                               'volume', 'ts'])
+Candle.__doc__ = """
+An OHLCV bar starting at start, in seconds since the epoch; timeframe is
+the exchange's notation (i.e. '1m'), or None if unknown.
+"""
+
+AccountUpdate = namedtuple('AccountUpdate', ['channel', 'symbol', 'exchange',
+                                             'kind', 'data', 'ts'])
+AccountUpdate.__doc__ = """
+Account data of an authenticated channel, i.e. orders or wallets; data is
+passed on as sent by the exchange.
+"""
+
+QUOTES = ('USDT', 'USDC', 'USD', 'EUR', 'GBP', 'JPY', 'CNY', 'BTC', 'ETH',
+          'XBT')
+ALIASES = {'XBT': 'BTC', 'DSH': 'DASH', 'IOT': 'IOTA', 'QTM': 'QTUM'}
+
+
+@lru_cache(maxsize=None)
+def canonical_symbol(symbol):
+    """
+    Returns the canonical form of an exchange's symbol, 'BASE-QUOTE'.
+    :param symbol: str, i.e. 'tBTCUSD', 'btcusd', 'BTC_USD' or 'XBT-USD'
+    :return: str, i.e. 'BTC-USD'; symbol in upper case if its quote currency
+             is unknown
+    """
+    if len(symbol) > 1 and symbol[0] == 't' and symbol[1:].isupper():
+        # Bitfinex trading pair
+        symbol = symbol[1:]
+    symbol = symbol.upper()
+    for sep in ('-', '_', '/', ':'):
+        if sep in symbol:
+            base, quote = symbol.split(sep, 1)
+            break
+    else:
+        for quote in QUOTES:
+            if symbol.endswith(quote) and len(symbol) > len(quote):
+                base = symbol[:-len(quote)]
+                break
+        else:
+            return symbol
+    return '%s-%s' % (ALIASES.get(base, base), ALIASES.get(quote, quote))
+
+
+def _levels(levels, price=0, size=1):
+    return tuple((float(level[price]), float(level[size]))
+                 for level in levels)
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _decode(data):
+    return json.loads(data) if isinstance(data, (str, bytes)) else data
+
+
+##
+# Normalizers - each takes a client's data_q item and its Timestamp, and
+# returns a list of events.
+##
+
+
+def bitfinex(item, ts):
+    channel, pair, (data, *_) = item
+    symbol = canonical_symbol(pair)
+    if channel == 'ticker':
+        return [Ticker('ticker', symbol, 'Bitfinex', _float(data[0]),
+                       _float(data[2]), _float(data[6]), _float(data[7]),
+                       ts)]
+    elif channel == 'order_book':
+        levels = data[0]
+        snapshot = isinstance(levels[0], list)
+        bids, asks = [], []
+        for price, count, amount in (levels if snapshot else [levels]):
+            amount = float(amount)
+            size = abs(amount) if count else 0.0
+            (bids if amount > 0 else asks).append((float(price), size))
+        return [BookUpdate('order_book', symbol, 'Bitfinex', tuple(bids),
+                           tuple(asks), snapshot, ts)]
+    elif channel == 'trades':
+        if data[0] == 'te':
+            trades = [data[1]]
+        elif isinstance(data[0], list):
+            trades = data[0]
+        else:
+            # 'tu' repeats an already published 'te' trade
+            return []
+        events = []
+        for tid, mts, amount, price in trades:
+            amount = float(amount)
+            events.append(Trade('trades', symbol, 'Bitfinex', tid,
+                                float(price), abs(amount),
+                                'buy' if amount > 0 else 'sell', mts / 1000,
+                                ts))
+        return events
+    elif channel == 'ohlc':
+        candles = data[0] if isinstance(data[0][0], list) else [data[0]]
+        return [Candle('candles', symbol, 'Bitfinex', None, mts / 1000,
+                       float(o), float(h), float(l), float(c), float(v), ts)
+                for mts, o, c, h, l, v in candles]
+    elif channel.startswith('account_'):
+        return [AccountUpdate('account', None, 'Bitfinex', channel[8:], data,
+                              ts)]
+    return []
+
+
+def gdax(item, ts):
+    _, product_id, data, _ = item
+    symbol = canonical_symbol(product_id)
+    kind = data.get('type')
+    if kind == 'snapshot':
+        return [BookUpdate('order_book', symbol, 'GDAX',
+                           _levels(data['bids']), _levels(data['asks']),
+                           True, ts)]
+    elif kind == 'l2update':
+        bids = tuple((float(p), float(s)) for side, p, s in data['changes']
+                     if side == 'buy')
+        asks = tuple((float(p), float(s)) for side, p, s in data['changes']
+                     if side == 'sell')
+        return [BookUpdate('order_book', symbol, 'GDAX', bids, asks, False,
+                           ts)]
+    elif kind in ('match', 'last_match'):
+        # side is the maker's side
+        return [Trade('trades', symbol, 'GDAX', data['trade_id'],
+                      float(data['price']), float(data['size']),
+                      'buy' if data['side'] == 'sell' else 'sell',
+                      getattr(ts, 'exchange_ts', None), ts)]
+    elif kind == 'ticker':
+        return [Ticker('ticker', symbol, 'GDAX', _float(data.get('best_bid')),
+                       _float(data.get('best_ask')), _float(data.get('price')),
+                       _float(data.get('volume_24h')), ts)]
+    return []
+
+
+def gemini(item, ts):
+    _, pair, msg, _ = item
+    symbol = canonical_symbol(pair)
+    data = _decode(msg)
+    if data.get('type') != 'update':
+        return []
+    exchange_ts = data['timestampms'] / 1000 if 'timestampms' in data else None
+    bids, asks, events = [], [], []
+    snapshot = False
+    for event in data['events']:
+        if event['type'] == 'change':
+            snapshot = snapshot or event.get('reason') == 'initial'
+            (bids if event['side'] == 'bid' else asks).append(
+                (float(event['price']), float(event['remaining'])))
+        elif event['type'] == 'trade':
+            events.append(Trade('trades', symbol, 'Gemini', event['tid'],
+                                float(event['price']), float(event['amount']),
+                                'buy' if event['makerSide'] == 'ask'
+                                else 'sell', exchange_ts, ts))
+    if bids or asks:
+        events.insert(0, BookUpdate('order_book', symbol, 'Gemini',
+                                    tuple(bids), tuple(asks), snapshot, ts))
+    return events
+
+
+def hitbtc(item, ts):
+    if isinstance(item, dict):
+        # Trading API reports
+        return [AccountUpdate('account', None, 'HitBTC', kind, data, ts)
+                for kind, data in item.items()]
+    endpoint, pair, data, _ = item
+    symbol = canonical_symbol(pair)
+    snapshot = endpoint == 'MarketDataSnapshotFullRefresh'
+    events = [BookUpdate('order_book', symbol, 'HitBTC',
+                         _levels(data.get('bid', ()), 'price', 'size'),
+                         _levels(data.get('ask', ()), 'price', 'size'),
+                         snapshot, ts)]
+    for trade in data.get('trade', ()):
+        events.append(Trade('trades', symbol, 'HitBTC', trade['tradeId'],
+                            float(trade['price']), float(trade['size']),
+                            trade['side'], trade['timestamp'] / 1000, ts))
+    return events
+
+
+def okcoin(item, ts):
+    channel, pair, data, _ = item
+    symbol = canonical_symbol(pair)
+    if channel.endswith('_ticker'):
+        return [Ticker('ticker', symbol, 'OKCoin', _float(data.get('buy')),
+                       _float(data.get('sell')), _float(data.get('last')),
+                       _float(data.get('vol')), ts)]
+    elif '_depth' in channel:
+        return [BookUpdate('order_book', symbol, 'OKCoin',
+                           _levels(data.get('bids', ())),
+                           _levels(data.get('asks', ())), True, ts)]
+    elif channel.endswith('_trades'):
+        return [Trade('trades', symbol, 'OKCoin', tid, float(price),
+                      float(amount), 'sell' if side == 'ask' else 'buy', None,
+                      ts)
+                for tid, price, amount, _, side in data]
+    elif '_kline_' in channel:
+        candles = data if isinstance(data[0], list) else [data]
+        timeframe = channel.split('_kline_')[1]
+        return [Candle('candles', symbol, 'OKCoin', timeframe, mts / 1000,
+                       float(o), float(h), float(l), float(c), float(v), ts)
+                for mts, o, h, l, c, v in candles]
+    return []
+
+
+def bitstamp(item, ts):
+    channel, pair, data, _ = item
+    symbol = canonical_symbol(pair)
+    data = _decode(data)
+    if channel == 'live_trades':
+        return [Trade('trades', symbol, 'Bitstamp', data['id'],
+                      float(data['price']), float(data['amount']),
+                      'sell' if data['type'] else 'buy',
+                      _float(data.get('timestamp')), ts)]
+    elif channel in ('order_book', 'diff_order_book'):
+        return [BookUpdate('order_book', symbol, 'Bitstamp',
+                           _levels(data['bids']), _levels(data['asks']),
+                           channel == 'order_book', ts)]
+    return []
+
+
+NORMALIZERS = {'Bitfinex': bitfinex, 'GDAX': gdax, 'Gemini': gemini,
+               'HitBTC': hitbtc, 'OKCoin': okcoin, 'Bitstamp': bitstamp}
+
+
+def normalize(exchange, item, ts=None):
+    """
+    Converts a client's data_q item to events.
+    :param exchange: str, name of the client, i.e. 'Bitfinex'
+    :param item: data_q item of the client
+    :param ts: Timestamp obj the item was received with; if None, it's
+               stamped now
+    :return: list of events; empty for data without an event type
+    """
+    if ts is None:
+        ts = stamp()
+    try:
+        normalizer = NORMALIZERS[exchange]
+    except KeyError:
+        raise ValueError("No normalizer for %s!" % exchange)
+    return normalizer(item, ts)
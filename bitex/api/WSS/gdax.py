@@ -2,25 +2,32 @@
 import logging
 import json
 import threading
-import time
+from datetime import datetime
 
 # Import Third-Party
 from websocket import create_connection, WebSocketTimeoutException
-import requests
+from websocket import WebSocketConnectionClosedException
+
 # Import Homebrew
-from bitex.api.WSS.base import WSSAPI
+from bitex.api.WSS.base import WSSAPI, Supervisor
+from bitex.api.WSS.latency import stamp
+from bitex.api.metadata import shared_cache
 
 # Init Logging Facilities
 log = logging.getLogger(__name__)
 
 
 class GDAXWSS(WSSAPI):
-    def __init__(self):
-        super(GDAXWSS, self).__init__('wss://ws-feed.gdax.com', 'GDAX')
+    def __init__(self, pairs=None, maxsize=0, overflow='block',
+                 conflate=None):
+        super(GDAXWSS, self).__init__('wss://ws-feed.gdax.com', 'GDAX',
+                                      maxsize, overflow, conflate)
         self.conn = None
-        r = requests.get('https://api.gdax.com/products').json()
-        self.pairs = [x['id'] for x in r]
+        self.pairs = pairs if pairs else list(shared_cache().symbols('GDAX'))
         self._data_thread = None
+        self.supervisor = Supervisor(self, self._connect, self.send)
+        self.supervisor.register('products', {'type': 'subscribe',
+                                              'product_ids': self.pairs})
 
     def start(self):
         super(GDAXWSS, self).start()
@@ -34,17 +41,52 @@ class GDAXWSS(WSSAPI):
 
         self._data_thread.join()
 
-    def _process_data(self):
+    def _connect(self):
         self.conn = create_connection(self.addr, timeout=4)
-        payload = json.dumps({'type': 'subscribe', 'product_ids': self.pairs})
-        self.conn.send(payload)
+
+    def _close(self):
+        try:
+            self.conn.close()
+        except (WebSocketConnectionClosedException, AttributeError, OSError):
+            pass
+        self.conn = None
+
+    @staticmethod
+    def _parse_time(iso):
+        """
+        Converts GDAX' ISO 8601 timestamps (i.e. '2017-09-02T17:05:49.250000Z')
+        to seconds since the epoch.
+        :param iso: str
+        :return: float, or None if iso can't be parsed
+        """
+        try:
+            iso = iso.replace('Z', '+00:00')
+            return datetime.fromisoformat(iso).timestamp()
+        except (ValueError, AttributeError):
+            return None
+
+    def send(self, payload):
+        self.conn.send(json.dumps(payload))
+
+    def _process_data(self):
+        if not self.supervisor.connect():
+            return
         while self.running:
             try:
-                data = json.loads(self.conn.recv())
-            except (WebSocketTimeoutException, ConnectionResetError):
-                self._controller_q.put('restart')
+                raw = self.conn.recv()
+            except (WebSocketTimeoutException,
+                    WebSocketConnectionClosedException, OSError):
+                self.supervisor.disconnected()
+                self._close()
+                if not self.supervisor.connect():
+                    break
+                continue
+            ts = stamp()
+            self.supervisor.received()
+            data = json.loads(raw)
 
+            if 'time' in data:
+                ts.exchange_ts = self._parse_time(data['time'])
             if 'product_id' in data:
-                self.data_q.put(('order_book', data['product_id'],
-                                 data, time.time()))
-        self.conn = None
\ No newline at end of file
+                self.publish(('order_book', data['product_id'], data, ts), ts)
+        self._close()
@@ -1,46 +1,47 @@
 # Import Built-Ins
 import logging
 import time
+from functools import partial
 from threading import Thread
-from queue import Queue
 
 # Import Third-Party
-import requests
 
 # Import Homebrew
-from bitex.api.WSS.base import WSSAPI
+from bitex.api.WSS.base import WSSAPI, Supervisor
+from bitex.api.WSS.latency import stamp
+from bitex.api.metadata import shared_cache
 
 # Init Logging Facilities
 log = logging.getLogger(__name__)
 
 from websocket import create_connection, WebSocketTimeoutException
+from websocket import WebSocketConnectionClosedException
 
 
 class GeminiWSS(WSSAPI):
-    def __init__(self, endpoints=None):
-        super(GeminiWSS, self).__init__('wss://api.gemini.com/v1/', 'Gemini')
+    def __init__(self, endpoints=None, maxsize=0, overflow='block',
+                 conflate=None):
+        super(GeminiWSS, self).__init__('wss://api.gemini.com/v1/', 'Gemini',
+                                        maxsize, overflow, conflate)
         self.endpoints = (endpoints if endpoints else
-                          requests.get('https://api.gemini.com/v1/symbols').json())
+                          shared_cache().symbols('Gemini'))
         self.endpoints = ['marketdata/' + x.upper() for x in self.endpoints]
         self.endpoint_threads = {}
         self.threads_running = {}
-        self.restarter_thread = None
-        self.restart_q = Queue()
+        self.connections = {}
+        # One supervisor per endpoint connection; subscriptions are implied
+        # by the endpoint address, so there is nothing to replay.
+        self.supervisors = {}
 
-    def _restart_thread(self):
-        """
-        Restarts subscription threads if their connection drops.
-        :return:
-        """
-        while self.running['restart_thread']:
-            try:
-                endpoint = self.restart_q.get(timeout=.5)
-            except TimeoutError:
-                continue
-            log.info("_restart_thread(): Restarting Thread for endpoint %s",
-                     endpoint)
-            self.unsubscribe(endpoint)
-            self.subscribe(endpoint)
+    def _connect(self, endpoint):
+        self.connections[endpoint] = create_connection(self.addr + endpoint,
+                                                       timeout=5)
+
+    def _close(self, endpoint):
+        try:
+            self.connections.pop(endpoint).close()
+        except (KeyError, WebSocketConnectionClosedException, OSError):
+            pass
 
     def _subscription_thread(self, endpoint):
         """
@@ -48,28 +49,27 @@ class GeminiWSS(WSSAPI):
         :param endpoint:
         :return:
         """
-        try:
-            conn = create_connection(self.addr + endpoint, timeout=5)
-        except WebSocketTimeoutException:
-            self.restart_q.put(endpoint)
+        supervisor = self.supervisors[endpoint]
+        if not supervisor.connect():
             return
 
-        while self.threads_running[endpoint]:
+        ep, pair = endpoint.split('/')
+        while self.running and self.threads_running[endpoint]:
             try:
-                msg = conn.recv()
-            except WebSocketTimeoutException:
-                self._controller_q.put(endpoint)
+                msg = self.connections[endpoint].recv()
+            except (WebSocketTimeoutException,
+                    WebSocketConnectionClosedException, OSError):
+                supervisor.disconnected()
+                self._close(endpoint)
+                if not supervisor.connect():
+                    break
+                continue
+            ts = stamp()
+            supervisor.received()
 
             log.debug("%s, %s", endpoint, msg)
-            ep, pair = endpoint.split('/')
-            log.debug("_subscription_thread(): Putting data on q..")
-            try:
-                self.data_q.put((ep, pair, msg, time.time()), timeout=1)
-            except TimeoutError:
-                continue
-            finally:
-                log.debug("_subscription_thread(): Data Processed, looping back..")
-        conn.close()
+            self.publish((ep, pair, msg, ts), ts)
+        self._close(endpoint)
         log.debug("_subscription_thread(): Thread Loop Ended.")
 
     def start(self):
@@ -101,6 +101,10 @@ class GeminiWSS(WSSAPI):
         log.debug("GeminiWSS.subscribe(): Starting Thread for endpoint %s",
                   endpoint)
         self.threads_running[endpoint] = True
+        if endpoint not in self.supervisors:
+            self.supervisors[endpoint] = Supervisor(
+                self, partial(self._connect, endpoint), name=endpoint,
+                active=partial(self.threads_running.get, endpoint))
         t = Thread(target=self._subscription_thread,
                    args=(endpoint,), name=endpoint)
         t.daemon = True
@@ -129,8 +133,8 @@ class GeminiWSS(WSSAPI):
     def eval_command(self, cmd):
         if cmd in self.endpoints:
             self.subscribe(cmd)
-        elif cmd == 'stop':
-            self.stop()
+        else:
+            super(GeminiWSS, self).eval_command(cmd)
 
 
 
@@ -11,15 +11,18 @@ from websocket import create_connection, WebSocketTimeoutException
 
 # Import Homebrew
 from bitex.api.WSS.base import WSSAPI
+from bitex.api.WSS.latency import stamp
 
 # Init Logging Facilities
 log = logging.getLogger(__name__)
 
 
 class HitBTCWSS(WSSAPI):
-    def __init__(self, key=None, secret=None):
+    def __init__(self, key=None, secret=None, maxsize=0, overflow='block',
+                 conflate=None):
         data_addr = 'ws://api.hitbtc.com:80'
-        super(HitBTCWSS, self).__init__(data_addr, 'HitBTC')
+        super(HitBTCWSS, self).__init__(data_addr, 'HitBTC', maxsize, overflow,
+                                        conflate)
         self.trader_addr = 'ws://api.hitbtc.com:8080'
 
         self.data_thread = None
@@ -67,17 +70,18 @@ class HitBTCWSS(WSSAPI):
         while self.running:
             try:
                 data = conn.recv()
-                data = json.loads(data)
             except WebSocketTimeoutException:
                 self._controller_q.put('restart_data')
                 return
+            ts = stamp()
+            data = json.loads(data)
             try:
                 pair = data['MarketDataIncrementalRefresh']['symbol']
                 endpoint = 'MarketDataIncrementalRefresh'
             except KeyError:
                 pair = data['MarketDataSnapshotFullRefresh']['symbol']
                 endpoint = 'MarketDataSnapshotFullRefresh'
-            self.data_q.put((endpoint, pair, data[endpoint], time.time()))
+            self.publish((endpoint, pair, data[endpoint], ts), ts)
 
     def _trade_thread(self):
         try:
@@ -93,7 +97,7 @@ class HitBTCWSS(WSSAPI):
             except WebSocketTimeoutException:
                 self._controller_q.put('restart_data')
                 return
-            self.data_q.put(json.loads(data))
+            self.publish(json.loads(data))
 
             try:
                 payload = self.trade_command_q.get()
@@ -0,0 +1,165 @@
+"""
+Receive timestamps and feed latency metrics for websocket clients.
+
+Clients stamp each message with a Timestamp right after reading it from the
+socket. A Timestamp is the wall-clock time as a float - so it can be used
+wherever clients used time.time() before - which also carries a monotonic
+nanosecond timestamp and, where the payload has one, the exchange's own
+timestamp.
+
+From these, a LatencyMonitor keeps per-channel histograms of
+
+    feed:     exchange timestamp -> receive (network and exchange delay)
+    dispatch: receive -> publish (time spent inside the client)
+"""
+
+# Import Built-Ins
+import logging
+import time
+
+# Import Third-Party
+
+# Import Homebrew
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class Timestamp(float):
+    """
+    Wall-clock receive time in seconds since the epoch, carrying the
+    monotonic receive time in nanoseconds (recv_ns) and the exchange's
+    timestamp in seconds since the epoch (exchange_ts, None if unknown).
+    """
+    __slots__ = ('recv_ns', 'exchange_ts')
+
+    def __new__(cls, value, recv_ns, exchange_ts=None):
+        ts = super(Timestamp, cls).__new__(cls, value)
+        ts.recv_ns = recv_ns
+        ts.exchange_ts = exchange_ts
+        return ts
+
+    def __reduce__(self):
+        return Timestamp, (float(self), self.recv_ns, self.exchange_ts)
+
+
+def stamp(exchange_ts=None):
+    """
+    Returns a Timestamp of the current time; call it immediately after
+    reading from the socket.
+    :param exchange_ts: float, exchange timestamp in seconds, if known
+    :return: Timestamp obj
+    """
+    return Timestamp(time.time(), time.monotonic_ns(), exchange_ts)
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies with power-of-two buckets, starting at 1µs; the
+    n-th bucket counts latencies below 2 ** n µs. Recording is O(1) and
+    memory is constant, at the cost of percentiles being accurate to a
+    factor of two.
+    """
+    __slots__ = ('buckets', 'count', 'total', 'min', 'max', 'negative')
+
+    def __init__(self):
+        self.buckets = [0] * 48
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.negative = 0
+
+    def record(self, ns):
+        """
+        Records a latency.
+        :param ns: int, latency in nanoseconds; negative values (i.e. due to
+                   clock skew) are counted separately
+        :return:
+        """
+        if ns < 0:
+            self.negative += 1
+            return
+        self.buckets[min((ns // 1000).bit_length(), 47)] += 1
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if self.max is None or ns > self.max:
+            self.max = ns
+
+    def percentile(self, p):
+        """
+        Returns the upper bound of the bucket holding the p-th percentile.
+        :param p: float, 0 - 100
+        :return: float, seconds; None if nothing was recorded
+        """
+        if not self.count:
+            return None
+        rank = self.count * p / 100
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min((2 ** i) * 1e-6, self.max / 1e9)
+        return self.max / 1e9
+
+    def snapshot(self):
+        """
+        Returns the histogram's statistics, in seconds.
+        :return: dict
+        """
+        if not self.count:
+            return {'count': 0, 'negative': self.negative}
+        return {'count': self.count, 'negative': self.negative,
+                'mean': self.total / self.count / 1e9,
+                'min': self.min / 1e9, 'max': self.max / 1e9,
+                'p50': self.percentile(50), 'p99': self.percentile(99),
+                'p999': self.percentile(99.9)}
+
+
+class LatencyMonitor:
+    """
+    Per-channel feed and dispatch latency histograms of a client.
+    """
+    def __init__(self, exchange):
+        """
+        Initialize Object.
+        :param exchange: str, name of the exchange
+        """
+        self.exchange = exchange
+        self.feed = {}
+        self.dispatch = {}
+
+    @staticmethod
+    def _histogram(histograms, channel):
+        try:
+            return histograms[channel]
+        except KeyError:
+            histograms[channel] = LatencyHistogram()
+            return histograms[channel]
+
+    def record(self, channel, ts):
+        """
+        Records the latencies of a message published now.
+        :param channel: str
+        :param ts: Timestamp obj of the message
+        :return:
+        """
+        self._histogram(self.dispatch, channel).record(
+            time.monotonic_ns() - ts.recv_ns)
+        if ts.exchange_ts is not None:
+            self._histogram(self.feed, channel).record(
+                int((ts - ts.exchange_ts) * 1e9))
+
+    def stats(self):
+        """
+        Returns all histograms' statistics.
+        :return: dict of {channel: {'feed': dict, 'dispatch': dict}}
+        """
+        empty = LatencyHistogram()
+        channels = set(list(self.feed)) | set(list(self.dispatch))
+        return {channel: {'feed': self.feed.get(channel, empty).snapshot(),
+                          'dispatch': self.dispatch.get(channel,
+                                                        empty).snapshot()}
+                for channel in channels}
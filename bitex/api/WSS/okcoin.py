@@ -2,7 +2,6 @@
 import logging
 import json
 import threading
-import time
 
 # Import Third-Party
 from websocket import create_connection, WebSocketTimeoutException
@@ -10,15 +9,16 @@ import requests
 
 # Import Homebrew
 from bitex.api.WSS.base import WSSAPI
+from bitex.api.WSS.latency import stamp
 
 # Init Logging Facilities
 log = logging.getLogger(__name__)
 
 
 class OKCoinWSS(WSSAPI):
-    def __init__(self):
+    def __init__(self, maxsize=0, overflow='block', conflate=None):
         super(OKCoinWSS, self).__init__('wss://real.okcoin.com:10440/websocket/okcoinapi ',
-                                        'OKCoin')
+                                        'OKCoin', maxsize, overflow, conflate)
         self.conn = None
 
         self.pairs = ['BTC', 'LTC']
@@ -51,14 +51,16 @@ class OKCoinWSS(WSSAPI):
             self.conn.send(json.dumps(payload))
         while self.running:
             try:
-                data = json.loads(self.conn.recv())
+                raw = self.conn.recv()
             except (WebSocketTimeoutException, ConnectionResetError):
                 self._controller_q.put('restart')
+                continue
+            ts = stamp()
+            data = json.loads(raw)
 
             if 'data' in data:
                 pair = ''.join(data['channel'].split('spot')[1].split('_')[:2]).upper()
-                self.data_q.put((data['channel'], pair, data['data'],
-                                 time.time()))
+                self.publish((data['channel'], pair, data['data'], ts), ts)
             else:
                 log.debug(data)
         self.conn = None
\ No newline at end of file
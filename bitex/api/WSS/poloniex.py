@@ -7,10 +7,10 @@ import time
 # Import Third-Party
 from autobahn.asyncio.wamp import ApplicationRunner, ApplicationSession
 from asyncio import coroutine, get_event_loop
-import requests
 
 # Import Homebrew
 from bitex.api.WSS.base import WSSAPI
+from bitex.api.metadata import shared_cache
 
 # Init Logging Facilities
 log = logging.getLogger(__name__)
@@ -62,9 +62,7 @@ class PoloniexWSS(WSSAPI):
         if endpoints:
             self.endpoints = endpoints
         else:
-            r = requests.get('https://poloniex.com/public?command=returnTicker')
-            self.endpoints = list(r.json().keys())
-            self.endpoints.append('ticker')
+            self.endpoints = shared_cache().symbols('Poloniex') + ['ticker']
 
         for endpoint in self.endpoints:
             self.connections[endpoint] = PlnxEndpoint(endpoint, self.data_q)
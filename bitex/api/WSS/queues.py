@@ -0,0 +1,209 @@
+"""
+Queues for the data_q of websocket clients.
+
+BoundedQueue is a drop-in replacement for queue.Queue, which doesn't block
+the producer when it is full, but applies an overflow policy instead, and
+keeps count of what it had to discard. Consumers may take many items at once
+via get_batch() and drain(), paying for locking once per batch instead of
+once per item.
+"""
+
+# Import Built-Ins
+import logging
+import queue
+from time import monotonic
+from collections import deque
+
+# Import Third-Party
+
+# Import Homebrew
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+POLICIES = ('block', 'drop-oldest', 'drop-newest', 'conflate')
+
+
+def channel_pair_key(item):
+    """
+    Default conflation key: the (channel, pair) an item of shape
+    (channel, pair, data, ..) belongs to.
+    :param item: tuple
+    :return: tuple, or None if item isn't a tuple
+    """
+    if isinstance(item, tuple) and len(item) > 1:
+        return item[0], item[1]
+    return None
+
+
+def channels_key(channels):
+    """
+    Returns a conflation key function, which conflates items by (channel,
+    pair) if their channel is in channels; items of all other channels are
+    delivered losslessly.
+    :param channels: iterable of channel names, i.e. ['ticker', 'order_book']
+    :return: callable
+    """
+    channels = frozenset(channels)
+
+    def key(item):
+        if isinstance(item, tuple) and len(item) > 1 and item[0] in channels:
+            return item[0], item[1]
+        return None
+    return key
+
+
+class BoundedQueue(queue.Queue):
+    """
+    A queue.Queue with a maximum size and an overflow policy:
+
+        block:       put() blocks until there is room (queue.Queue behaviour)
+        drop-oldest: the oldest item is discarded to make room
+        drop-newest: the item being put is discarded
+        conflate:    an item replaces the pending item with the same key in
+                     place, keeping its position in the queue; items with
+                     new keys are added, discarding the oldest item if the
+                     queue is full
+
+    Counters for dropped and conflated items and the queue's high-water mark
+    are available via stats().
+    """
+    def __init__(self, maxsize=0, policy='block', key=channel_pair_key):
+        """
+        Initialize Object.
+        :param maxsize: int, maximum number of items; unbounded if <= 0
+        :param policy: str, one of POLICIES
+        :param key: callable returning the conflation key of an item, or
+                    None for items which must not be conflated
+        """
+        if policy not in POLICIES:
+            raise ValueError("policy must be one of %s, not %s" %
+                             (POLICIES, policy))
+        self.policy = policy
+        self.key = key
+        self.dropped = 0
+        self.conflated = 0
+        self.high_water = 0
+        super(BoundedQueue, self).__init__(maxsize)
+
+    def _init(self, maxsize):
+        self.queue = deque()
+        # Conflation key: [key, item] entry currently pending in self.queue
+        self._pending = {}
+
+    def _qsize(self):
+        return len(self.queue)
+
+    def _put(self, item, key=None):
+        if self.policy == 'conflate':
+            entry = [key, item]
+            if key is not None:
+                self._pending[key] = entry
+            self.queue.append(entry)
+        else:
+            self.queue.append(item)
+        if len(self.queue) > self.high_water:
+            self.high_water = len(self.queue)
+
+    def _get(self):
+        if self.policy == 'conflate':
+            key, item = self.queue.popleft()
+            if key is not None:
+                del self._pending[key]
+            return item
+        return self.queue.popleft()
+
+    def _get_many(self, n):
+        q = self.queue
+        if self.policy == 'conflate':
+            pending = self._pending
+            items = []
+            for _ in range(n):
+                key, item = q.popleft()
+                if key is not None:
+                    del pending[key]
+                items.append(item)
+            return items
+        if n == len(q):
+            items = list(q)
+            q.clear()
+            return items
+        return [q.popleft() for _ in range(n)]
+
+    def get_batch(self, max_items=None, timeout=None):
+        """
+        Removes and returns up to max_items items in a single critical
+        section. Waits for at least one item to arrive, for at most timeout
+        seconds.
+        :param max_items: int, all items available if None
+        :param timeout: float, seconds to wait; forever if None, not at all
+                        if 0
+        :return: list, empty if no item arrived in time
+        """
+        with self.not_empty:
+            if timeout is None:
+                while not self._qsize():
+                    self.not_empty.wait()
+            elif not self._qsize():
+                endtime = monotonic() + timeout
+                while not self._qsize():
+                    remaining = endtime - monotonic()
+                    if remaining <= 0:
+                        return []
+                    self.not_empty.wait(remaining)
+            n = self._qsize()
+            if max_items is not None and max_items < n:
+                n = max_items
+            items = self._get_many(n)
+            self.not_full.notify(n)
+            return items
+
+    def drain(self):
+        """
+        Returns an iterator over all items currently on the queue, which
+        are removed in a single critical section.
+        :return: iterator
+        """
+        return iter(self.get_batch(timeout=0))
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Puts item on the queue, applying the overflow policy if it is full.
+        block and timeout are only regarded by the 'block' policy.
+        :param item: any
+        :param block: bool
+        :param timeout: float
+        :return:
+        """
+        if self.policy == 'block':
+            return super(BoundedQueue, self).put(item, block, timeout)
+
+        key = self.key(item) if self.policy == 'conflate' else None
+        with self.not_full:
+            if key is not None and key in self._pending:
+                self._pending[key][1] = item
+                self.conflated += 1
+                return
+
+            if 0 < self.maxsize <= self._qsize():
+                self.dropped += 1
+                if self.policy == 'drop-newest':
+                    return
+                self._get()
+                self.unfinished_tasks -= 1
+
+            self._put(item, key)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def stats(self):
+        """
+        Returns the queue's counters.
+        :return: dict
+        """
+        with self.mutex:
+            return {'size': self._qsize(), 'maxsize': self.maxsize,
+                    'policy': self.policy, 'dropped': self.dropped,
+                    'conflated': self.conflated,
+                    'high_water': self.high_water}
@@ -0,0 +1,281 @@
+"""
+Shared-memory ring buffer for distributing feed data between processes.
+
+A RingPublisher writes the data of one or more websocket clients into a
+ring buffer in shared memory; any number of RingReaders in other processes
+on the same host attach to it by name. Readers never block the publisher
+and take no locks: each slot is guarded by a sequence number, which the
+publisher sets to an odd value while writing the slot and to an even one
+once it is complete. A reader which falls more than a full ring behind
+skips ahead and counts the items it lost.
+
+Layout of the shared memory block:
+
+    header (64 bytes): magic, version, capacity, slot size, write sequence
+    slots (capacity * slot size): sequence (8 bytes), length (4 bytes),
+                                  padding (4 bytes), payload
+
+Payloads are json. Timestamps are written as {"__ts__": [ts, recv_ns,
+exchange_ts]} and normalized events as {"__event__": name, "fields": [..]},
+so RingReaders return them as Timestamp and event objects again; all other
+data is returned as decoded from json, with items as tuples.
+"""
+
+# Import Built-Ins
+import logging
+import json
+import time
+import struct
+import threading
+from multiprocessing import shared_memory
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.WSS.latency import Timestamp
+from bitex.api.WSS.events import BookUpdate, Trade, Ticker, Candle
+from bitex.api.WSS.events import AccountUpdate
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+MAGIC = b'BTXR'
+VERSION = 2
+HEADER = struct.Struct('<4sIII')
+HEADER_SIZE = 64
+WRITE_SEQ = struct.Struct('<Q')
+WRITE_SEQ_OFFSET = 16
+SLOT = struct.Struct('<QI')
+SLOT_HEADER_SIZE = 16
+
+# Names of the rings published by this process
+_published = set()
+
+
+EVENTS = {event.__name__: event
+          for event in (BookUpdate, Trade, Ticker, Candle, AccountUpdate)}
+
+
+def _tag(obj):
+    """
+    Replaces Timestamps and events in obj and the tuples it contains with
+    their tagged json representations; lists and dicts hold decoded json,
+    which is passed on as is.
+    """
+    if isinstance(obj, Timestamp):
+        return {'__ts__': [float(obj), obj.recv_ns, obj.exchange_ts]}
+    if isinstance(obj, tuple):
+        fields = [_tag(value) for value in obj]
+        if EVENTS.get(type(obj).__name__) is type(obj):
+            return {'__event__': type(obj).__name__, 'fields': fields}
+        return fields
+    return obj
+
+
+def _untag(obj):
+    if '__ts__' in obj:
+        return Timestamp(*obj['__ts__'])
+    if '__event__' in obj:
+        return EVENTS[obj['__event__']](*obj['fields'])
+    return obj
+
+
+def _encode(item):
+    return json.dumps(_tag(item), separators=(',', ':')).encode('utf-8')
+
+
+def _decode(payload):
+    item = json.loads(payload.decode('utf-8'), object_hook=_untag)
+    return tuple(item) if isinstance(item, list) else item
+
+
+class RingPublisher:
+    """
+    Creates a shared-memory ring buffer and writes items into it. Items are
+    serialized as json (see module docstring), so all processes - including
+    non-Python ones - can read them; items larger than a slot are dropped
+    and counted.
+
+    Writes are serialized by a lock within the publishing process, so data
+    of several clients may be published into the same ring.
+    """
+    def __init__(self, name, capacity=16384, slot_size=2048):
+        """
+        Initialize Object.
+        :param name: str, name of the shared memory block readers attach to
+        :param capacity: int, number of slots
+        :param slot_size: int, bytes per slot, including its 16 byte header
+        """
+        self.name = name
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self.max_payload = slot_size - SLOT_HEADER_SIZE
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=True, size=HEADER_SIZE + capacity * slot_size)
+        self.buf = self.shm.buf
+        _published.add(name)
+        HEADER.pack_into(self.buf, 0, MAGIC, VERSION, capacity, slot_size)
+        WRITE_SEQ.pack_into(self.buf, WRITE_SEQ_OFFSET, 0)
+        self.seq = 0
+        self.oversized = 0
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def write(self, item):
+        """
+        Writes item to the next slot.
+        :param item: json-serializable obj, i.e. (channel, pair, data, ts)
+        :return: bool, False if item was too large for a slot
+        """
+        payload = _encode(item)
+        size = len(payload)
+        if size > self.max_payload:
+            self.oversized += 1
+            log.warning("RingPublisher.write(): Dropping item of %s bytes - "
+                        "slots hold %s bytes!", size, self.max_payload)
+            return False
+        with self._lock:
+            seq = self.seq
+            offset = HEADER_SIZE + (seq % self.capacity) * self.slot_size
+            buf = self.buf
+            # Odd slot sequence: slot is being written
+            SLOT.pack_into(buf, offset, 2 * seq + 1, size)
+            start = offset + SLOT_HEADER_SIZE
+            buf[start:start + size] = payload
+            SLOT.pack_into(buf, offset, 2 * seq + 2, size)
+            self.seq = seq + 1
+            WRITE_SEQ.pack_into(buf, WRITE_SEQ_OFFSET, self.seq)
+        return True
+
+    def attach(self, client, channel=None, pair=None):
+        """
+        Publishes all of a client's data matching channel and pair, instead
+        of putting it on the client's data_q.
+        :param client: WSSAPI obj
+        :param channel: str, channel pattern
+        :param pair: str, pair pattern
+        :return: Listener obj
+        """
+        listener = client.add_listener(channel, pair, callback=self.write)
+        self._clients[listener] = client
+        return listener
+
+    def detach(self, listener):
+        self._clients.pop(listener).remove_listener(listener)
+
+    def close(self):
+        """
+        Detaches all clients and removes the shared memory block; attached
+        readers keep their mapping until they close it.
+        :return:
+        """
+        for listener in list(self._clients):
+            self.detach(listener)
+        self.buf = None
+        self.shm.close()
+        self.shm.unlink()
+        _published.discard(self.name)
+
+
+class RingReader:
+    """
+    Reads items from a RingPublisher's ring buffer, starting with the next
+    item written after attaching. Each reader keeps its own position, so
+    many readers in many processes may read the same ring.
+
+    Items, Timestamps and normalized events are returned as written; tuples
+    nested in data come back as lists.
+    """
+    def __init__(self, name, from_start=False):
+        """
+        Initialize Object.
+        :param name: str, name of the shared memory block
+        :param from_start: bool, start at the oldest item still in the ring
+        """
+        self.name = name
+        self.shm = shared_memory.SharedMemory(name=name)
+        if name not in _published:
+            # The publisher owns the block; keep the resource tracker from
+            # removing it when this process exits.
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, 'shared_memory')
+            except (ImportError, AttributeError):
+                pass
+        self.buf = self.shm.buf
+        magic, version, self.capacity, self.slot_size = HEADER.unpack_from(
+            self.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a bitex ring buffer!" % name)
+        head = self._head()
+        self.pos = max(0, head - self.capacity) if from_start else head
+        self.lost = 0
+
+    def _head(self):
+        return WRITE_SEQ.unpack_from(self.buf, WRITE_SEQ_OFFSET)[0]
+
+    def _read_slot(self, seq):
+        """
+        Returns the payload written as item number seq, or None if it has
+        been overwritten in the meantime.
+        """
+        offset = HEADER_SIZE + (seq % self.capacity) * self.slot_size
+        slot_seq, size = SLOT.unpack_from(self.buf, offset)
+        if slot_seq != 2 * seq + 2:
+            return None
+        start = offset + SLOT_HEADER_SIZE
+        payload = bytes(self.buf[start:start + size])
+        if SLOT.unpack_from(self.buf, offset)[0] != slot_seq:
+            return None
+        return payload
+
+    def get_batch(self, max_items=None):
+        """
+        Returns all items written since the last read, up to max_items;
+        doesn't wait.
+        :param max_items: int
+        :return: list
+        """
+        head = self._head()
+        if head - self.pos > self.capacity:
+            skipped = head - self.capacity - self.pos
+            self.lost += skipped
+            self.pos += skipped
+        if max_items is not None:
+            head = min(head, self.pos + max_items)
+
+        items = []
+        while self.pos < head:
+            payload = self._read_slot(self.pos)
+            self.pos += 1
+            if payload is None:
+                # Overwritten while we were reading
+                self.lost += 1
+                continue
+            items.append(_decode(payload))
+        return items
+
+    def get(self, timeout=None, poll_interval=0.0005):
+        """
+        Returns the next item, polling for it if there is none yet.
+        :param timeout: float, seconds to wait; forever if None
+        :param poll_interval: float, seconds to sleep between polls
+        :return: item, or None if the timeout expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            items = self.get_batch(1)
+            if items:
+                return items[0]
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def __iter__(self):
+        while True:
+            yield self.get()
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
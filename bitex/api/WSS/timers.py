@@ -0,0 +1,121 @@
+"""
+Hashed timer wheel for deadlines of websocket clients.
+
+Clients track many deadlines - heartbeats per channel, ping timeouts - of
+which only few ever expire. Instead of checking all of them on every
+message, deadlines are filed into the slot of a wheel their tick falls
+into; advancing the wheel only visits the slots whose ticks have passed
+since the last advance, so it's O(1) if no tick passed, and only expired
+timers are ever looked at.
+"""
+
+# Import Built-Ins
+import logging
+import math
+import threading
+import time
+
+# Import Third-Party
+
+# Import Homebrew
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class Timer:
+    """
+    Handle of a scheduled callback; cancel() it to keep it from firing.
+    """
+    __slots__ = ('deadline', 'tick', 'callback', 'args', 'cancelled')
+
+    def __init__(self, deadline, tick, callback, args):
+        self.deadline = deadline
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    Timer wheel of n slots, each covering tick seconds. Timers further in
+    the future than a full turn of the wheel are kept in their slot until
+    the wheel reaches their tick.
+
+    Timers fire on the thread calling advance(), up to one tick late;
+    scheduling and cancelling are thread-safe.
+    """
+    def __init__(self, tick=0.1, slots=512, clock=time.monotonic):
+        """
+        Initialize Object.
+        :param tick: float, resolution of the wheel in seconds
+        :param slots: int, number of slots
+        :param clock: callable returning the current time in seconds
+        """
+        self.tick = tick
+        self.clock = clock
+        self._slots = [[] for _ in range(slots)]
+        self._current = int(clock() / tick)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(slot) for slot in self._slots)
+
+    def schedule(self, delay, callback, *args):
+        """
+        Schedules callback(*args) to be called in delay seconds.
+        :param delay: float, seconds
+        :param callback: callable
+        :return: Timer obj
+        """
+        deadline = self.clock() + delay
+        with self._lock:
+            tick = max(math.ceil(deadline / self.tick), self._current + 1)
+            timer = Timer(deadline, tick, callback, args)
+            self._slots[tick % len(self._slots)].append(timer)
+        return timer
+
+    def advance(self):
+        """
+        Fires all timers whose deadline has passed.
+        :return: int, number of timers fired
+        """
+        now = int(self.clock() / self.tick)
+        if now <= self._current:
+            return 0
+
+        due = []
+        with self._lock:
+            n = len(self._slots)
+            if now - self._current >= n:
+                visit = range(n)
+            else:
+                visit = range(self._current + 1, now + 1)
+            self._current = now
+            for i in visit:
+                slot = self._slots[i % n]
+                if not slot:
+                    continue
+                pending = []
+                for timer in slot:
+                    if timer.cancelled:
+                        continue
+                    (due if timer.tick <= now else pending).append(timer)
+                self._slots[i % n] = pending
+
+        due.sort(key=lambda timer: timer.deadline)
+        for timer in due:
+            try:
+                timer.callback(*timer.args)
+            except Exception:
+                log.exception("TimerWheel.advance(): Error in timer callback "
+                              "%s", timer.callback)
+        return len(due)
+
+    def clear(self):
+        with self._lock:
+            self._slots = [[] for _ in range(len(self._slots))]
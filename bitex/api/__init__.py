@@ -1,3 +1,11 @@
-import bitex.api.REST
-import bitex.api.WSS
+# Import Built-Ins
+from importlib import import_module
 
+# Sub packages are imported on first access, see bitex.__getattr__()
+_SUBMODULES = ('REST', 'WSS')
+
+
+def __getattr__(name):
+    if name not in _SUBMODULES:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    return import_module(__name__ + '.' + name)
@@ -0,0 +1,222 @@
+"""
+Multi-pair request batching.
+
+Several exchanges offer endpoints returning data for many (or all) pairs in
+a single request. The RequestBatcher merges concurrent per-pair ticker and
+order book requests into as few of these calls as possible, and splits the
+results back out per pair, formatted as the interface's per-pair method
+would have returned them.
+"""
+
+# Import Built-Ins
+import logging
+import time
+import threading
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.formatters.kraken import KrknFormatter
+from bitex.formatters.poloniex import PlnxFormatter
+from bitex.formatters.bittrex import BtrxFormatter
+from bitex.formatters.bter import BterFormatter
+from bitex.formatters.hitbtc import HitBtcFormatter
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+def _per_pair(pairs, parse):
+    """
+    Returns {pair: parse(pair)} for all pairs; pairs missing from the
+    response (i.e. delisted or misspelled ones) map to None, so the others
+    still succeed.
+    :param pairs: list of str
+    :param parse: callable, returning the formatted data of a pair
+    :return: dict
+    """
+    data = {}
+    for pair in pairs:
+        try:
+            data[pair] = parse(pair)
+        except KeyError:
+            log.warning("Batch response holds no data for %s!", pair)
+            data[pair] = None
+    return data
+
+
+def _kraken_ticker(exchange, pairs, **kwargs):
+    r = exchange.public_query('Ticker',
+                              params=exchange.make_params(*pairs, **kwargs))
+    result = r.json()['result']
+
+    def parse(pair):
+        key = pair if pair in result else KrknFormatter.format_pair(pair)
+        return KrknFormatter.ticker({'result': {key: result[key]}})
+    return r, _per_pair(pairs, parse)
+
+
+def _poloniex_ticker(exchange, pairs, **kwargs):
+    r = exchange.public_query('returnTicker', params=kwargs)
+    result = r.json()
+    return r, _per_pair(pairs, lambda pair: PlnxFormatter.ticker(
+        result, exchange, pair))
+
+
+def _poloniex_order_book(exchange, pairs, depth=None, **kwargs):
+    kwargs['currencyPair'] = 'all'
+    if depth:
+        kwargs['depth'] = depth
+    r = exchange.public_query('returnOrderBook', params=kwargs)
+    result = r.json()
+    return r, _per_pair(pairs, lambda pair: PlnxFormatter.order_book(
+        result[pair], exchange, pair))
+
+
+def _bittrex_ticker(exchange, pairs, **kwargs):
+    r = exchange.public_query('getmarketsummaries', params=kwargs)
+    result = {d['MarketName']: d for d in r.json()['result']}
+    return r, _per_pair(pairs, lambda pair: BtrxFormatter.ticker(
+        {'result': [result[pair]]}))
+
+
+def _bter_ticker(exchange, pairs, **kwargs):
+    r = exchange.public_query('tickers', params=kwargs)
+    result = r.json()
+    return r, _per_pair(pairs, lambda pair: BterFormatter.ticker(
+        result[pair], exchange, pair))
+
+
+def _hitbtc_ticker(exchange, pairs, **kwargs):
+    r = exchange.public_query('api/ticker', params=kwargs)
+    result = r.json()
+    return r, _per_pair(pairs, lambda pair: HitBtcFormatter.ticker(
+        result[pair], exchange, pair))
+
+
+# Interface class name: {method name: multi-pair fetch function} pairs. Each
+# function takes the interface, a list of pairs and keyword arguments, and
+# returns a tuple of (APIResponse, {pair: formatted data}), with None as data
+# of pairs missing from the response.
+BATCH_METHODS = {'Kraken': {'ticker': _kraken_ticker},
+                 'Poloniex': {'ticker': _poloniex_ticker,
+                              'order_book': _poloniex_order_book},
+                 'Bittrex': {'ticker': _bittrex_ticker},
+                 'Bter': {'ticker': _bter_ticker},
+                 'HitBtc': {'ticker': _hitbtc_ticker}}
+
+
+class _Batch:
+    """
+    Per-pair requests collected during a batching window.
+    """
+    def __init__(self):
+        self.pairs = []
+        self.done = threading.Event()
+        self.results = {}
+        self.error = None
+
+
+class RequestBatcher:
+    """
+    Merges per-pair requests to an exchange into multi-pair calls, where the
+    exchange supports them; falls back to one call per pair otherwise.
+
+    ticker() and order_book() may be called concurrently from many threads.
+    The first caller opens a batch and waits `window` seconds for others to
+    join it, then sends a single request for all pairs collected.
+    """
+    def __init__(self, exchange, window=0.05):
+        """
+        Initialize Object.
+        :param exchange: bitex.interfaces obj
+        :param window: float, seconds to collect requests for before sending
+        """
+        self.exchange = exchange
+        self.window = window
+        self.methods = BATCH_METHODS.get(type(exchange).__name__, {})
+        self._lock = threading.Lock()
+        self._open = {}  # method name: _Batch currently collecting pairs
+
+    def supports(self, method):
+        """
+        Returns True if the exchange has a multi-pair endpoint for method.
+        :param method: str, interface method name (i.e. 'ticker')
+        :return: bool
+        """
+        return method in self.methods
+
+    def fetch(self, method, pairs, **kwargs):
+        """
+        Requests method's data for all pairs with as few calls as possible.
+        :param method: str, interface method name (i.e. 'ticker')
+        :param pairs: list of str
+        :param kwargs: Keyword arguments for the request
+        :return: tuple of (APIResponse of the last request made,
+                           {pair: formatted data}); data of pairs missing
+                 from a multi-pair response is None
+        """
+        pairs = list(pairs)
+        if method in self.methods:
+            return self.methods[method](self.exchange, pairs, **kwargs)
+
+        r, data = None, {}
+        for pair in pairs:
+            r = getattr(self.exchange, method)(pair, **kwargs)
+            data[pair] = r.formatted
+        return r, data
+
+    def _request(self, method, pair):
+        """
+        Adds pair to the currently open batch for method and waits for its
+        result; opens and sends the batch if there is none.
+        :param method: str
+        :param pair: str
+        :return: formatted data for pair
+        :raises KeyError: if the response holds no data for pair
+        """
+        with self._lock:
+            batch = self._open.get(method)
+            leader = batch is None
+            if leader:
+                batch = self._open[method] = _Batch()
+            if pair not in batch.pairs:
+                batch.pairs.append(pair)
+
+        if leader:
+            time.sleep(self.window)
+            with self._lock:
+                self._open.pop(method)
+            try:
+                _, batch.results = self.fetch(method, batch.pairs)
+            except Exception as e:
+                log.exception("RequestBatcher._request(): Error fetching %s "
+                              "for %s", method, batch.pairs)
+                batch.error = e
+            batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        data = batch.results.get(pair)
+        if data is None:
+            raise KeyError("%s: No %s data for %s!" %
+                           (type(self.exchange).__name__, method, pair))
+        return data
+
+    def ticker(self, pair):
+        """
+        Returns formatted ticker data for pair, batched with concurrent calls.
+        :param pair: str
+        :return: tuple
+        """
+        return self._request('ticker', pair)
+
+    def order_book(self, pair):
+        """
+        Returns formatted order book for pair, batched with concurrent calls.
+        :param pair: str
+        :return: dict
+        """
+        return self._request('order_book', pair)
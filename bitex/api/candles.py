@@ -0,0 +1,210 @@
+"""
+Candle (OHLCV) stores.
+
+CandleBuffer keeps the last bars of a single pair and timeframe in a
+preallocated NumPy array, merging snapshots and updates of a candle feed in
+place; CandleStore holds one buffer per (pair, timeframe). Requires numpy
+(pip install BitEx[numpy]).
+"""
+
+# Import Built-Ins
+import logging
+import threading
+
+# Import Third-Party
+import numpy as np
+
+# Import Homebrew
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+COLUMNS = ('start', 'open', 'high', 'low', 'close', 'volume')
+
+
+class CandleBuffer:
+    """
+    Ring buffer of the last capacity bars, oldest first, as rows of COLUMNS.
+
+    Every row is written twice, at i and i + capacity, so the last n bars
+    are always a contiguous slice of the array - last() returns them as a
+    view instead of copying them, however the ring has wrapped. Views are
+    read-only and reflect later updates to their rows (and, once the ring
+    has turned, newer bars); copy them to keep a fixed set of bars.
+
+    Bars are merged by their start: an update of a bar that is still in the
+    buffer overwrites it in place, a newer one is appended, and an older
+    one is dropped.
+    """
+    def __init__(self, capacity=1000):
+        """
+        Initialize Object.
+        :param capacity: int, number of bars to keep
+        """
+        self.capacity = capacity
+        self._data = np.zeros((2 * capacity, len(COLUMNS)))
+        self._next = 0  # Position of the next bar in the ring
+        self._size = 0
+        self.updates = 0
+        self.ts = None
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return self._size
+
+    def _write(self, position, bar):
+        self._data[position] = bar
+        self._data[position + self.capacity] = bar
+
+    def _position(self, start):
+        """
+        Returns the position of the bar starting at start, if it's buffered.
+        """
+        if not self._size:
+            return None
+        bars = self.last()
+        i = int(np.searchsorted(bars[:, 0], start))
+        if i < self._size and bars[i, 0] == start:
+            return (self._next - self._size + i) % self.capacity
+        return None
+
+    def update(self, bar, ts=None):
+        """
+        Merges a single bar into the buffer.
+        :param bar: sequence of start, open, high, low, close and volume
+        :param ts: float, time the bar was received
+        :return:
+        """
+        start = bar[0]
+        with self.lock:
+            if self._size:
+                latest = self._data[self._next - 1 + self.capacity, 0]
+            if not self._size or start > latest:
+                self._write(self._next, bar)
+                self._next = (self._next + 1) % self.capacity
+                self._size = min(self._size + 1, self.capacity)
+            elif start == latest:
+                self._write((self._next - 1) % self.capacity, bar)
+            else:
+                position = self._position(start)
+                if position is None:
+                    log.debug("CandleBuffer.update(): Dropped bar %s older "
+                              "than the buffer", bar)
+                else:
+                    self._write(position, bar)
+            self.updates += 1
+            self.ts = ts
+
+    def replace(self, bars, ts=None):
+        """
+        Replaces the buffer with a snapshot; of more than capacity bars, only
+        the newest are kept.
+        :param bars: iterable of bars, in any order
+        :param ts: float, time the snapshot was received
+        :return:
+        """
+        bars = sorted(bars, key=lambda bar: bar[0])[-self.capacity:]
+        with self.lock:
+            self._next = 0
+            self._size = 0
+            if bars:
+                n = len(bars)
+                self._data[:n] = bars
+                self._data[self.capacity:self.capacity + n] = bars
+                self._next = n % self.capacity
+                self._size = n
+            self.updates += 1
+            self.ts = ts
+
+    def last(self, n=None):
+        """
+        Returns the last n bars, oldest first.
+        :param n: int, number of bars; all buffered bars if None
+        :return: read-only np.ndarray view of shape (n, 6), see COLUMNS
+        """
+        with self.lock:
+            n = self._size if n is None else min(n, self._size)
+            end = self._next + self.capacity
+            view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def latest(self):
+        """
+        Returns the newest bar.
+        :return: read-only np.ndarray of COLUMNS, or None if empty
+        """
+        bars = self.last(1)
+        return bars[0] if len(bars) else None
+
+    def column(self, name, n=None):
+        """
+        Returns a single column of the last n bars, i.e. closing prices.
+        :param name: str, any of COLUMNS
+        :param n: int, number of bars; all buffered bars if None
+        :return: read-only np.ndarray view of shape (n,)
+        """
+        return self.last(n)[:, COLUMNS.index(name)]
+
+
+class CandleStore:
+    """
+    Candle buffers of many pairs and timeframes, created as their first
+    bars arrive.
+    """
+    def __init__(self, capacity=1000):
+        """
+        Initialize Object.
+        :param capacity: int, number of bars to keep per pair and timeframe
+        """
+        self.capacity = capacity
+        self._buffers = {}
+
+    def __contains__(self, key):
+        return key in self._buffers
+
+    def __iter__(self):
+        return iter(list(self._buffers))
+
+    def buffer(self, pair, timeframe):
+        """
+        Returns the buffer of pair and timeframe, creating it if necessary.
+        :param pair: str
+        :param timeframe: str, i.e. '1m'
+        :return: CandleBuffer obj
+        """
+        try:
+            return self._buffers[pair, timeframe]
+        except KeyError:
+            buffer = CandleBuffer(self.capacity)
+            return self._buffers.setdefault((pair, timeframe), buffer)
+
+    def update(self, pair, timeframe, bar, ts=None):
+        self.buffer(pair, timeframe).update(bar, ts)
+
+    def replace(self, pair, timeframe, bars, ts=None):
+        self.buffer(pair, timeframe).replace(bars, ts)
+
+    def get(self, pair, timeframe):
+        """
+        Returns the buffer of pair and timeframe.
+        :param pair: str
+        :param timeframe: str, i.e. '1m'
+        :return: CandleBuffer obj, or None if no bars were received
+        """
+        return self._buffers.get((pair, timeframe))
+
+    def last(self, pair, timeframe, n=None):
+        """
+        Returns the last n bars of pair and timeframe, oldest first.
+        :param pair: str
+        :param timeframe: str, i.e. '1m'
+        :param n: int, number of bars; all buffered bars if None
+        :return: read-only np.ndarray view, see CandleBuffer.last(); empty if
+                 no bars were received
+        """
+        try:
+            return self._buffers[pair, timeframe].last(n)
+        except KeyError:
+            return np.empty((0, len(COLUMNS)))
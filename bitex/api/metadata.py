@@ -0,0 +1,246 @@
+"""
+Persistent cache for exchange metadata (symbols, tick and lot sizes,
+minimum order sizes).
+
+Metadata is stored as one json file per exchange in the cache directory
+($BITEX_CACHE_DIR, or ~/.cache/bitex by default). Entries older than their
+TTL are still served, while a background thread refreshes them - only an
+exchange never fetched before requires a blocking request.
+"""
+
+# Import Built-Ins
+import logging
+import os
+import json
+import time
+import tempfile
+import threading
+
+# Import Third-Party
+import requests
+
+# Import Homebrew
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+def fetch_gdax():
+    products = requests.get('https://api.gdax.com/products', timeout=10).json()
+    return {'symbols': [p['id'] for p in products],
+            'details': {p['id']: {'tick_size': p.get('quote_increment'),
+                                  'lot_size': p.get('base_increment'),
+                                  'min_size': p.get('base_min_size')}
+                        for p in products}}
+
+
+def fetch_gemini():
+    symbols = requests.get('https://api.gemini.com/v1/symbols',
+                           timeout=10).json()
+    return {'symbols': symbols, 'details': {}}
+
+
+def fetch_poloniex():
+    r = requests.get('https://poloniex.com/public?command=returnTicker',
+                     timeout=10)
+    return {'symbols': list(r.json().keys()), 'details': {}}
+
+
+# Exchange name: function returning the exchange's metadata as dict of
+# {'symbols': [symbol, ..], 'details': {symbol: {'tick_size': .., ..}}}
+FETCHERS = {'GDAX': fetch_gdax, 'Gemini': fetch_gemini,
+            'Poloniex': fetch_poloniex}
+
+
+class MetadataCache:
+    """
+    Caches exchange metadata on disk and in memory.
+    """
+    def __init__(self, path=None, ttl=86400, fetchers=None):
+        """
+        Initialize Object.
+        :param path: str, cache directory; defaults to $BITEX_CACHE_DIR or
+                     ~/.cache/bitex
+        :param ttl: float, seconds after which entries are refreshed
+        :param fetchers: dict of exchange name: fetch function pairs, updating
+                         FETCHERS
+        """
+        self.path = path if path else os.environ.get(
+            'BITEX_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache',
+                                            'bitex'))
+        self.ttl = ttl
+        self.fetchers = dict(FETCHERS)
+        if fetchers:
+            self.fetchers.update(fetchers)
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _file(self, exchange):
+        return os.path.join(self.path, '%s.json' % exchange.lower())
+
+    def _load(self, exchange):
+        """
+        Reads an exchange's entry from disk.
+        :param exchange: str
+        :return: dict of {'ts': float, 'data': dict}, or None
+        """
+        try:
+            with open(self._file(exchange), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, exchange, entry):
+        """
+        Writes an exchange's entry to disk. The file is replaced atomically,
+        so concurrent readers in other processes never see partial writes.
+        :param exchange: str
+        :param entry: dict
+        :return:
+        """
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp, self._file(exchange))
+        except OSError:
+            log.exception("MetadataCache._store(): Could not write cache "
+                          "file for %s", exchange)
+
+    def _fetch(self, exchange):
+        """
+        Fetches an exchange's metadata and updates the cache.
+        :param exchange: str
+        :return: dict
+        """
+        data = self.fetchers[exchange]()
+        entry = {'ts': time.time(), 'data': data}
+        with self._lock:
+            self._entries[exchange] = entry
+        self._store(exchange, entry)
+        return data
+
+    def _fetch_once(self, exchange, timeout=15):
+        """
+        Fetches metadata which isn't cached yet. If several processes start
+        up at the same time, only the one creating the lock file fetches;
+        the others wait for its cache file to appear.
+        :param exchange: str
+        :param timeout: float, seconds to wait for another process' fetch
+        :return: dict
+        """
+        lock_file = self._file(exchange) + '.lock'
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            if (os.path.exists(lock_file) and
+                    time.time() - os.path.getmtime(lock_file) > timeout):
+                # Left behind by a process which died while fetching
+                os.remove(lock_file)
+            os.close(os.open(lock_file, os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            deadline = time.time() + timeout
+            while time.time() < deadline:
+                entry = self._load(exchange)
+                if entry is not None:
+                    with self._lock:
+                        self._entries.setdefault(exchange, entry)
+                    return entry['data']
+                time.sleep(0.1)
+            return self._fetch(exchange)
+        except OSError:
+            return self._fetch(exchange)
+
+        try:
+            return self._fetch(exchange)
+        finally:
+            try:
+                os.remove(lock_file)
+            except OSError:
+                pass
+
+    def _refresh(self, exchange):
+        try:
+            # Another process may have refreshed the cache file already
+            entry = self._load(exchange)
+            if entry is not None and time.time() - entry['ts'] <= self.ttl:
+                with self._lock:
+                    self._entries[exchange] = entry
+                return
+            self._fetch(exchange)
+        except Exception:
+            log.exception("MetadataCache._refresh(): Refreshing metadata for "
+                          "%s failed - serving cached data", exchange)
+        finally:
+            with self._lock:
+                self._refreshing.discard(exchange)
+
+    def refresh(self, exchange):
+        """
+        Refreshes an exchange's metadata in a background thread, unless a
+        refresh is running already.
+        :param exchange: str
+        :return:
+        """
+        with self._lock:
+            if exchange in self._refreshing:
+                return
+            self._refreshing.add(exchange)
+        threading.Thread(target=self._refresh, args=(exchange,), daemon=True,
+                         name='%s Metadata Refresh Thread' % exchange).start()
+
+    def get(self, exchange):
+        """
+        Returns an exchange's metadata. Stale entries are returned as they
+        are and refreshed in the background; if there is no entry at all,
+        it is fetched synchronously.
+        :param exchange: str
+        :return: dict of {'symbols': list, 'details': dict}
+        """
+        with self._lock:
+            entry = self._entries.get(exchange)
+        if entry is None:
+            entry = self._load(exchange)
+            if entry is None:
+                return self._fetch_once(exchange)
+            with self._lock:
+                self._entries.setdefault(exchange, entry)
+
+        if time.time() - entry['ts'] > self.ttl:
+            self.refresh(exchange)
+        return entry['data']
+
+    def symbols(self, exchange):
+        """
+        Returns the list of symbols traded at an exchange.
+        :param exchange: str
+        :return: list
+        """
+        return self.get(exchange)['symbols']
+
+    def details(self, exchange, symbol):
+        """
+        Returns tick size, lot size and minimum order size of a symbol, if
+        the exchange provides them.
+        :param exchange: str
+        :param symbol: str
+        :return: dict
+        """
+        return self.get(exchange)['details'].get(symbol, {})
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_cache():
+    """
+    Returns the module-wide MetadataCache, creating it on first use.
+    :return: MetadataCache obj
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = MetadataCache()
+        return _shared_cache
@@ -0,0 +1,485 @@
+"""
+Polling Facilities for exchanges without a websocket API.
+
+A PollScheduler runs (exchange, method, pair, interval) subscriptions on a
+shared worker pool; RESTPoller objects register their subscriptions with it
+and put results on their data_q, in the same (channel, pair, data, ts) shape
+as the WSSAPI clients.
+"""
+
+# Import Built-Ins
+import logging
+import time
+import heapq
+import random
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Import Third-Party
+import requests
+
+# Import Homebrew
+from bitex.api.WSS.base import WSSAPI
+from bitex.api.batch import RequestBatcher
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+# Maximum number of requests per second we allow ourselves to send to each
+# exchange's public API; exchanges not listed here use DEFAULT_RATE_LIMIT.
+RATE_LIMITS = {'Bitfinex': 1, 'Bitstamp': 1, 'Bittrex': 1, 'Bter': 1,
+               'CCEX': 1, 'Coincheck': 1, 'Cryptopia': 1, 'GDAX': 3,
+               'Gemini': 2, 'HitBtc': 2, 'ItBit': 1, 'Kraken': 1,
+               'OKCoin': 2, 'Poloniex': 6, 'QuadrigaCX': 1, 'Quoine': 1,
+               'RockTradingLtd': 1, 'Vaultoro': 1, 'Yunbi': 1}
+DEFAULT_RATE_LIMIT = 1
+
+
+def _check_response(r):
+    """
+    Raises an HTTPError for error responses, and for responses the
+    interface's formatter couldn't parse (i.e. error payloads sent with
+    status 200), so they count as failed polls instead of data.
+    :param r: APIResponse obj
+    :return:
+    """
+    if r.status_code >= 400:
+        raise requests.HTTPError("HTTP %s for %s" %
+                                 (r.status_code, getattr(r, 'url', None)),
+                                 response=r)
+    if getattr(r, 'format_failed', False):
+        raise requests.HTTPError("Unexpected payload from %s" %
+                                 getattr(r, 'url', None), response=r)
+
+
+class PollSubscription:
+    """
+    A single polled endpoint. Keeps track of the last data seen and adapts
+    its polling interval to how often that data actually changes: every
+    unchanged poll stretches the interval by `backoff`, up to `max_interval`;
+    a change resets it to the requested base interval.
+    """
+    def __init__(self, exchange, method, pair, interval, callback,
+                 max_interval=None, backoff=1.5, **kwargs):
+        """
+        Initialize Object.
+        :param exchange: bitex.interfaces obj
+        :param method: str, name of the interface method to call (i.e. 'ticker')
+        :param pair: str, pair to request data for
+        :param interval: float, base polling interval in seconds
+        :param callback: callable, called with (method, pair, data, ts)
+                         whenever the polled data changed
+        :param max_interval: float, upper bound for the adapted interval;
+                             defaults to 8 times the base interval
+        :param backoff: float, factor to stretch the interval by per
+                        unchanged poll
+        :param kwargs: Keyword arguments passed to the interface method
+        """
+        self.exchange = exchange
+        self.exchange_name = type(exchange).__name__
+        self.method = method
+        self.pair = pair
+        self.base_interval = interval
+        self.interval = interval
+        self.max_interval = max_interval if max_interval else interval * 8
+        self.backoff = backoff
+        self.callback = callback
+        self.kwargs = kwargs
+
+        self.last_data = None
+        self.generation = 0  # Invalidates stale scheduler entries on re-adds
+        self.polls = 0
+        self.changes = 0
+        self.errors = 0
+        self.active = True
+
+    @property
+    def key(self):
+        return self.exchange_name, self.method, self.pair
+
+    def adapt(self, changed):
+        """
+        Adjusts the polling interval after a poll.
+        :param changed: bool, whether or not the polled data changed
+        :return:
+        """
+        if changed:
+            self.interval = self.base_interval
+        else:
+            self.interval = min(self.interval * self.backoff,
+                                self.max_interval)
+
+    def fetch(self):
+        """
+        Calls the interface method and returns its data - the formatted
+        data if a formatter is available, the json body otherwise.
+        :return: tuple of (APIResponse, data)
+        """
+        r = getattr(self.exchange, self.method)(self.pair, **self.kwargs)
+        if r.status_code == 429:
+            return r, None
+        _check_response(r)
+        data = r.formatted if r.formatted is not None else r.json()
+        return r, data
+
+    def update(self, data, ts):
+        """
+        Stores data and calls the callback if it differs from what we've
+        seen before.
+        :param data: polled data
+        :param ts: timestamp, declares when data was received by the client
+        :return: bool, whether or not the data changed
+        """
+        self.polls += 1
+        changed = data != self.last_data
+        if changed:
+            self.changes += 1
+            self.last_data = data
+            self.callback(self.method, self.pair, data, ts)
+        self.adapt(changed)
+        return changed
+
+
+class BatchPollSubscription(PollSubscription):
+    """
+    Polls a method for many pairs of an exchange at once, using the
+    exchange's multi-pair endpoint via a RequestBatcher. Changes are
+    reported per pair; the interval adapts to changes of any pair.
+    """
+    def __init__(self, batcher, method, interval, callback, **kwargs):
+        """
+        Initialize Object.
+        :param batcher: bitex.api.batch.RequestBatcher obj
+        :param method: str, name of the interface method to call (i.e. 'ticker')
+        :param interval: float, base polling interval in seconds
+        :param callback: callable, called with (method, pair, data, ts)
+                         for every pair whose data changed
+        :param kwargs: Keyword arguments for PollSubscription
+        """
+        super(BatchPollSubscription, self).__init__(batcher.exchange, method,
+                                                    None, interval, callback,
+                                                    **kwargs)
+        self.batcher = batcher
+        self.pairs = []
+        self.last_data = {}
+
+    def fetch(self):
+        r, data = self.batcher.fetch(self.method, self.pairs, **self.kwargs)
+        if r is not None and r.status_code == 429:
+            return r, None
+        if r is not None:
+            _check_response(r)
+        return r, data
+
+    def update(self, data, ts):
+        self.polls += 1
+        changed = False
+        for pair, pair_data in data.items():
+            if pair_data is None:
+                # Missing from the response
+                continue
+            if pair_data != self.last_data.get(pair):
+                changed = True
+                self.last_data[pair] = pair_data
+                self.callback(self.method, pair, pair_data, ts)
+        if changed:
+            self.changes += 1
+        self.adapt(changed)
+        return changed
+
+
+class PollScheduler:
+    """
+    Schedules PollSubscriptions on a shared worker pool. Due times are
+    jittered to avoid bursts of synchronized requests, and requests to the
+    same exchange are spaced according to its rate limit. If an exchange
+    answers with HTTP 429, all of its subscriptions are held back for the
+    period given in the Retry-After header (or 10 seconds, if absent).
+    """
+    def __init__(self, workers=8, jitter=0.1, rate_limits=None):
+        """
+        Initialize Object.
+        :param workers: int, number of threads in the worker pool
+        :param jitter: float, max. relative deviation applied to intervals
+        :param rate_limits: dict of exchange name: requests per second pairs,
+                            updating RATE_LIMITS
+        """
+        self.workers = workers
+        self.jitter = jitter
+        self.rate_limits = dict(RATE_LIMITS)
+        if rate_limits:
+            self.rate_limits.update(rate_limits)
+
+        self.running = False
+        self._pool = None
+        self._thread = None
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._next_slot = {}  # exchange name: earliest ts for next request
+
+    def _jittered(self, interval):
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _push(self, due, sub, generation):
+        heapq.heappush(self._heap, (due, next(self._seq), sub, generation))
+        self._cond.notify()
+
+    def add(self, sub, delay=0):
+        """
+        Schedules a subscription.
+        :param sub: PollSubscription obj
+        :param delay: float, seconds to wait before polling it for the first time
+        :return:
+        """
+        with self._cond:
+            sub.active = True
+            sub.generation += 1
+            self._push(time.time() + self._jittered(delay), sub,
+                       sub.generation)
+
+    def remove(self, sub):
+        """
+        Unschedules a subscription; it is dropped the next time it comes due.
+        :param sub: PollSubscription obj
+        :return:
+        """
+        sub.active = False
+
+    def start(self):
+        """
+        Starts the scheduler thread and worker pool, if they aren't running yet.
+        :return:
+        """
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name='Poll Scheduler Thread')
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops the scheduler thread and waits for running polls to finish.
+        :return:
+        """
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join()
+        if self._pool:
+            self._pool.shutdown(wait=True)
+        self._thread = None
+        self._pool = None
+
+    def _acquire_slot(self, name, now):
+        """
+        Claims the request slot for the given exchange, if it's free.
+        :param name: str, exchange name
+        :param now: float, current timestamp
+        :return: float, timestamp at which the slot frees up if it's taken,
+                 None if it was claimed successfully.
+        """
+        next_slot = self._next_slot.get(name, now)
+        if next_slot > now:
+            return next_slot
+        rate_limit = self.rate_limits.get(name, DEFAULT_RATE_LIMIT)
+        self._next_slot[name] = now + 1 / rate_limit
+        return None
+
+    def _run(self):
+        """
+        Scheduler loop; pops due subscriptions off the heap and submits them
+        to the worker pool.
+        :return:
+        """
+        with self._cond:
+            while self.running:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, sub, generation = self._heap[0]
+                now = time.time()
+                if due > now:
+                    self._cond.wait(due - now)
+                    continue
+                heapq.heappop(self._heap)
+                if not sub.active or generation != sub.generation:
+                    continue
+                slot = self._acquire_slot(sub.exchange_name, now)
+                if slot is not None:
+                    # Rate limited - come back when it's our turn
+                    self._push(slot, sub, generation)
+                    continue
+                self._pool.submit(self._poll, sub, generation)
+
+    def _poll(self, sub, generation):
+        """
+        Polls a subscription in a worker thread and reschedules it.
+        :param sub: PollSubscription obj
+        :param generation: int, sub.generation at the time it was scheduled
+        :return:
+        """
+        try:
+            r, data = sub.fetch()
+        except requests.HTTPError as e:
+            log.warning("PollScheduler._poll(): Error polling %s: %s",
+                        sub.key, e)
+            sub.errors += 1
+            sub.adapt(False)
+            delay = sub.interval
+        except Exception:
+            log.exception("PollScheduler._poll(): Error polling %s", sub.key)
+            sub.errors += 1
+            sub.adapt(False)
+            delay = sub.interval
+        else:
+            if r.status_code == 429:
+                retry_after = float(r.headers.get('Retry-After', 10))
+                log.warning("PollScheduler._poll(): %s is rate limiting us - "
+                            "holding back requests for %ss", sub.exchange_name,
+                            retry_after)
+                with self._cond:
+                    self._next_slot[sub.exchange_name] = (time.time() +
+                                                          retry_after)
+                delay = retry_after
+            else:
+                sub.update(data, time.time())
+                delay = sub.interval
+
+        with self._cond:
+            if self.running and sub.active and generation == sub.generation:
+                self._push(time.time() + self._jittered(delay), sub,
+                           generation)
+
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def shared_scheduler():
+    """
+    Returns the module-wide PollScheduler, creating it on first use.
+    :return: PollScheduler obj
+    """
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = PollScheduler()
+        return _shared_scheduler
+
+
+class RESTPoller(WSSAPI):
+    """
+    Polls an exchange's REST interface and emits changes on data_q, like the
+    websocket clients do - entries are tuples of (channel, pair, data, ts),
+    where channel is the polled interface method (i.e. 'ticker', 'order_book'
+    or 'trades').
+
+    All RESTPoller instances share a single PollScheduler by default, which
+    keeps the number of threads constant regardless of how many exchanges
+    and pairs are polled.
+
+    If batch is True, subscriptions to methods for which the exchange offers
+    a multi-pair endpoint are polled together with a single request.
+    """
+    def __init__(self, exchange, scheduler=None, batch=False, maxsize=0,
+                 overflow='block', conflate=None):
+        """
+        Initialize Object.
+        :param exchange: bitex.interfaces obj
+        :param scheduler: PollScheduler obj; uses the shared scheduler if None
+        :param batch: bool, poll pairs in multi-pair requests where possible
+        :param maxsize: int, maximum number of items on the data_q
+        :param overflow: str, data_q overflow policy (see WSSAPI)
+        :param conflate: list of channel names to conflate (see WSSAPI)
+        """
+        super(RESTPoller, self).__init__(exchange.uri, type(exchange).__name__,
+                                         maxsize, overflow, conflate)
+        self.exchange = exchange
+        self.scheduler = scheduler if scheduler else shared_scheduler()
+        self.batcher = RequestBatcher(exchange) if batch else None
+        self.subscriptions = {}
+        self._batches = {}  # (method name, kwargs): BatchPollSubscription
+
+    def subscribe(self, method, pair, interval=5, **kwargs):
+        """
+        Polls the given interface method for the given pair every `interval`
+        seconds (adapted to how often the data changes).
+        :param method: str, name of the interface method (i.e. 'ticker')
+        :param pair: str, pair to request data for
+        :param interval: float, base polling interval in seconds
+        :param kwargs: Keyword arguments for PollSubscription; batched pairs
+                       share a request only if their kwargs are equal
+        :return: PollSubscription obj
+        """
+        if (method, pair) in self.subscriptions:
+            raise ValueError("Already polling %s for %s!" % (method, pair))
+
+        if self.batcher and self.batcher.supports(method):
+            key = method, tuple(sorted((k, repr(v))
+                                       for k, v in kwargs.items()))
+            sub = self._batches.get(key)
+            if sub is None:
+                sub = BatchPollSubscription(self.batcher, method, interval,
+                                            self._handle_poll, **kwargs)
+                self._batches[key] = sub
+                if self.running:
+                    self.scheduler.add(sub)
+            else:
+                sub.base_interval = min(sub.base_interval, interval)
+                sub.interval = min(sub.interval, interval)
+            sub.pairs.append(pair)
+            self.subscriptions[(method, pair)] = sub
+            return sub
+
+        sub = PollSubscription(self.exchange, method, pair, interval,
+                               self._handle_poll, **kwargs)
+        self.subscriptions[(method, pair)] = sub
+        if self.running:
+            self.scheduler.add(sub)
+        return sub
+
+    def unsubscribe(self, method, pair):
+        """
+        Stops polling the given method for the given pair.
+        :param method: str
+        :param pair: str
+        :return:
+        """
+        sub = self.subscriptions.pop((method, pair))
+        if isinstance(sub, BatchPollSubscription):
+            sub.pairs.remove(pair)
+            sub.last_data.pop(pair, None)
+            if sub.pairs:
+                return
+            self._batches = {key: batch for key, batch
+                             in self._batches.items() if batch is not sub}
+        self.scheduler.remove(sub)
+
+    def start(self):
+        super(RESTPoller, self).start()
+        self.scheduler.start()
+        for sub in set(self.subscriptions.values()):
+            self.scheduler.add(sub)
+
+    def stop(self):
+        super(RESTPoller, self).stop()
+        for sub in set(self.subscriptions.values()):
+            self.scheduler.remove(sub)
+
+    def _handle_poll(self, method, pair, data, ts):
+        """
+        Callback for PollSubscriptions; publishes changed data.
+        :param method: str, polled interface method
+        :param pair: str
+        :param data: formatted data
+        :param ts: timestamp, declares when data was received by the client
+        :return:
+        """
+        self.publish((method, pair, data, ts))
@@ -0,0 +1,207 @@
+"""
+Cross-exchange spread scanner.
+
+Keeps the latest bid and ask of every (exchange, pair) in NumPy arrays and
+finds all crossed markets in a single vectorized pass. Requires numpy
+(pip install BitEx[numpy]).
+"""
+
+# Import Built-Ins
+import logging
+import threading
+from collections import namedtuple
+
+# Import Third-Party
+import numpy as np
+
+# Import Homebrew
+from bitex.api.WSS.events import Ticker
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+Opportunity = namedtuple('Opportunity', ['pair', 'buy_exchange', 'ask',
+                                         'sell_exchange', 'bid', 'edge'])
+Opportunity.__doc__ = """
+Buy pair at buy_exchange for ask, sell it at sell_exchange for bid; edge is
+the relative, fee-adjusted profit of doing so.
+"""
+
+
+class SpreadScanner:
+    """
+    Scans the latest quotes of many exchanges for crossed markets.
+
+    Quotes are stored in (exchange x pair) arrays. On every scan, bids and
+    asks are adjusted for each exchange's taker fee and all exchange pairs
+    are compared at once, via broadcasting to an (exchange x exchange x pair)
+    array of edges:
+
+        edge = (bid * (1 - fee_sell) - ask * (1 + fee_buy)) / (ask * (1 + fee_buy))
+
+    Pairs must be named identically across exchanges for their quotes to be
+    compared.
+    """
+    def __init__(self, exchanges=None, pairs=None, fees=None, threshold=0.0,
+                 callback=None):
+        """
+        Initialize Object.
+        :param exchanges: list of exchange names to allocate rows for
+        :param pairs: list of pair names to allocate columns for
+        :param fees: dict of exchange name: taker fee pairs, as fraction
+        :param threshold: float, minimum edge of reported opportunities
+        :param callback: callable, called with a list of Opportunity tuples
+                         whenever process() finds any
+        """
+        self.threshold = threshold
+        self.callback = callback
+        self._fees = dict(fees) if fees else {}
+        self._exchanges = {}
+        self._pairs = {}
+        self._bids = np.full((0, 0), np.nan)
+        self._asks = np.full((0, 0), np.nan)
+        self._fee_vector = np.zeros(0)
+        self._lock = threading.Lock()
+        for exchange in exchanges or []:
+            self._index(self._exchanges, exchange)
+        for pair in pairs or []:
+            self._index(self._pairs, pair)
+        self._resize()
+
+    @property
+    def exchanges(self):
+        return list(self._exchanges)
+
+    @property
+    def pairs(self):
+        return list(self._pairs)
+
+    @staticmethod
+    def _index(names, name):
+        try:
+            return names[name]
+        except KeyError:
+            names[name] = len(names)
+            return names[name]
+
+    def _resize(self):
+        """
+        Grows the quote arrays to fit all known exchanges and pairs. Capacity
+        is doubled, so repeatedly adding rows and columns is cheap.
+        :return:
+        """
+        rows, cols = self._bids.shape
+        n_ex, n_pairs = len(self._exchanges), len(self._pairs)
+        if n_ex <= rows and n_pairs <= cols:
+            return
+        shape = (max(n_ex, rows * 2, 1), max(n_pairs, cols * 2, 1))
+        for attr in ('_bids', '_asks'):
+            grown = np.full(shape, np.nan)
+            grown[:rows, :cols] = getattr(self, attr)
+            setattr(self, attr, grown)
+        self._update_fees(shape[0])
+
+    def _update_fees(self, rows=None):
+        rows = rows if rows else self._bids.shape[0]
+        self._fee_vector = np.zeros(rows)
+        for exchange, fee in self._fees.items():
+            if exchange in self._exchanges:
+                self._fee_vector[self._exchanges[exchange]] = fee
+
+    def set_fee(self, exchange, fee):
+        """
+        Sets the taker fee of an exchange.
+        :param exchange: str
+        :param fee: float, fraction of notional (i.e. 0.002 for 0.2%)
+        :return:
+        """
+        with self._lock:
+            self._fees[exchange] = fee
+            self._update_fees()
+
+    def update(self, exchange, pair, bid, ask):
+        """
+        Stores the latest bid and ask of pair at exchange.
+        :param exchange: str
+        :param pair: str
+        :param bid: float or str; None marks the quote as unavailable
+        :param ask: float or str; None marks the quote as unavailable
+        :return:
+        """
+        with self._lock:
+            self._update(exchange, pair, bid, ask)
+
+    def _update(self, exchange, pair, bid, ask):
+        i = self._index(self._exchanges, exchange)
+        j = self._index(self._pairs, pair)
+        self._resize()
+        self._bids[i, j] = np.nan if bid is None else float(bid)
+        self._asks[i, j] = np.nan if ask is None else float(ask)
+
+    def scan(self, threshold=None):
+        """
+        Finds all crossed markets whose fee-adjusted edge exceeds threshold.
+        :param threshold: float, defaults to self.threshold
+        :return: list of Opportunity tuples, largest edge first
+        """
+        threshold = self.threshold if threshold is None else threshold
+        with self._lock:
+            n_ex, n_pairs = len(self._exchanges), len(self._pairs)
+            bids = self._bids[:n_ex, :n_pairs].copy()
+            asks = self._asks[:n_ex, :n_pairs].copy()
+            fees = self._fee_vector[:n_ex, None]
+            exchanges, pairs = self.exchanges, self.pairs
+
+        adj_bids = bids * (1 - fees)
+        adj_asks = asks * (1 + fees)
+
+        # edges[sell, buy, pair]
+        with np.errstate(invalid='ignore'):
+            edges = ((adj_bids[:, None, :] - adj_asks[None, :, :]) /
+                     adj_asks[None, :, :])
+            sell, buy, pair = np.nonzero(edges > threshold)
+
+        opportunities = [Opportunity(pairs[p], exchanges[b], float(asks[b, p]),
+                                     exchanges[s], float(bids[s, p]),
+                                     float(edges[s, b, p]))
+                         for s, b, p in zip(sell, buy, pair) if s != b]
+        opportunities.sort(key=lambda o: o.edge, reverse=True)
+        return opportunities
+
+    def process(self, exchange, items):
+        """
+        Applies a batch of ticker updates and scans for opportunities.
+        Accepted items are:
+            - Ticker events of websocket clients with normalization enabled
+              (see WSSAPI.normalize()); these name their exchange and
+              canonical symbol themselves
+            - RESTPoller entries (channel, pair, data, ts), where data is a
+              standardized ticker tuple (bid, ask, ...)
+        Other items, including websocket data in a client's own format, are
+        ignored.
+
+        Calls self.callback with the opportunities found, if any.
+        :param exchange: str, name of the exchange RESTPoller items came from
+        :param items: iterable of data_q entries
+        :return: list of Opportunity tuples
+        """
+        with self._lock:
+            for item in items:
+                if isinstance(item, Ticker):
+                    if item.bid is not None and item.ask is not None:
+                        self._update(item.exchange, item.symbol, item.bid,
+                                     item.ask)
+                    continue
+                if isinstance(item, tuple) and hasattr(item, '_fields'):
+                    # Other normalized events
+                    continue
+                channel, pair, data, *_ = item
+                if (channel == 'ticker' and isinstance(data, (tuple, list))
+                        and len(data) > 1 and
+                        not isinstance(data[0], (tuple, list, dict))):
+                    self._update(exchange, pair, data[0], data[1])
+        opportunities = self.scan()
+        if opportunities and self.callback:
+            self.callback(opportunities)
+        return opportunities
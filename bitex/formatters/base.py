@@ -43,7 +43,30 @@ class Formatter:
         return data
 
     @staticmethod
-    def order_book(data, *args, **kwargs):
+    def truncate_book(data, depth, bids='bids', asks='asks'):
+        """
+        Limits an order book to its best `depth` levels per side. Used for
+        exchanges which do not support limiting the depth of their order book
+        endpoint natively: their interfaces accept depth anyway, and pass it
+        on to the formatter, which truncates the book. Lists of quotes are
+        sliced before anything else is done with them, so no time is spent
+        on levels nobody asked for.
+        :param data: dict, order book as returned by the exchange
+        :param depth: int, number of levels to keep; keeps all if None
+        :param bids: str, key of the bids in data
+        :param asks: str, key of the asks in data
+        :return: dict
+        """
+        if not depth:
+            return data
+        data = dict(data)
+        for side in (bids, asks):
+            if side in data:
+                data[side] = data[side][:depth]
+        return data
+
+    @staticmethod
+    def order_book(data, *args, depth=None, **kwargs):
         """
         Returns dict of lists of lists of quotes in format [ts, price, size]
         ex.:
@@ -55,10 +78,11 @@ class Formatter:
                       ['1480941678', '0.017', '23']]}
         :param data: requests.response() obj
         :param args:
+        :param depth: int, number of levels to limit each side of the book to
         :param kwargs:
         :return: dict
         """
-        return data
+        return Formatter.truncate_book(data, depth)
 
     @staticmethod
     def trades(data, *args, **kwargs):
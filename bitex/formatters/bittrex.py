@@ -25,9 +25,12 @@ class BtrxFormatter(Formatter):
             return False
 
     @staticmethod
-    def order_book(data, *args, **kwargs):
+    def order_book(data, *args, depth=None, **kwargs):
         if data['success']:
-            return data['result']
+            if isinstance(data['result'], dict):
+                return BtrxFormatter.truncate_book(data['result'], depth,
+                                                   'buy', 'sell')
+            return data['result'][:depth] if depth else data['result']
         else:
             return None
 
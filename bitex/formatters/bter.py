@@ -12,4 +12,12 @@ log = logging.getLogger(__name__)
 
 class BterFormatter(Formatter):
 
-    pass
\ No newline at end of file
+    @staticmethod
+    def order_book(data, *args, depth=None, **kwargs):
+        if not depth:
+            return data
+        # Bter lists asks in descending order; the best asks are at the end
+        data = dict(data)
+        data['bids'] = data['bids'][:depth]
+        data['asks'] = data['asks'][-depth:]
+        return data
@@ -14,7 +14,7 @@ class PlnxFormatter(Formatter):
 
     @staticmethod
     def ticker(data, *args, **kwargs):
-        data = data[args[0]]
+        data = data[args[1]]
         return (data['highestBid'], data['lowestAsk'], None, None, None, None,
                 data['last'], None, None)
 
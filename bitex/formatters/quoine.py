@@ -18,6 +18,11 @@ class QoinFormatter(Formatter):
                 data['low_market_bid'], None, None, data['last_traded_price'],
                 data['volume_24h'], None)
 
+    @staticmethod
+    def order_book(data, *args, depth=None, **kwargs):
+        return QoinFormatter.truncate_book(data, depth, 'buy_price_levels',
+                                           'sell_price_levels')
+
     @staticmethod
     def order(data, *args, **kwargs):
         return data
@@ -12,4 +12,12 @@ log = logging.getLogger(__name__)
 
 class VaultoroFormatter(Formatter):
 
-    pass
+    @staticmethod
+    def order_book(data, *args, depth=None, **kwargs):
+        if not depth:
+            return data
+        # Bids and asks are listed as {'b': [...]} and {'s': [...]} in 'data'
+        data = dict(data)
+        data['data'] = [{side: quotes[:depth] for side, quotes in d.items()}
+                        for d in data['data']]
+        return data
@@ -1,19 +1,29 @@
-from bitex.interfaces.bitfinex import Bitfinex
-from bitex.interfaces.bitstamp import Bitstamp
-from bitex.interfaces.bittrex import Bittrex
-from bitex.interfaces.ccex import CCEX
-from bitex.interfaces.coincheck import Coincheck
-from bitex.interfaces.cryptopia import Cryptopia
-from bitex.interfaces.gemini import Gemini
-from bitex.interfaces.itbit import ItBit
-from bitex.interfaces.kraken import Kraken
-from bitex.interfaces.okcoin import OKCoin
-from bitex.interfaces.rocktrading import RockTradingLtd
-from bitex.interfaces.yunbi import Yunbi
-from bitex.interfaces.poloniex import Poloniex
-from bitex.interfaces.quoine import Quoine
-from bitex.interfaces.quadriga import QuadrigaCX
-from bitex.interfaces.gdax import GDAX
-from bitex.interfaces.vaultoro import Vaultoro
-from bitex.interfaces.hitbtc import HitBtc
-from bitex.interfaces.bter import Bter
+# Import Homebrew
+from bitex._lazy import lazy_module
+
+# Interfaces import their websocket client only when created with
+# websocket=True, which keeps the websocket libraries out of REST-only use.
+_EXPORTS = {'Bitfinex': 'bitex.interfaces.bitfinex',
+            'Bitstamp': 'bitex.interfaces.bitstamp',
+            'Bittrex': 'bitex.interfaces.bittrex',
+            'CCEX': 'bitex.interfaces.ccex',
+            'Coincheck': 'bitex.interfaces.coincheck',
+            'Cryptopia': 'bitex.interfaces.cryptopia',
+            'Gemini': 'bitex.interfaces.gemini',
+            'ItBit': 'bitex.interfaces.itbit',
+            'Kraken': 'bitex.interfaces.kraken',
+            'OKCoin': 'bitex.interfaces.okcoin',
+            'RockTradingLtd': 'bitex.interfaces.rocktrading',
+            'Yunbi': 'bitex.interfaces.yunbi',
+            'Poloniex': 'bitex.interfaces.poloniex',
+            'Quoine': 'bitex.interfaces.quoine',
+            'QuadrigaCX': 'bitex.interfaces.quadriga',
+            'GDAX': 'bitex.interfaces.gdax',
+            'Vaultoro': 'bitex.interfaces.vaultoro',
+            'HitBtc': 'bitex.interfaces.hitbtc',
+            'Bter': 'bitex.interfaces.bter'}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_module(__name__, _EXPORTS)
+
@@ -9,7 +9,6 @@ import logging
 
 # Import Homebrew
 from bitex.api.REST import BitfinexREST
-from bitex.api.WSS.bitfinex import BitfinexWSS
 from bitex.utils import return_api_response
 from bitex.formatters.bitfinex import BtfxFormatter as fmt
 # Init Logging Facilities
@@ -22,6 +21,7 @@ class Bitfinex(BitfinexREST):
         if key_file:
             self.load_key(key_file)
         if websocket:
+            from bitex.api.WSS.bitfinex import BitfinexWSS
             self.wss = BitfinexWSS()
             self.wss.start()
         else:
@@ -37,7 +37,9 @@ class Bitfinex(BitfinexREST):
     BitEx Standardized Methods
     """
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
+        if depth:
+            kwargs['limit_bids'] = kwargs['limit_asks'] = depth
         return self.public_query('book/%s' % pair, params=kwargs)
 
     @return_api_response(fmt.ticker)
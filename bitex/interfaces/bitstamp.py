@@ -9,7 +9,6 @@ import logging
 
 # Import Homebrew
 from bitex.api.REST import BitstampREST
-from bitex.api.WSS.bitstamp import BitstampWSS
 from bitex.utils import return_api_response
 from bitex.formatters.bitstamp import BtstFormatter as fmt
 
@@ -24,6 +23,7 @@ class Bitstamp(BitstampREST):
             self.load_key(key_file)
 
         if websocket:
+            from bitex.api.WSS.bitstamp import BitstampWSS
             self.wss = BitstampWSS()
             self.wss.start()
         else:
@@ -44,7 +44,7 @@ class Bitstamp(BitstampREST):
         return self.public_query('v2/ticker/%s/' % pair, params=kwargs)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
         return self.public_query('v2/order_book/%s' % pair, params=kwargs)
 
     @return_api_response(fmt.trades)
@@ -38,8 +38,10 @@ class Bittrex(BittrexREST):
         return self.public_query('getmarketsummary', params=q)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, side='both', **kwargs):
+    def order_book(self, pair, side='both', *, depth=None, **kwargs):
         q = {'market': pair, 'type': side}
+        if depth:
+            q['depth'] = depth
         q.update(kwargs)
         return self.public_query('getorderbook', params=q)
 
@@ -36,7 +36,7 @@ class Bter(BterREST):
     """
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
         return self.public_query('depth/%s' % pair, params=kwargs)
 
     @return_api_response(fmt.ticker)
@@ -38,8 +38,10 @@ class CCEX(CCEXRest):
         return self.public_query('%s.json' % pair, params=kwargs)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, type='both', **kwargs):
+    def order_book(self, pair, type='both', *, depth=None, **kwargs):
         q = {'market': pair, 'type': type}
+        if depth:
+            q['depth'] = depth
         q.update(kwargs)
         return self.public_query('getorderbook', params=q)
 
@@ -45,10 +45,10 @@ class Coincheck(CoincheckREST):
         return self.public_query('trades', params=q)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
         q = {'pair': pair}
         q.update(kwargs)
-        return self.public_query('order_books', params={'pair': pair})
+        return self.public_query('order_books', params=q)
 
     @return_api_response(fmt.order)
     def bid(self, pair, price, size, **kwargs):
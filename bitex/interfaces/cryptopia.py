@@ -40,8 +40,10 @@ class Cryptopia(CryptopiaREST):
         return self.public_query(endpoint, params=kwargs)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, *args, **kwargs):
+    def order_book(self, pair, *args, depth=None, **kwargs):
         endpoint = 'GetMarketOrders/%s' % pair
+        if depth:
+            args = (str(depth),) + args
         for k in args:
             endpoint += '/' + k
         return self.public_query(endpoint, params=kwargs)
@@ -9,7 +9,6 @@ import logging
 
 # Import Homebrew
 from bitex.api.REST import GDAXRest
-from bitex.api.WSS.gdax import GDAXWSS
 from bitex.utils import return_api_response
 from bitex.formatters.gdax import GdaxFormatter as fmt
 
@@ -23,6 +22,7 @@ class GDAX(GDAXRest):
         if key_file:
             self.load_key(key_file)
         if websocket:
+            from bitex.api.WSS.gdax import GDAXWSS
             self.wss = GDAXWSS()
             self.wss.start()
         else:
@@ -43,7 +43,11 @@ class GDAX(GDAXRest):
         return self.public_query('products/%s/ticker' % pair, params=kwargs)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
+        # Level 1 returns the best bid and ask only, level 2 the best 50
+        # levels per side; the formatter truncates the latter to depth.
+        if depth:
+            kwargs['level'] = 1 if depth == 1 else 2
         return self.public_query('products/%s/book' % pair, params=kwargs)
 
     @return_api_response(fmt.trades)
@@ -9,7 +9,6 @@ import logging
 
 # Import Homebrew
 from bitex.api.REST import GeminiREST
-from bitex.api.WSS.gemini import GeminiWSS
 from bitex.utils import return_api_response
 from bitex.formatters.gemini import GmniFormatter as fmt
 
@@ -23,6 +22,7 @@ class Gemini(GeminiREST):
         if key_file:
             self.load_key(key_file)
         if websocket:
+            from bitex.api.WSS.gemini import GeminiWSS
             self.wss = GeminiWSS()
             self.wss.start()
         else:
@@ -43,7 +43,9 @@ class Gemini(GeminiREST):
         return self.public_query('pubticker/%s' % pair, params=kwargs)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
+        if depth:
+            kwargs['limit_bids'] = kwargs['limit_asks'] = depth
         return self.public_query('book/%s' % pair, params=kwargs)
 
     @return_api_response(fmt.trades)
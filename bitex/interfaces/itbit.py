@@ -39,7 +39,7 @@ class ItBit(ItbitREST):
         return self.public_query('%s/ticker' % pair, params=q)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
         q = {'pair': pair}
         q.update(kwargs)
         return self.public_query('%s/order_book' % pair, params=q)
@@ -44,7 +44,9 @@ class Kraken(KrakenREST):
         return self.public_query('Ticker', params=q)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
+        if depth:
+            kwargs['count'] = depth
         q = self.make_params(pair, **kwargs)
         return self.public_query('Depth', params=q)
 
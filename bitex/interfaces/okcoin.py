@@ -38,8 +38,10 @@ class OKCoin(OKCoinREST):
         return self.public_query('ticker.do', params=q)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
         q = {'pair': pair}
+        if depth:
+            q['size'] = depth
         q.update(kwargs)
         return self.public_query('depth.do', params=q)
 
@@ -9,7 +9,6 @@ import logging
 
 # Import Homebrew
 from bitex.api.REST import PoloniexREST
-from bitex.api.WSS.poloniex import PoloniexWSS
 from bitex.utils import return_api_response
 from bitex.formatters.poloniex import PlnxFormatter as fmt
 # Init Logging Facilities
@@ -22,6 +21,7 @@ class Poloniex(PoloniexREST):
         if key_file:
             self.load_key(key_file)
         if websocket:
+            from bitex.api.WSS.poloniex import PoloniexWSS
             self.wss = PoloniexWSS()
             self.wss.start()
         else:
@@ -43,8 +43,10 @@ class Poloniex(PoloniexREST):
         return self.public_query('returnTicker', params=kwargs)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
         kwargs['currencyPair'] = pair
+        if depth:
+            kwargs['depth'] = depth
         return self.public_query('returnOrderBook', params=kwargs)
 
     @return_api_response(fmt.trades)
@@ -39,7 +39,7 @@ class QuadrigaCX(QuadrigaCXREST):
         return self.public_query('ticker', params=q)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
         q = {'book': pair}
         q.update(kwargs)
         return self.public_query('order_book', params=q)
@@ -41,8 +41,12 @@ class Quoine(QuoineREST):
         return self.public_query('products/%s' % pair, params=kwargs)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
+        # By default, the best 20 levels per side are returned; larger depths
+        # require the full book, which the formatter truncates to depth.
         pair = self.pairs[pair]
+        if depth and depth > 20:
+            kwargs['full'] = 1
         return self.public_query('products/%s/price_levels' % pair, params=kwargs)
 
     @return_api_response(fmt.trades)
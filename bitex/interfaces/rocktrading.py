@@ -40,7 +40,7 @@ class RockTradingLtd(RockTradingREST):
             return self.public_query('tickers')
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
         return self.public_query('funds/%s/orderbook' % pair, params=kwargs)
 
     @return_api_response(fmt.trades)
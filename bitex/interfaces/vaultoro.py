@@ -38,7 +38,7 @@ class Vaultoro(VaultoroREST):
     """
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
         return self.public_query('orderbook')
 
     @return_api_response(fmt.ticker)
@@ -40,8 +40,10 @@ class Yunbi(YunbiREST):
             return self.public_query('tickers', param=kwargs)
 
     @return_api_response(fmt.order_book)
-    def order_book(self, pair, **kwargs):
+    def order_book(self, pair, *, depth=None, **kwargs):
         q = {'market': pair}
+        if depth:
+            q['asks_limit'] = q['bids_limit'] = depth
         q.update(kwargs)
         return self.public_query('order_book', params=q)
 
@@ -61,6 +61,7 @@ def return_api_response(formatter=None):
                     r.formatted = formatter(data, *args, **kwargs)
                 except Exception:
                     log.exception("Error while applying formatter!")
+                    r.format_failed = True
 
             return r
 
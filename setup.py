@@ -9,6 +9,7 @@ setup(name='BitEx', version=VERSION, author='Nils Diefenbach',
       test_suite='nose.collector', tests_require=['nose'],
       packages=find_packages(exclude=['contrib', 'docs', 'tests*', 'travis']),
       install_requires=['requests', 'websocket-client', 'autobahn', 'pusherclient'],
+      extras_require={'numpy': ['numpy']},
       description='Python3-based API Framework for Crypto Exchanges',
       license='MIT',  classifiers=['Development Status :: 4 - Beta',
                                    'Intended Audience :: Developers'],
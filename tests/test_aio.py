@@ -0,0 +1,154 @@
+# Import Built-Ins
+import logging
+import json
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+# Import Third-Party
+from autobahn.asyncio.websocket import WebSocketServerProtocol
+from autobahn.asyncio.websocket import WebSocketServerFactory
+
+# Import Homebrew
+from bitex.api.WSS.aio import AsyncWSSAPI
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class EchoProtocol(WebSocketServerProtocol):
+    def onMessage(self, payload, isBinary):
+        self.factory.clients.append(self)
+        self.sendMessage(payload, isBinary)
+
+
+class EchoServer:
+    """
+    Websocket server echoing all messages, running in its own thread.
+    """
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.factory = WebSocketServerFactory(loop=self.loop)
+        self.factory.protocol = EchoProtocol
+        self.factory.clients = []
+        server = self.loop.run_until_complete(
+            self.loop.create_server(self.factory, '127.0.0.1', 0))
+        self.port = server.sockets[0].getsockname()[1]
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def drop_clients(self):
+        for client in self.factory.clients:
+            self.loop.call_soon_threadsafe(client.dropConnection)
+        self.factory.clients = []
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+class SubscribingClient(AsyncWSSAPI):
+    def on_open(self, conn):
+        conn.send({'event': 'subscribe', 'channel': conn.name})
+
+
+class PairClient(SubscribingClient):
+    def parse(self, conn, msg):
+        return 'ticker', msg.get('pair'), msg
+
+
+class AsyncWSSAPITests(TestCase):
+    def setUp(self):
+        self.server = EchoServer()
+        self.addr = 'ws://127.0.0.1:%s' % self.server.port
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_connections_share_one_loop_thread(self):
+        client = SubscribingClient(self.addr, 'Test', reconnect_delay=0.1)
+        for name in ('a', 'b', 'c'):
+            client.add_connection(name, heartbeat=5)
+        threads = threading.active_count()
+        client.start()
+        try:
+            received = {client.get(timeout=5)[0] for _ in range(3)}
+            self.assertEqual(received, {'a', 'b', 'c'})
+            self.assertEqual(threading.active_count(), threads + 1)
+
+            client.send({'ping': 1}, connection='b')
+            name, pair, data, ts = client.get(timeout=5)
+            self.assertEqual((name, pair, data), ('b', None, {'ping': 1}))
+        finally:
+            client.stop()
+        self.assertFalse(client._loop_thread.is_alive())
+
+    def test_reconnect_replays_on_open(self):
+        client = SubscribingClient(self.addr, 'Test', reconnect_delay=0.1)
+        client.add_connection('a')
+        client.start()
+        try:
+            self.assertEqual(client.get(timeout=5)[0], 'a')
+            self.server.drop_clients()
+            name, pair, data, ts = client.get(timeout=5)
+            self.assertEqual(data, {'event': 'subscribe', 'channel': 'a'})
+            self.assertEqual(client.connections['a'].reconnects, 1)
+        finally:
+            client.stop()
+
+    @staticmethod
+    def wait_connected(client):
+        deadline = time.time() + 5
+        while not all(conn.connected for conn in client.connections.values()):
+            if time.time() > deadline:
+                raise AssertionError("Connections weren't established!")
+            time.sleep(0.01)
+
+    def test_full_data_q_doesnt_block_the_loop(self):
+        client = PairClient(self.addr, 'Test', reconnect_delay=0.1,
+                            maxsize=1)
+        client.add_connection('a')
+        client.add_connection('b')
+        with self.assertRaises(ValueError):
+            client.add_listener('ticker', maxsize=1)
+        client.start()
+        try:
+            self.wait_connected(client)
+            for i in range(5):
+                client.send({'pair': 'BTCUSD', 'i': i}, connection='a')
+            # Connection b is still served while a's data is backlogged
+            client.send({'pair': 'ETHUSD'}, connection='b')
+            listener = client.add_listener('ticker', 'ETHUSD',
+                                           maxsize=1, overflow='drop-oldest')
+            self.assertEqual(listener.get(timeout=5)[1], 'ETHUSD')
+            # Both subscription echoes and a's messages, in order
+            items = [client.get(timeout=5) for _ in range(7)]
+            numbers = [data['i'] for _, pair, data, _ in items
+                       if pair == 'BTCUSD' and 'i' in data]
+            self.assertEqual(numbers, list(range(5)))
+        finally:
+            client.stop()
+
+    def test_conflated_items_are_keyed_by_channel_and_pair(self):
+        client = PairClient(self.addr, 'Test', reconnect_delay=0.1,
+                            conflate=['ticker'])
+        client.add_connection('a')
+        client.start()
+        try:
+            self.wait_connected(client)
+            for i in range(3):
+                client.send({'pair': 'BTCUSD', 'i': i})
+            deadline = time.time() + 5
+            last = None
+            while time.time() < deadline and (last is None or
+                                              last.get('i') != 2):
+                _, pair, last, _ = client.get(timeout=5)
+            self.assertEqual((pair, last.get('i')), ('BTCUSD', 2))
+        finally:
+            client.stop()
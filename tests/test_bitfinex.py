@@ -0,0 +1,322 @@
+# Import Built-Ins
+import logging
+import json
+import threading
+import time
+import zlib
+from unittest import TestCase
+
+# Import Third-Party
+from websocket import WebSocketTimeoutException
+
+# Import Homebrew
+from bitex.api.WSS.bitfinex import BitfinexWSS, ShardedBitfinexWSS
+from bitex.api.WSS.bitfinex import book_checksum
+from bitex.api.WSS.timers import TimerWheel
+from bitex.api.WSS.latency import stamp
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class BitfinexIntegrityTests(TestCase):
+    def setUp(self):
+        self.sent = []
+        self.client = BitfinexWSS()
+        self.client.send = self.sent.append
+        self.client._handle_conf(0, status='OK', flags=8 + 65536 + 131072)
+        self.client._handle_subscribed(0, chanId=5, channel='book',
+                                       symbol='tBTCUSD', pair='BTCUSD',
+                                       prec='P0', freq='F0', len='25')
+        self.client.handle_data(1, [5, [['100', 1, '2'], ['101', 2, '-3']],
+                                    1])
+
+    def test_book_checksum(self):
+        crc = zlib.crc32(b'100:2:101:-3:99.5:1')
+        self.assertEqual(book_checksum([('100', '2'), ('99.5', 1)],
+                                       [('101', '-3')]),
+                         crc - (1 << 32) if crc >= 1 << 31 else crc)
+
+    def test_matching_checksum_keeps_book(self):
+        self.client.handle_data(2, [5, ['99.5', 1, 1.0], 2])
+        checksum = book_checksum([('100', '2'), ('99.5', 1.0)],
+                                 [('101', '-3')])
+        self.client.handle_data(3, [5, 'cs', checksum, 3])
+        self.assertEqual(self.sent, [])
+        self.assertEqual(self.client.get_book('BTCUSD').best_bid(),
+                         (100.0, 2.0))
+
+    def test_checksum_mismatch_resyncs_channel(self):
+        self.client.handle_data(2, [5, 'cs', 12345, 2])
+        self.assertEqual(self.sent, [{'event': 'unsubscribe', 'chanId': 5}])
+        # Data is dropped until the channel was resubscribed
+        self.client.handle_data(3, [5, ['99', 1, '1'], 3])
+        self.assertEqual(len(self.client.get_book('BTCUSD')), 0)
+        self.client._handle_unsubscribed(0, chanId=5)
+        self.assertEqual(self.sent[1], {'event': 'subscribe',
+                                        'channel': 'book', 'symbol': 'tBTCUSD',
+                                        'prec': 'P0', 'freq': 'F0',
+                                        'len': '25'})
+        self.assertEqual(self.client.integrity, {'sequence_gaps': 0,
+                                                 'checksum_errors': 1,
+                                                 'resyncs': 1})
+
+    def test_sequence_gap_resyncs_books(self):
+        self.client._handle_subscribed(0, chanId=6, channel='ticker',
+                                       symbol='tBTCUSD', pair='BTCUSD')
+        self.client.handle_data(2, [6, [1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 2])
+        self.client.handle_data(3, [6, 'hb', 4])
+        self.assertEqual(self.client.integrity['sequence_gaps'], 1)
+        self.assertEqual(self.sent, [{'event': 'unsubscribe', 'chanId': 5}])
+        self.assertEqual(self.client.data_q.qsize(), 2)
+
+    def test_integrity_checks_are_opt_in(self):
+        client = BitfinexWSS(subscriptions=[])
+        sent = []
+        client.send = sent.append
+        client.setup_subscriptions()
+        self.assertEqual(sent, [{'event': 'conf', 'flags': 8}])
+        client._handle_conf(0, status='OK', flags=8)
+        client._handle_subscribed(0, chanId=5, channel='book',
+                                  symbol='tBTCUSD', pair='BTCUSD', prec='P0')
+        # Without sequence numbers, trailing values are data, not sequences
+        client.handle_data(1, [5, [['100', 1, '2'], ['101', 2, '-3']]])
+        client.handle_data(2, [5, ['99', 1, '1']])
+        client.handle_data(3, [5, 'hb'])
+        self.assertEqual(client.integrity, {'sequence_gaps': 0,
+                                            'checksum_errors': 0,
+                                            'resyncs': 0})
+        self.assertEqual(client.get_book('BTCUSD').best_bid(), (100.0, 2.0))
+        self.assertEqual(len(sent), 1)
+
+        client = BitfinexWSS(subscriptions=[], integrity_checks=True)
+        sent = []
+        client.send = sent.append
+        client.setup_subscriptions()
+        self.assertEqual(sent, [{'event': 'conf',
+                                 'flags': 8 + 65536 + 131072}])
+
+    def test_account_messages_advance_public_sequence(self):
+        self.client._handle_subscribed(0, chanId=0, channel='auth')
+        order = [1, None, 10, 'tBTCUSD', 0, 0, '0.5', '0.5', 'EXCHANGE LIMIT',
+                 None, None, None, 0, 'ACTIVE', None, None, '100', '0']
+        self.client.handle_data(2, [0, 'on', order, 2, 1])
+        self.client.handle_data(3, [5, ['99', 1, '1'], 3])
+        self.client.handle_data(4, [0, 'n', [0, 'on-req', None, None, order,
+                                             None, 'SUCCESS', 'ok']])
+        self.client.handle_data(5, [0, 'ou', order, 4, 2])
+        self.client.handle_data(6, [5, ['98', 1, '1'], 5])
+        self.assertEqual(self.client.integrity['sequence_gaps'], 0)
+        self.assertEqual(self.sent, [])
+        self.assertEqual(self.client.account.order(1), order)
+
+        # Gaps of the account's own sequence don't corrupt books
+        self.client.handle_data(7, [0, 'oc', order, 6, 4])
+        self.assertEqual(self.client.integrity['sequence_gaps'], 1)
+        self.assertEqual(self.sent, [])
+        self.client.handle_data(8, [0, 'ou', order, 8, 5])
+        self.assertEqual(self.client.integrity['sequence_gaps'], 2)
+        self.assertEqual(self.sent, [{'event': 'unsubscribe', 'chanId': 5}])
+
+
+
+class BitfinexHeartbeatTests(TestCase):
+    def test_late_channels_are_escalated_and_pinged(self):
+        now = [0.0]
+        sent = []
+        client = BitfinexWSS()
+        client.send = sent.append
+        client.timers = TimerWheel(clock=lambda: now[0])
+        client._handle_subscribed(0, chanId=1, channel='ticker', pair='BTCUSD')
+        client._handle_subscribed(0, chanId=2, channel='trades', pair='BTCUSD')
+
+        # Data moves the deadline instead of touching the timer
+        client.handle_data(time.time(), [1, 'hb'])
+        client._heartbeats[2] = time.time() - 20
+        now[0] = 10.2
+        client.timers.advance()
+        self.assertEqual(list(client._late_heartbeats), [2])
+        self.assertEqual(sent, [{'event': 'ping'}])
+
+        # Still late: no new ping while the first one is outstanding
+        now[0] = 14
+        client.timers.advance()
+        self.assertEqual(len(sent), 1)
+
+        # The ping timed out before channel 1 turned late, which pings again
+        client._heartbeats[1] = time.time() - 20
+        now[0] = 20.3
+        client.timers.advance()
+        self.assertEqual(sorted(client._late_heartbeats), [1, 2])
+        self.assertEqual(len(sent), 2)
+
+        client.handle_data(time.time(), [2, 'hb'])
+        self.assertEqual(list(client._late_heartbeats), [1])
+        client._handle_unsubscribed(chanId=1)
+        self.assertEqual(list(client._heartbeat_timers), [2])
+
+
+class Replay:
+    def __init__(self, messages):
+        self.messages = [json.dumps(m) for m in messages]
+
+    def recv(self):
+        if not self.messages:
+            time.sleep(0.01)
+            raise WebSocketTimeoutException()
+        return self.messages.pop(0)
+
+
+class BitfinexInlineTests(TestCase):
+    def test_inline_dispatch_and_pause(self):
+        client = BitfinexWSS(inline=True)
+        client._handle_subscribed(0, chanId=1, channel='ticker', pair='BTCUSD')
+        client.pause()
+        client.conn = Replay([[1, [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]]])
+        client.running = True
+        thread = threading.Thread(target=client.receive)
+        thread.start()
+        try:
+            time.sleep(0.1)
+            self.assertTrue(client.data_q.empty())
+            client.unpause()
+            # Dispatched on the receiver thread, without a processing thread
+            channel, pair, _ = client.data_q.get(timeout=0.2)
+            self.assertEqual((channel, pair), ('ticker', 'BTCUSD'))
+            self.assertTrue(client.receiver_q.empty())
+        finally:
+            client.running = False
+            thread.join()
+
+
+    def test_inline_errors_restart_the_client(self):
+        client = BitfinexWSS(inline=True)
+
+        def fail(*args):
+            raise ValueError()
+        client._data_handlers['ticker'] = fail
+        client._handle_subscribed(0, chanId=1, channel='ticker', pair='BTCUSD')
+        client.conn = Replay([[1, [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]]])
+        client.conn.messages.insert(0, '[1, [1, 2')
+        client.running = True
+        thread = threading.Thread(target=client.receive)
+        thread.start()
+        try:
+            self.assertEqual(client._controller_q.get(timeout=1), 'restart')
+            self.assertEqual(client._controller_q.get(timeout=1), 'restart')
+            # The receiver carries on reading
+            self.assertTrue(thread.is_alive())
+        finally:
+            client.running = False
+            thread.join()
+
+
+class ShardedBitfinexTests(TestCase):
+    def setUp(self):
+        self.client = ShardedBitfinexWSS(pairs=['BTCUSD', 'ETHUSD', 'LTCUSD',
+                                                'XMRUSD', 'ZECUSD', 'ETCUSD'],
+                                         max_channels=10)
+
+    def test_channels_are_spread_and_balanced(self):
+        self.assertEqual(len(self.client.shards), 3)
+        for shard in self.client.shards:
+            self.assertEqual(len(shard.subscriptions), 10)
+            self.assertEqual(sum(self.client.WEIGHTS[kind]
+                                 for kind, _ in shard.subscriptions), 32)
+
+    def test_shard_data_is_merged(self):
+        shard = self.client.shard('trades', 'BTCUSD')
+        shard._handle_subscribed(0, chanId=3, channel='trades', pair='BTCUSD')
+        shard.handle_data(stamp(), [3, 'te', [1, 1000, '0.5', '100']])
+        channel, pair, _ = self.client.data_q.get(timeout=1)
+        self.assertEqual((channel, pair), ('trades', 'BTCUSD'))
+        self.assertTrue(shard.data_q.empty())
+        self.assertEqual(self.client.counts['trades', 'BTCUSD'], 1)
+
+    def test_rebalance_moves_hot_channels(self):
+        hot = self.client.shards[0].subscriptions[:3]
+        for topic in self.client.topics:
+            self.client.counts[topic] = 1000 if topic in hot else 10
+        moves = self.client.rebalance()
+        self.assertTrue(moves)
+        self.assertEqual(self.client.moves, len(moves))
+        shards = {self.client.assignment[topic] for topic in hot}
+        self.assertGreater(len(shards), 1)
+        for shard in self.client.shards:
+            self.assertLessEqual(len(shard.subscriptions), 10)
+        self.assertEqual(len(self.client.stats()), 3)
+
+    def test_moved_channels_are_published_by_one_shard(self):
+        sent = {}
+        for i, shard in enumerate(self.client.shards):
+            shard.running = True
+            shard.conn = object()
+            shard.send = sent.setdefault(i, []).append
+        topic = ('trades', 'BTCUSD')
+        source = self.client.assignment[topic]
+        target = (source + 1) % 3
+        old, new = self.client.shards[source], self.client.shards[target]
+        old._handle_subscribed(0, chanId=3, channel='trades', pair='BTCUSD')
+        self.client._move(topic, target)
+        self.assertEqual(sent[target][0]['channel'], 'trades')
+        self.assertEqual(sent[source], [])
+
+        # Until the target sends its snapshot, only the source is published
+        old.handle_data(stamp(), [3, 'te', [1, 1000, '0.5', '100']])
+        self.assertEqual(self.client.data_q.get(timeout=1)[:2], topic)
+        new._handle_subscribed(0, chanId=7, channel='trades', pair='BTCUSD')
+        new.handle_data(stamp(), [7, [[1, 1000, '0.5', '100']]])
+        channel, pair, (kind, _) = self.client.data_q.get(timeout=1)
+        self.assertEqual((channel, pair, kind), ('resync', 'BTCUSD', 'trades'))
+        self.assertEqual(self.client.data_q.get(timeout=1)[:2], topic)
+        self.assertEqual(sent[source], [])
+        cmd = old._controller_q.get(timeout=1)
+        self.assertEqual(cmd, ('unsubscribe', 'trades', 'BTCUSD'))
+        old.eval_command(cmd)
+        self.assertEqual(sent[source], [{'event': 'unsubscribe',
+                                         'chanId': 3}])
+        old.handle_data(stamp(), [3, 'te', [2, 1001, '0.5', '100']])
+        self.assertTrue(self.client.data_q.empty())
+
+    def test_books_of_unknown_pairs_are_none(self):
+        self.assertIsNone(self.client.get_book('FOOBAR'))
+        self.assertIsNone(self.client.get_raw_book('FOOBAR'))
+
+
+class BitfinexAccountTests(TestCase):
+    def test_account_state_is_reduced(self):
+        client = BitfinexWSS()
+        client._handle_subscribed(0, chanId=0, channel='auth')
+        order = [1, None, 10, 'tBTCUSD', 0, 0, '0.5', '0.5', 'EXCHANGE LIMIT',
+                 None, None, None, 0, 'ACTIVE', None, None, '100', '0']
+        client.handle_data(stamp(), [0, 'os', [order]])
+        client.handle_data(stamp(), [0, 'ws', [['exchange', 'BTC', '1', 0,
+                                                 None]]])
+        client.handle_data(stamp(), [0, 'ps', []])
+        self.assertTrue(client.account.synced)
+        self.assertEqual(client.account.open_orders('tBTCUSD'), {1: order})
+
+        client.handle_data(stamp(), [0, 'on', [2] + order[1:]])
+        client.handle_data(stamp(), [0, 'oc', order])
+        self.assertEqual(list(client.account.open_orders()), [2])
+        client.handle_data(stamp(), [0, 'wu', ['exchange', 'BTC', '2', 0,
+                                               '1.5']])
+        self.assertEqual(client.account.available('BTC'), 1.5)
+        client.handle_data(stamp(), [0, 'pn', ['tBTCUSD', 'ACTIVE', '1']])
+        client.handle_data(stamp(), [0, 'miu', ['base', [1, 2, 3, 4]]])
+        self.assertEqual(client.account.margin['base'], [1, 2, 3, 4])
+        client.handle_data(stamp(), [0, 'pc', ['tBTCUSD', 'CLOSED', '0']])
+        self.assertIsNone(client.account.position('tBTCUSD'))
+
+        # A malformed delta desyncs the account, but doesn't stop the client
+        client.handle_data(stamp(), [0, 'wu', []])
+        self.assertFalse(client.account.synced)
+        self.assertEqual(client.account.errors, 1)
+        self.assertTrue(client._controller_q.empty())
+
+        # Raw account data is still published
+        self.assertEqual(client.data_q.qsize(), 10)
+        client._reset_channels()
+        self.assertFalse(client.account.synced)
+        self.assertEqual(client.account.orders, {})
@@ -0,0 +1,114 @@
+# Import Built-Ins
+import logging
+import json
+import threading
+import time
+from unittest import TestCase
+
+# Import Third-Party
+import requests
+
+# Import Homebrew
+from bitex.api.WSS.bitstamp import BitstampWSS
+from bitex.api.REST.bitstamp import BitstampREST
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class Snapshot:
+    def __init__(self, data):
+        self.data = data
+        self.requested = []
+        self.release = threading.Event()
+
+    def query(self, method_verb, endpoint, **kwargs):
+        self.requested.append((method_verb, endpoint))
+        self.release.wait(1)
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class BitstampBookTests(TestCase):
+    def test_diffs_are_aligned_with_snapshot(self):
+        rest = Snapshot({'microtimestamp': '2000', 'bids': [['100', '1']],
+                         'asks': [['101', '2'], ['102', '3']]})
+        client = BitstampWSS(books=True, rest=rest)
+        diff = {'microtimestamp': '1000', 'bids': [['100', '0']], 'asks': []}
+        client.diff_order_book_callback('BTCUSD', json.dumps(diff))
+        diff = {'microtimestamp': '3000', 'bids': [['99', '4']],
+                'asks': [['101', '0']]}
+        client.diff_order_book_callback('BTCUSD', json.dumps(diff))
+        self.assertIsNone(client.get_book('BTCUSD'))
+
+        rest.release.set()
+        for _ in range(100):
+            if client.get_book('BTCUSD') is not None:
+                break
+            time.sleep(0.01)
+        book = client.get_book('BTCUSD')
+        self.assertEqual(rest.requested, [('GET', 'v2/order_book/btcusd/')])
+        # The older diff is contained in the snapshot, the newer one applied
+        self.assertEqual(book.best_bid(), (100.0, 1.0))
+        self.assertEqual(book.best_ask(), (102.0, 3.0))
+        self.assertEqual(len(book.bids), 2)
+
+        client.diff_order_book_callback('BTCUSD', {'microtimestamp': '4000',
+                                                   'bids': [['100', '0']],
+                                                   'asks': []})
+        self.assertEqual(book.best_bid(), (99.0, 4.0))
+        self.assertEqual(client.data_q.qsize(), 3)
+
+    def test_failed_snapshots_are_retried(self):
+        urls = []
+
+        def api_request(method_verb, url, **kwargs):
+            urls.append(url)
+            resp = requests.Response()
+            resp.status_code = 500
+            resp._content = b'{"error": "Internal Server Error"}'
+            resp.request = requests.Request(method_verb, url).prepare()
+            return resp
+
+        rest = BitstampREST()
+        rest.api_request = api_request
+        client = BitstampWSS(books=True, rest=rest)
+        client._book_buffers['BTCUSD'] = []
+        self.assertFalse(client.sync_book('BTCUSD'))
+        self.assertEqual(urls, ['https://www.bitstamp.net/api/v2/order_book/'
+                                'btcusd/'])
+        self.assertIsNone(client.get_book('BTCUSD'))
+        self.assertNotIn('BTCUSD', client._book_buffers)
+
+        # Diffs don't retry until the retry interval has passed
+        diff = {'microtimestamp': '1000', 'bids': [], 'asks': []}
+        client.diff_order_book_callback('BTCUSD', diff)
+        self.assertEqual(len(urls), 1)
+        self.assertNotIn('BTCUSD', client._book_buffers)
+        client._retry_at['BTCUSD'] = 0
+        client.diff_order_book_callback('BTCUSD', diff)
+        for _ in range(100):
+            if client._snapshot_failures['BTCUSD'] == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(urls), 2)
+        self.assertEqual(client._snapshot_failures['BTCUSD'], 2)
+
+    def test_items_are_stamped(self):
+        client = BitstampWSS()
+        client.live_trades_callback('BTCUSD', '{"id": 3, "price": 10, '
+                                              '"amount": 1, "type": 1, '
+                                              '"microtimestamp": '
+                                              '"1500000000123456"}')
+        channel, pair, data, ts = client.data_q.get(timeout=1)
+        self.assertEqual((channel, pair), ('live_trades', 'BTCUSD'))
+        self.assertEqual(ts.exchange_ts, 1500000000.123456)
+        stats = client.latency.stats()['live_trades']
+        self.assertEqual(stats['dispatch']['count'], 1)
+        self.assertEqual(stats['feed']['count'], 1)
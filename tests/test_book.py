@@ -0,0 +1,166 @@
+# Import Built-Ins
+import logging
+from unittest import TestCase
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.book import PriceLadder, OrderBook, RawOrderBook
+from bitex.api.book import ConsolidatedBook
+from bitex.api.WSS.bitfinex import BitfinexWSS
+from bitex.api.WSS.latency import stamp
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class PriceLadderTests(TestCase):
+    def test_ladder_sorts_best_price_first(self):
+        bids, asks = PriceLadder('bids'), PriceLadder('asks')
+        for price in (10.0, 12.0, 11.0):
+            bids.set(price, 1)
+            asks.set(price, 1)
+        self.assertEqual(bids.prices(), [12.0, 11.0, 10.0])
+        self.assertEqual(asks.prices(), [10.0, 11.0, 12.0])
+        bids.remove(12.0)
+        self.assertEqual(bids.best(), (11.0, 1))
+        self.assertIsNone(bids.remove(99.0))
+
+
+class OrderBookTests(TestCase):
+    def setUp(self):
+        self.book = OrderBook()
+        self.book.replace(bids=[(100.0, 1.0, 1), (99.0, 2.0, 3)],
+                          asks=[(101.0, 3.0, 1), (102.0, 4.0, 2)], ts=1)
+
+    def test_views(self):
+        self.assertEqual(self.book.best_bid(), (100.0, 1.0))
+        self.assertEqual(self.book.best_ask(), (101.0, 3.0))
+        self.assertEqual(self.book.mid(), 100.5)
+        self.assertEqual(self.book.microprice(), 100.25)
+        self.assertEqual(self.book.depth('asks', 5), [(101.0, 3.0),
+                                                      (102.0, 2.0)])
+        self.assertEqual(self.book.top(1), {'bids': [(100.0, 1.0)],
+                                            'asks': [(101.0, 3.0)], 'ts': 1})
+
+    def test_updates(self):
+        self.book.update('bids', 100.0, 0, ts=2)
+        self.book.update('asks', 100.5, 1.0, 1, ts=3)
+        self.assertEqual(self.book.best_bid(), (99.0, 2.0))
+        self.assertEqual(self.book.best_ask(), (100.5, 1.0))
+        self.assertEqual((len(self.book), self.book.updates), (4, 3))
+
+    def test_bitfinex_book_channel(self):
+        client = BitfinexWSS()
+        client._handle_subscribed(0, chanId=5, channel='book', pair='BTCUSD',
+                                  prec='P0')
+        client.handle_data(1, [5, [['100', 1, '2'], ['101', 2, '-3']]])
+        client.handle_data(2, [5, ['100', 0, '1']])
+        client.handle_data(3, [5, ['101.5', 1, '-1']])
+        book = client.get_book('BTCUSD')
+        self.assertIsNone(book.best_bid())
+        self.assertEqual(book.top(), {'bids': [], 'ts': 3,
+                                      'asks': [(101.0, 3.0), (101.5, 1.0)]})
+        self.assertEqual(client.data_q.qsize(), 3)
+        client._handle_unsubscribed(chanId=5)
+        self.assertIsNone(client.get_book('BTCUSD'))
+
+
+class RawOrderBookTests(TestCase):
+    def setUp(self):
+        self.book = RawOrderBook()
+        self.book.replace([(1, 'bids', 100.0, 1.0), (2, 'bids', 100.0, 2.0),
+                           (3, 'bids', 100.0, 3.0), (4, 'asks', 101.0, 1.0)])
+
+    def test_queue_position(self):
+        self.assertEqual(self.book.queue_position(3), (2, 3.0))
+        # Reducing keeps the position, increasing moves to the back
+        self.book.update(1, 'bids', 100.0, 0.5)
+        self.assertEqual(self.book.queue_position(3), (2, 2.5))
+        self.book.update(2, 'bids', 100.0, 4.0)
+        self.assertEqual(self.book.queue('bids', 100.0),
+                         [(1, 0.5), (3, 3.0), (2, 4.0)])
+
+    def test_levels_are_aggregated_incrementally(self):
+        self.assertEqual(self.book.levels.best_bid(), (100.0, 6.0))
+        self.book.update(3, 'bids', 99.0, 3.0)
+        self.book.cancel(1)
+        self.assertFalse(self.book.cancel(1))
+        self.assertEqual(self.book.levels.top(), {'bids': [(100.0, 2.0),
+                                                           (99.0, 3.0)],
+                                                  'asks': [(101.0, 1.0)],
+                                                  'ts': None})
+        self.assertEqual(self.book.order(3), ('bids', 99.0, 3.0))
+        self.book.cancel(4)
+        self.assertIsNone(self.book.levels.best_ask())
+        self.assertEqual(len(self.book), 2)
+
+    def test_bitfinex_raw_book_channel(self):
+        client = BitfinexWSS()
+        client._handle_subscribed(0, chanId=6, channel='book', pair='BTCUSD',
+                                  prec='R0')
+        client.handle_data(1, [6, [[10, '100', '1'], [11, '101', '-2']]])
+        client.handle_data(2, [6, [10, '0', '1']])
+        client.handle_data(3, [6, [12, '100.5', '-1']])
+        book = client.get_raw_book('BTCUSD')
+        self.assertEqual(len(book), 2)
+        self.assertEqual(book.levels.best_ask(), (100.5, 1.0))
+        self.assertIsNone(book.levels.best_bid())
+
+
+class ConsolidatedBookTests(TestCase):
+    def setUp(self):
+        self.book = ConsolidatedBook(fees={'Kraken': 0.0026, 'GDAX': 0.0})
+        self.book.update_book('Kraken', bids=[['100.0', '1']],
+                              asks=[['101.0', '2'], ['102', '1']])
+        self.book.update_book('GDAX', bids=[['100.0', '3'], ['99.9', '1']],
+                              asks=[['101.1', '1']])
+
+    def test_bbo_merges_venues(self):
+        bid, ask = self.book.bbo()
+        self.assertEqual(bid, (100.0, {'Kraken': 1.0, 'GDAX': 3.0}))
+        self.assertEqual(ask, (101.0, {'Kraken': 2.0}))
+        self.assertEqual(self.book.depth_at('bids', '100'),
+                         {'Kraken': 1.0, 'GDAX': 3.0})
+
+    def test_snapshot_updates_are_applied_incrementally(self):
+        self.book.update_book('Kraken', bids=[['99.95', '1']],
+                              asks=[['102', '1']])
+        self.assertEqual(self.book.best_bid(), (100.0, {'GDAX': 3.0}))
+        self.assertEqual(self.book.best_ask(), (101.1, {'GDAX': 1.0}))
+        self.assertEqual([p for p, _ in self.book.ladder('bids')],
+                         [100.0, 99.95, 99.9])
+        self.book.update('GDAX', 'bids', '100.0', 0)
+        self.assertEqual(self.book.best_bid(), (99.95, {'Kraken': 1.0}))
+        self.book.remove_venue('Kraken')
+        self.assertEqual(self.book.ladder('asks'), [(101.1, {'GDAX': 1.0})])
+
+    def test_fee_adjusted_bbo(self):
+        bid, ask = self.book.fee_adjusted_bbo()
+        self.assertEqual(bid[1:], ('GDAX', 100.0, 3.0))
+        self.assertEqual(ask[1:], ('GDAX', 101.1, 1.0))
+
+    def test_dict_quotes_are_consolidated(self):
+        # As returned by Bitfinex's and Gemini's order_book()
+        self.book.update_book('Gemini', bids=[{'price': '100.5',
+                                               'amount': '2',
+                                               'timestamp': '1480941692'}],
+                              asks=[{'price': '100.9', 'amount': '1',
+                                     'timestamp': '1480941692'}])
+        bid, ask = self.book.bbo()
+        self.assertEqual(bid, (100.5, {'Gemini': 2.0}))
+        self.assertEqual(ask, (100.9, {'Gemini': 1.0}))
+
+    def test_wss_books_are_consolidated(self):
+        client = BitfinexWSS()
+        book = ConsolidatedBook(symbol='BTC-USD')
+        book.attach(client)
+        client._handle_subscribed(0, chanId=5, channel='book', pair='BTCUSD',
+                                  prec='P0')
+        client.handle_data(stamp(), [5, [['100', 1, '2'], ['101', 1, '-1']]])
+        self.assertEqual(book.bbo(), ((100.0, {'Bitfinex': 2.0}),
+                                      (101.0, {'Bitfinex': 1.0})))
+        client.handle_data(stamp(), [5, ['100', 0, '1']])
+        self.assertIsNone(book.best_bid())
+        self.assertEqual(book.venues, ['Bitfinex'])
@@ -0,0 +1,42 @@
+# Import Built-Ins
+import logging
+from unittest import TestCase
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.WSS.base import WSSAPI
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class TopicBusTests(TestCase):
+    def test_publish_routes_to_matching_listeners(self):
+        api = WSSAPI(None, 'Test')
+        usd_trades = []
+        api.add_listener('trades', '*USD', callback=usd_trades.append)
+        tickers = api.add_listener('ticker')
+
+        api.publish(('trades', 'BTCUSD', 1))
+        api.publish(('trades', 'ETHBTC', 2))
+        api.publish(('ticker', 'ETHBTC', 3))
+        api.publish(('ticker', 'BTCUSD', 4))
+
+        self.assertEqual(usd_trades, [('trades', 'BTCUSD', 1)])
+        self.assertEqual(tickers.get(timeout=1), ('ticker', 'ETHBTC', 3))
+        self.assertEqual(tickers.get(timeout=1), ('ticker', 'BTCUSD', 4))
+        # Unmatched items still end up on the data_q
+        self.assertEqual(api.get(timeout=1), ('trades', 'ETHBTC', 2))
+        self.assertTrue(api.data_q.empty())
+
+    def test_remove_listener_resets_routes(self):
+        api = WSSAPI(None, 'Test')
+        received = []
+        listener = api.add_listener('trades', callback=received.append)
+        api.publish(('trades', 'BTCUSD', 1))
+        api.remove_listener(listener)
+        api.publish(('trades', 'BTCUSD', 2))
+        self.assertEqual(received, [('trades', 'BTCUSD', 1)])
+        self.assertEqual(api.get(timeout=1), ('trades', 'BTCUSD', 2))
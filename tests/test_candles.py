@@ -0,0 +1,53 @@
+# Import Built-Ins
+import logging
+from unittest import TestCase
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.candles import CandleBuffer
+from bitex.api.WSS.bitfinex import BitfinexWSS
+from bitex.api.WSS.latency import stamp
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class CandleBufferTests(TestCase):
+    def test_bars_are_merged_in_place(self):
+        buffer = CandleBuffer(capacity=3)
+        buffer.replace([(2, 1, 1, 1, 1, 1), (1, 1, 1, 1, 1, 1)])
+        view = buffer.last()
+        self.assertEqual(list(view[:, 0]), [1, 2])
+        # Updates of buffered bars show up in existing views
+        buffer.update((2, 1, 3, 1, 2, 5))
+        self.assertEqual(view[1, 2], 3)
+
+        for start in (3, 4, 5):
+            buffer.update((start, 1, 1, 1, 1, 1))
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(list(buffer.column('start')), [3, 4, 5])
+        self.assertEqual(list(buffer.column('start', 2)), [4, 5])
+        buffer.update((4, 2, 2, 2, 2, 2))
+        buffer.update((1, 9, 9, 9, 9, 9))
+        self.assertEqual(list(buffer.column('close')), [1, 2, 1])
+        self.assertFalse(buffer.last().flags.writeable)
+        self.assertIsNotNone(buffer.last().base)
+
+
+class BitfinexCandleTests(TestCase):
+    def test_candles_channel_fills_store(self):
+        client = BitfinexWSS(candles=10)
+        client._handle_subscribed(0, chanId=7, channel='candles',
+                                  key='trade:1m:tBTCUSD')
+        self.assertEqual(client.channel_labels[7][1]['pair'], 'BTCUSD')
+        client.handle_data(stamp(), [7, [[120000, 1, 2, 3, 0.5, 10],
+                                         [60000, 1, 1, 1, 1, 1]]])
+        client.handle_data(stamp(), [7, [120000, 1, 4, 4, 0.5, 12]])
+        bars = client.get_candles('BTCUSD', '1m')
+        self.assertEqual(bars.tolist(), [[60, 1, 1, 1, 1, 1],
+                                         [120, 1, 4, 0.5, 4, 12]])
+        channel, pair, _ = client.data_q.get(timeout=1)
+        self.assertEqual((channel, pair), ('ohlc', 'BTCUSD'))
+        self.assertEqual(client.get_candles('ETHUSD', '1m').shape, (0, 6))
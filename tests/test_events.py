@@ -0,0 +1,110 @@
+# Import Built-Ins
+import logging
+import json
+import pickle
+from unittest import TestCase
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.WSS.base import WSSAPI
+from bitex.api.WSS.latency import stamp
+from bitex.api.WSS.events import BookUpdate, Trade, Ticker, Candle
+from bitex.api.WSS.events import AccountUpdate, canonical_symbol, normalize
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class NormalizedEventTests(TestCase):
+    def test_canonical_symbols(self):
+        for symbol in ('tBTCUSD', 'BTCUSD', 'btcusd', 'BTC-USD', 'XBT_USD'):
+            self.assertEqual(canonical_symbol(symbol), 'BTC-USD')
+        self.assertEqual(canonical_symbol('ETHUSDT'), 'ETH-USDT')
+        self.assertEqual(canonical_symbol('DSHBTC'), 'DASH-BTC')
+        self.assertEqual(canonical_symbol('FOO'), 'FOO')
+
+    def test_bitfinex(self):
+        ts = stamp()
+        book = normalize('Bitfinex', ('order_book', 'BTCUSD',
+                                      ([[[100, 1, 2], [101, 2, -3]]], ts)), ts)
+        self.assertEqual(book, [BookUpdate('order_book', 'BTC-USD', 'Bitfinex',
+                                           ((100.0, 2.0),), ((101.0, 3.0),),
+                                           True, ts)])
+        delete, = normalize('Bitfinex', ('order_book', 'BTCUSD',
+                                         ([['101', 0, '-1']], ts)), ts)
+        self.assertEqual((delete.asks, delete.snapshot), (((101.0, 0.0),),
+                                                          False))
+        trade, = normalize('Bitfinex', ('trades', 'BTCUSD',
+                                        (['te', [7, 1500000000000, -0.5, 100]],
+                                         ts)), ts)
+        self.assertEqual((trade.side, trade.size, trade.exchange_ts),
+                         ('sell', 0.5, 1500000000))
+        self.assertEqual(normalize('Bitfinex', ('trades', 'BTCUSD',
+                                                (['tu', [7, 1, -0.5, 100]],
+                                                 ts)), ts), [])
+        ticker, = normalize('Bitfinex', ('ticker', 'BTCUSD',
+                                         ([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], ts)),
+                            ts)
+        self.assertEqual(ticker, Ticker('ticker', 'BTC-USD', 'Bitfinex', 1.0,
+                                        3.0, 7.0, 8.0, ts))
+        candle, = normalize('Bitfinex', ('ohlc', 'BTCUSD',
+                                         ([[1000, 1, 2, 3, 0.5, 10]], ts)), ts)
+        self.assertEqual((candle.open, candle.high, candle.low, candle.close),
+                         (1.0, 3.0, 0.5, 2.0))
+        account, = normalize('Bitfinex', ('account_wallet', 'NA',
+                                          (['wu', ['exchange']], ts)), ts)
+        self.assertIsInstance(account, AccountUpdate)
+        self.assertEqual(account.kind, 'wallet')
+
+    def test_other_exchanges(self):
+        ts = stamp()
+        gemini = json.dumps({'type': 'update', 'timestampms': 1000,
+                             'events': [{'type': 'trade', 'tid': 1,
+                                         'price': '10', 'amount': '2',
+                                         'makerSide': 'ask'},
+                                        {'type': 'change', 'side': 'bid',
+                                         'price': '9', 'remaining': '0',
+                                         'reason': 'trade'}]})
+        book, trade = normalize('Gemini', ('marketdata', 'btcusd', gemini,
+                                           ts), ts)
+        self.assertEqual((book.symbol, book.bids), ('BTC-USD', ((9.0, 0.0),)))
+        self.assertEqual((trade.side, trade.exchange_ts), ('buy', 1.0))
+
+        gdax, = normalize('GDAX', ('order_book', 'BTC-USD',
+                                   {'type': 'l2update',
+                                    'changes': [['sell', '10', '1']]}, ts), ts)
+        self.assertEqual((gdax.bids, gdax.asks), ((), ((10.0, 1.0),)))
+
+        okcoin, = normalize('OKCoin', ('ok_sub_spotusd_btc_kline_1min',
+                                       'BTCUSD', [[60000, 1, 2, 0.5, 1.5, 3]],
+                                       ts), ts)
+        self.assertEqual(okcoin, Candle('candles', 'BTC-USD', 'OKCoin', '1min',
+                                        60.0, 1.0, 2.0, 0.5, 1.5, 3.0, ts))
+
+        bitstamp, = normalize('Bitstamp', ('live_trades', 'BTCUSD',
+                                           '{"id": 3, "price": 10, '
+                                           '"amount": 1, "type": 1}', ts),
+                              ts)
+        self.assertEqual((bitstamp.side, bitstamp.symbol), ('sell', 'BTC-USD'))
+        self.assertIsNotNone(bitstamp.ts)
+
+    def test_client_publishes_events(self):
+        client = WSSAPI(None, 'Bitfinex')
+        client.normalize()
+        ts = stamp()
+        listener = client.add_listener('trades', 'BTC-*')
+        client.publish(('trades', 'BTCUSD',
+                        ([[[1, 1000, 1, 10], [2, 2000, -1, 11]]], ts)), ts)
+        client.publish(('raw_order_book', 'BTCUSD', ([[1, 10, 1]], ts)), ts)
+        client.publish(('ticker', 'BTCUSD', ([1], ts)), ts)
+        trades = list(listener.drain())
+        self.assertEqual([t.id for t in trades], [1, 2])
+        self.assertIsInstance(trades[0], Trade)
+        self.assertEqual(client.normalize_errors, 1)
+        self.assertTrue(client.data_q.empty())
+        self.assertEqual(pickle.loads(pickle.dumps(trades[0])), trades[0])
+
+        with self.assertRaises(ValueError):
+            WSSAPI(None, 'Test').normalize()
@@ -1,13 +1,17 @@
 # Import Built-Ins
 import logging
+import json
 from unittest import TestCase
 # Import Third-Party
+import requests
 
 # Import Homebrew
 from bitex.formatters.kraken import KrknFormatter
 from bitex.formatters.bitfinex import BtfxFormatter
 from bitex.formatters.bitstamp import BtstFormatter
 from bitex.formatters.bittrex import BtrxFormatter
+from bitex.formatters.base import Formatter
+from bitex.interfaces.bter import Bter
 
 
 # Init Logging Facilities
@@ -41,4 +45,35 @@ class FormatterTest(TestCase):
         test_pairs = ['btcusd', 'ltcbtc', 'xmr_btc', 'BTCEUR']
         expected_output = ['BTC-USD', 'BTC-LTC', 'XMR-BTC', 'BTC-EUR']
         fmt_output = [fmt.format_pair(pair) for pair in test_pairs]
-        self.assertEqual(fmt_output, expected_output)
\ No newline at end of file
+        self.assertEqual(fmt_output, expected_output)
+
+    def test_order_book_is_truncated_to_depth(self):
+        book = {'timestamp': '1480941692',
+                'bids': [['0.014', '10'], ['0.013', '0.66'], ['0.012', '3']],
+                'asks': [['0.015', '1'], ['0.016', '0.67'], ['0.017', '23']]}
+        truncated = Formatter.order_book(book, None, 'btcusd', depth=2)
+        self.assertEqual(truncated['bids'], book['bids'][:2])
+        self.assertEqual(truncated['asks'], book['asks'][:2])
+        self.assertEqual(len(book['bids']), 3)
+        self.assertIs(Formatter.order_book(book, None, 'btcusd'), book)
+
+        result = {'buy': book['bids'], 'sell': book['asks']}
+        truncated = BtrxFormatter.order_book({'success': True,
+                                              'result': result}, depth=1)
+        self.assertEqual(truncated, {'buy': [['0.014', '10']],
+                                     'sell': [['0.015', '1']]})
+
+    def test_order_book_depth_is_keyword_only(self):
+        book = {'bids': [['3', '1'], ['2', '1'], ['1', '1']],
+                'asks': [['6', '1'], ['5', '1'], ['4', '1']]}
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = json.dumps(book).encode()
+        bter = Bter()
+        bter.public_query = lambda endpoint, **kwargs: resp
+
+        # Passed positionally, depth would be lost to the formatter's *args
+        with self.assertRaises(TypeError):
+            bter.order_book('btc_usd', 1)
+        self.assertEqual(bter.order_book('btc_usd', depth=1).formatted,
+                         {'bids': [['3', '1']], 'asks': [['4', '1']]})
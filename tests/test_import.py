@@ -0,0 +1,58 @@
+# Import Built-Ins
+import logging
+import sys
+import json
+import subprocess
+from unittest import TestCase
+
+# Import Third-Party
+
+# Import Homebrew
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+HEAVY_MODULES = ['requests', 'websocket', 'autobahn', 'pusherclient',
+                 'asyncio', 'multiprocessing']
+
+BENCHMARK = """
+import sys, time, json
+start = time.perf_counter()
+import bitex
+import_time = time.perf_counter() - start
+loaded = [m for m in %r if m in sys.modules]
+start = time.perf_counter()
+bitex.Kraken
+first_access_time = time.perf_counter() - start
+loaded_after_access = [m for m in %r if m in sys.modules]
+print(json.dumps([import_time, loaded, first_access_time, loaded_after_access]))
+""" % (HEAVY_MODULES, HEAVY_MODULES)
+
+
+class ImportTests(TestCase):
+    def run_benchmark(self):
+        # Runs in a fresh interpreter, so no module is cached already
+        out = subprocess.check_output([sys.executable, '-c', BENCHMARK],
+                                      stderr=subprocess.DEVNULL)
+        return json.loads(out.decode().strip().splitlines()[-1])
+
+    def test_import_bitex_is_lazy(self):
+        import_time, loaded, access_time, loaded_after_access = self.run_benchmark()
+        log.info("import bitex: %.1fms, first access to bitex.Kraken: %.1fms",
+                 import_time * 1000, access_time * 1000)
+        self.assertEqual(loaded, [])
+        self.assertLess(import_time, 0.25)
+        # A REST client needs requests - but none of the websocket libraries
+        self.assertEqual(loaded_after_access, ['requests'])
+
+    def test_public_names_are_available(self):
+        import bitex
+        from bitex.interfaces import Kraken
+        from bitex.api.REST import KrakenREST
+        self.assertIs(bitex.Kraken, Kraken)
+        self.assertTrue(issubclass(Kraken, KrakenREST))
+        self.assertIn('Bitfinex', dir(bitex))
+        with self.assertRaises(AttributeError):
+            bitex.DoesNotExist
@@ -0,0 +1,45 @@
+# Import Built-Ins
+import logging
+import pickle
+from unittest import TestCase
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.WSS.base import WSSAPI
+from bitex.api.WSS.latency import LatencyHistogram, Timestamp, stamp
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class LatencyTests(TestCase):
+    def test_timestamp_behaves_like_float(self):
+        ts = Timestamp(100.5, 42, exchange_ts=100.0)
+        self.assertEqual(ts - 0.5, 100.0)
+        copy = pickle.loads(pickle.dumps(ts))
+        self.assertEqual((copy, copy.recv_ns, copy.exchange_ts),
+                         (100.5, 42, 100.0))
+
+    def test_histogram_percentiles(self):
+        hist = LatencyHistogram()
+        for us in range(1, 101):
+            hist.record(us * 1000)
+        hist.record(-5)
+        snapshot = hist.snapshot()
+        self.assertEqual(snapshot['count'], 100)
+        self.assertEqual(snapshot['negative'], 1)
+        self.assertEqual(snapshot['p50'], 64e-6)
+        self.assertEqual(snapshot['p99'], 100e-6)
+
+    def test_publish_records_latencies(self):
+        api = WSSAPI(None, 'Test')
+        ts = stamp()
+        ts.exchange_ts = ts - 0.25
+        api.publish(('trades', 'BTCUSD', [], ts), ts)
+        api.publish(('ticker', 'BTCUSD', [], 1.0), 1.0)
+        stats = api.latency.stats()
+        self.assertEqual(list(stats), ['trades'])
+        self.assertEqual(stats['trades']['dispatch']['count'], 1)
+        self.assertAlmostEqual(stats['trades']['feed']['mean'], 0.25, 3)
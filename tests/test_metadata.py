@@ -0,0 +1,51 @@
+# Import Built-Ins
+import logging
+import os
+import time
+import tempfile
+from unittest import TestCase
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.metadata import MetadataCache
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class MetadataCacheTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.calls = 0
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def fetch(self):
+        self.calls += 1
+        return {'symbols': ['BTC-USD', 'ETH-USD'],
+                'details': {'BTC-USD': {'tick_size': '0.01'}}}
+
+    def make_cache(self, ttl=60):
+        return MetadataCache(path=self.dir.name, ttl=ttl,
+                             fetchers={'Test': self.fetch})
+
+    def test_metadata_is_persisted_across_instances(self):
+        self.assertEqual(self.make_cache().symbols('Test'),
+                         ['BTC-USD', 'ETH-USD'])
+        cache = self.make_cache()
+        self.assertEqual(cache.details('Test', 'BTC-USD'), {'tick_size': '0.01'})
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(os.path.exists(os.path.join(self.dir.name, 'test.json')))
+
+    def test_stale_entries_are_served_and_refreshed_in_background(self):
+        self.make_cache().get('Test')
+        cache = self.make_cache(ttl=0)
+        time.sleep(0.01)
+        self.assertEqual(cache.symbols('Test'), ['BTC-USD', 'ETH-USD'])
+        deadline = time.time() + 2
+        while self.calls < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.calls, 2)
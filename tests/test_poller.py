@@ -0,0 +1,168 @@
+# Import Built-Ins
+import logging
+import time
+from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.poller import PollSubscription, PollScheduler, RESTPoller
+from bitex.api.batch import RequestBatcher
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self.formatted = data
+        self.status_code = status_code
+        self.headers = {}
+
+    def json(self):
+        return self.formatted
+
+
+class FakeExchange:
+    uri = 'https://api.example.com'
+
+    def __init__(self):
+        self.calls = 0
+
+    def ticker(self, pair, **kwargs):
+        self.calls += 1
+        return FakeResponse((str(self.calls // 2), '2', None, None, None, None,
+                             '1.5', None, None))
+
+
+class FailingExchange(FakeExchange):
+    def ticker(self, pair, **kwargs):
+        self.calls += 1
+        return FakeResponse({'error': 'Internal Server Error'}, 500)
+
+
+class Poloniex:
+    uri = 'https://poloniex.com'
+
+    def __init__(self):
+        self.calls = 0
+
+    def public_query(self, endpoint, **kwargs):
+        self.calls += 1
+        return FakeResponse({'BTC_ETH': {'highestBid': '1', 'lowestAsk': '2',
+                                         'last': '1.5'},
+                             'BTC_LTC': {'highestBid': '3', 'lowestAsk': '4',
+                                         'last': '3.5'}})
+
+
+class PollerTests(TestCase):
+    def test_subscription_adapts_interval_to_changes(self):
+        updates = []
+        sub = PollSubscription(FakeExchange(), 'ticker', 'BTCUSD', 1,
+                               lambda *args: updates.append(args),
+                               max_interval=3)
+        self.assertTrue(sub.update('a', 0))
+        self.assertEqual(sub.interval, 1)
+        self.assertFalse(sub.update('a', 1))
+        self.assertEqual(sub.interval, 1.5)
+        sub.update('a', 2)
+        sub.update('a', 3)
+        self.assertEqual(sub.interval, 3)
+        sub.update('b', 4)
+        self.assertEqual(sub.interval, 1)
+        self.assertEqual(len(updates), 2)
+
+    def test_rest_poller_emits_wss_shaped_changes(self):
+        scheduler = PollScheduler(workers=2, jitter=0,
+                                  rate_limits={'FakeExchange': 100})
+        exchange = FakeExchange()
+        poller = RESTPoller(exchange, scheduler=scheduler)
+        poller.subscribe('ticker', 'BTCUSD', interval=0.01)
+        poller.start()
+        try:
+            channel, pair, data, ts = poller.get(timeout=2)
+            self.assertEqual((channel, pair), ('ticker', 'BTCUSD'))
+            self.assertEqual(data[0], '0')
+            channel, pair, data, ts = poller.get(timeout=2)
+            self.assertEqual(data[0], '1')
+        finally:
+            poller.stop()
+            scheduler.stop()
+        self.assertEqual(poller.name, 'FakeExchange')
+
+    def test_error_responses_are_failed_polls(self):
+        scheduler = PollScheduler(workers=1, jitter=0)
+        updates = []
+        sub = PollSubscription(FailingExchange(), 'ticker', 'BTCUSD', 1,
+                               lambda *args: updates.append(args))
+        scheduler._poll(sub, sub.generation)
+        self.assertEqual(updates, [])
+        self.assertEqual((sub.errors, sub.polls), (1, 0))
+        self.assertEqual(sub.interval, 1.5)
+
+    def test_scheduler_respects_rate_limits(self):
+        scheduler = PollScheduler(workers=4, jitter=0,
+                                  rate_limits={'FakeExchange': 20})
+        exchange = FakeExchange()
+        subs = [PollSubscription(exchange, 'ticker', str(i), 0.001,
+                                 lambda *args: None) for i in range(4)]
+        scheduler.start()
+        for sub in subs:
+            scheduler.add(sub)
+        time.sleep(0.5)
+        scheduler.stop()
+        self.assertLessEqual(exchange.calls, 11)
+
+    def test_batcher_merges_concurrent_requests(self):
+        exchange = Poloniex()
+        batcher = RequestBatcher(exchange, window=0.1)
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(batcher.ticker, ['BTC_ETH', 'BTC_LTC',
+                                                     'BTC_ETH', 'BTC_LTC']))
+        self.assertEqual(exchange.calls, 1)
+        self.assertEqual(results[0][:2], ('1', '2'))
+        self.assertEqual(results[1][:2], ('3', '4'))
+
+    def test_missing_pairs_fail_alone(self):
+        exchange = Poloniex()
+        batcher = RequestBatcher(exchange, window=0.1)
+
+        def ticker(pair):
+            try:
+                return batcher.ticker(pair)
+            except KeyError as e:
+                return e
+        with ThreadPoolExecutor(2) as pool:
+            eth, foo = pool.map(ticker, ['BTC_ETH', 'BTC_FOO'])
+        self.assertEqual(exchange.calls, 1)
+        self.assertEqual(eth[:2], ('1', '2'))
+        self.assertIsInstance(foo, KeyError)
+
+    def test_rest_poller_batches_subscriptions(self):
+        scheduler = PollScheduler(workers=2, jitter=0)
+        exchange = Poloniex()
+        poller = RESTPoller(exchange, scheduler=scheduler, batch=True)
+        poller.subscribe('ticker', 'BTC_ETH', interval=10)
+        poller.subscribe('ticker', 'BTC_LTC', interval=10)
+        poller.start()
+        try:
+            pairs = {poller.get(timeout=2)[1], poller.get(timeout=2)[1]}
+        finally:
+            poller.stop()
+            scheduler.stop()
+        self.assertEqual(pairs, {'BTC_ETH', 'BTC_LTC'})
+        self.assertEqual(exchange.calls, 1)
+
+    def test_batches_are_keyed_by_kwargs(self):
+        scheduler = PollScheduler(workers=1, jitter=0)
+        poller = RESTPoller(Poloniex(), scheduler=scheduler, batch=True)
+        a = poller.subscribe('ticker', 'BTC_ETH', interval=10)
+        b = poller.subscribe('ticker', 'BTC_LTC', interval=10)
+        c = poller.subscribe('ticker', 'BTC_XMR', interval=10, depth=5)
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        self.assertEqual((c.pairs, c.kwargs), (['BTC_XMR'], {'depth': 5}))
+        poller.unsubscribe('ticker', 'BTC_XMR')
+        self.assertEqual(list(poller._batches.values()), [a])
@@ -0,0 +1,75 @@
+# Import Built-Ins
+import logging
+from unittest import TestCase
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.WSS.queues import BoundedQueue
+from bitex.api.WSS.base import WSSAPI
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+def drain(q):
+    items = []
+    while not q.empty():
+        items.append(q.get_nowait())
+    return items
+
+
+class BoundedQueueTests(TestCase):
+    def test_drop_policies(self):
+        oldest = BoundedQueue(2, 'drop-oldest')
+        newest = BoundedQueue(2, 'drop-newest')
+        for i in range(5):
+            oldest.put(('trades', 'BTCUSD', i))
+            newest.put(('trades', 'BTCUSD', i))
+        self.assertEqual([d for *_, d in drain(oldest)], [3, 4])
+        self.assertEqual([d for *_, d in drain(newest)], [0, 1])
+        self.assertEqual(oldest.stats()['dropped'], 3)
+        self.assertEqual(newest.stats()['high_water'], 2)
+
+    def test_conflate_replaces_in_place(self):
+        q = BoundedQueue(10, 'conflate')
+        q.put(('ticker', 'BTCUSD', 1))
+        q.put(('ticker', 'ETHUSD', 1))
+        q.put(('ticker', 'BTCUSD', 2))
+        self.assertEqual(drain(q), [('ticker', 'BTCUSD', 2),
+                                    ('ticker', 'ETHUSD', 1)])
+        q.put(('ticker', 'BTCUSD', 3))
+        self.assertEqual(drain(q), [('ticker', 'BTCUSD', 3)])
+        self.assertEqual(q.stats()['conflated'], 1)
+
+    def test_wssapi_data_q(self):
+        api = WSSAPI(None, 'Test', maxsize=1, overflow='drop-oldest')
+        api.data_q.put(('ticker', 'BTCUSD', 1))
+        api.data_q.put(('ticker', 'BTCUSD', 2))
+        self.assertEqual(api.get(timeout=1), ('ticker', 'BTCUSD', 2))
+        with self.assertRaises(ValueError):
+            WSSAPI(None, 'Test', overflow='fifo')
+
+    def test_conflate_channels_keeps_trades(self):
+        api = WSSAPI(None, 'Test', conflate=['ticker'])
+        for i in range(3):
+            api.data_q.put(('ticker', 'BTCUSD', i))
+            api.data_q.put(('trades', 'BTCUSD', i))
+        self.assertEqual(drain(api.data_q),
+                         [('ticker', 'BTCUSD', 2), ('trades', 'BTCUSD', 0),
+                          ('trades', 'BTCUSD', 1), ('trades', 'BTCUSD', 2)])
+
+    def test_get_batch_and_drain(self):
+        q = BoundedQueue(policy='conflate')
+        self.assertEqual(q.get_batch(timeout=0.01), [])
+        for i in range(5):
+            q.put(('ticker', 'BTCUSD', i))
+            q.put(('ticker', 'ETHUSD', i))
+            q.put(('ticker', 'LTCUSD', i))
+        self.assertEqual(q.get_batch(max_items=2),
+                         [('ticker', 'BTCUSD', 4), ('ticker', 'ETHUSD', 4)])
+        self.assertEqual(list(q.drain()), [('ticker', 'LTCUSD', 4)])
+        self.assertEqual(list(q.drain()), [])
+        q.put(('ticker', 'BTCUSD', 5))
+        self.assertEqual(q.get_batch(timeout=1), [('ticker', 'BTCUSD', 5)])
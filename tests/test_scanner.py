@@ -0,0 +1,69 @@
+# Import Built-Ins
+import logging
+from unittest import TestCase
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.scanner import SpreadScanner
+from bitex.api.WSS.bitfinex import BitfinexWSS
+from bitex.api.WSS.events import normalize
+from bitex.api.WSS.latency import stamp
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class SpreadScannerTests(TestCase):
+    def test_scan_finds_fee_adjusted_crossings(self):
+        scanner = SpreadScanner(fees={'Kraken': 0.001, 'GDAX': 0.001})
+        scanner.update('Kraken', 'BTCUSD', 100, 101)
+        scanner.update('GDAX', 'BTCUSD', 102, 103)
+        scanner.update('GDAX', 'ETHUSD', 10, 11)
+        opportunities = scanner.scan()
+        self.assertEqual(len(opportunities), 1)
+        opp = opportunities[0]
+        self.assertEqual((opp.pair, opp.buy_exchange, opp.sell_exchange),
+                         ('BTCUSD', 'Kraken', 'GDAX'))
+        self.assertAlmostEqual(opp.edge, (102 * 0.999 - 101 * 1.001) /
+                               (101 * 1.001))
+        self.assertEqual(scanner.scan(threshold=0.01), [])
+
+        scanner.set_fee('GDAX', 0.01)
+        self.assertEqual(scanner.scan(), [])
+
+    def test_process_consumes_data_q_batches(self):
+        found = []
+        scanner = SpreadScanner(callback=found.extend)
+        scanner.process('Bitstamp', [('ticker', 'BTCUSD',
+                                      ('99', '100', None), 0),
+                                     ('trades', 'BTCUSD', [], 0)])
+        scanner.process('Gemini', [('ticker', 'BTCUSD', ('101', '102'), 1)])
+        self.assertEqual(len(found), 1)
+        self.assertEqual(found[0].buy_exchange, 'Bitstamp')
+
+    def test_process_consumes_normalized_wss_tickers(self):
+        bitfinex = BitfinexWSS()
+        bitfinex._handle_subscribed(0, chanId=1, channel='ticker',
+                                    pair='BTCUSD')
+        # In the client's own format, ticker data can't be compared
+        bitfinex.handle_data(stamp(), [1, [99, 1, 100, 2, 0, 0, 99, 10, 0,
+                                           0]])
+        scanner = SpreadScanner()
+        scanner.process('Bitfinex', [bitfinex.data_q.get(timeout=1)])
+        self.assertEqual(scanner.exchanges, [])
+
+        bitfinex.normalize()
+        bitfinex.handle_data(stamp(), [1, [99, 1, 100, 2, 0, 0, 99, 10, 0,
+                                           0]])
+        ts = stamp()
+        gdax = normalize('GDAX', ('ticker', 'BTC-USD',
+                                  {'type': 'ticker', 'best_bid': '101',
+                                   'best_ask': '102', 'price': '101'}, ts),
+                         ts)
+        found = scanner.process(None, [bitfinex.data_q.get(timeout=1)] + gdax)
+        self.assertEqual(len(found), 1)
+        self.assertEqual((found[0].pair, found[0].buy_exchange,
+                          found[0].sell_exchange, found[0].ask, found[0].bid),
+                         ('BTC-USD', 'Bitfinex', 'GDAX', 100.0, 101.0))
@@ -0,0 +1,83 @@
+# Import Built-Ins
+import logging
+import os
+import multiprocessing as mp
+from unittest import TestCase
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.WSS.base import WSSAPI
+from bitex.api.WSS.shm import RingPublisher, RingReader
+from bitex.api.WSS.events import Trade
+from bitex.api.WSS.latency import stamp
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+def read_items(name, n, q):
+    reader = RingReader(name, from_start=True)
+    q.put([reader.get(timeout=5) for _ in range(n)])
+    reader.close()
+
+
+class RingBufferTests(TestCase):
+    def setUp(self):
+        self.name = 'bitex_test_%s' % os.getpid()
+        self.publisher = RingPublisher(self.name, capacity=4, slot_size=128)
+
+    def tearDown(self):
+        self.publisher.close()
+
+    def test_reader_sees_published_client_data(self):
+        client = WSSAPI(None, 'Test')
+        reader = RingReader(self.name)
+        self.publisher.attach(client, channel='ticker')
+        client.publish(('ticker', 'BTCUSD', [1, 2], 1.5))
+        client.publish(('trades', 'BTCUSD', [3], 1.6))
+        self.assertEqual(reader.get_batch(), [('ticker', 'BTCUSD', [1, 2],
+                                               1.5)])
+        self.assertEqual(client.get(timeout=1), ('trades', 'BTCUSD', [3], 1.6))
+        self.assertFalse(self.publisher.write(('ticker', 'BTCUSD', 'x' * 200)))
+        self.assertEqual(self.publisher.oversized, 1)
+        reader.close()
+
+    def test_events_and_timestamps_keep_their_type(self):
+        self.publisher.close()
+        self.publisher = RingPublisher(self.name, capacity=4, slot_size=512)
+        reader = RingReader(self.name)
+        ts = stamp(exchange_ts=1.25)
+        trade = Trade('trades', 'BTC-USD', 'GDAX', 1, 100.0, 0.5, 'buy',
+                      1.25, ts)
+        self.publisher.write(trade)
+        self.publisher.write(('ticker', 'BTCUSD', ([1, 2], ts)))
+        event, item = reader.get_batch()
+        self.assertIsInstance(event, Trade)
+        self.assertEqual(event, trade)
+        self.assertEqual((event.ts.recv_ns, event.ts.exchange_ts),
+                         (ts.recv_ns, 1.25))
+        self.assertEqual(item[:2], ('ticker', 'BTCUSD'))
+        data, item_ts = item[2]
+        self.assertEqual(data, [1, 2])
+        self.assertEqual(item_ts.recv_ns, ts.recv_ns)
+        reader.close()
+
+    def test_slow_reader_skips_overwritten_items(self):
+        reader = RingReader(self.name)
+        for i in range(10):
+            self.publisher.write(('trades', 'BTCUSD', i))
+        self.assertEqual([d for _, _, d in reader.get_batch()], [6, 7, 8, 9])
+        self.assertEqual(reader.lost, 6)
+        reader.close()
+
+    def test_reader_in_other_process(self):
+        for i in range(3):
+            self.publisher.write(('trades', 'BTCUSD', i))
+        q = mp.Queue()
+        p = mp.Process(target=read_items, args=(self.name, 3, q))
+        p.start()
+        items = q.get(timeout=10)
+        p.join()
+        self.assertEqual([d for _, _, d in items], [0, 1, 2])
@@ -0,0 +1,62 @@
+# Import Built-Ins
+import logging
+import time
+from unittest import TestCase
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.WSS.base import WSSAPI, Backoff, Supervisor
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class SupervisorTests(TestCase):
+    def test_backoff_is_jittered_and_capped(self):
+        backoff = Backoff(base=1, cap=8, factor=2, jitter=0.5)
+        delays = [backoff.delay() for _ in range(6)]
+        for delay, limit in zip(delays, [1, 2, 4, 8, 8, 8]):
+            self.assertTrue(limit / 2 <= delay <= limit)
+        backoff.reset()
+        self.assertLessEqual(backoff.delay(), 1)
+
+    def test_connect_retries_and_replays_subscriptions(self):
+        client = WSSAPI(None, 'Test')
+        client.running = True
+        attempts, sent = [], []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError()
+
+        supervisor = Supervisor(client, connect, sent.append,
+                                backoff=Backoff(base=0.01))
+        supervisor.register('conf', {'event': 'conf'})
+        supervisor.register('ticker', {'channel': 'ticker'})
+        supervisor.register('conf', {'event': 'conf', 'flags': 8})
+
+        self.assertTrue(supervisor.connect())
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(sent, [{'event': 'conf', 'flags': 8},
+                                {'channel': 'ticker'}])
+        self.assertEqual(supervisor.backoff.attempts, 0)
+
+        client.running = False
+        self.assertFalse(supervisor.connect())
+
+    def test_gap_metrics(self):
+        client = WSSAPI(None, 'Test')
+        supervisor = Supervisor(client, lambda: None)
+        supervisor.received()
+        supervisor.disconnected()
+        supervisor.disconnected()
+        time.sleep(0.05)
+        supervisor.received()
+        stats = supervisor.stats()
+        self.assertEqual(stats['disconnects'], 1)
+        self.assertTrue(stats['connected'])
+        self.assertGreaterEqual(stats['last_gap'], 0.05)
+        self.assertEqual(stats['max_gap'], stats['total_gap'])
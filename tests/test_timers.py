@@ -0,0 +1,51 @@
+# Import Built-Ins
+import logging
+from unittest import TestCase
+
+# Import Third-Party
+
+# Import Homebrew
+from bitex.api.WSS.timers import TimerWheel
+
+
+# Init Logging Facilities
+log = logging.getLogger(__name__)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TimerWheelTests(TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.wheel = TimerWheel(tick=0.1, slots=8, clock=self.clock)
+        self.fired = []
+
+    def test_timers_fire_once_due(self):
+        self.wheel.schedule(0.25, self.fired.append, 'a')
+        self.wheel.schedule(0.05, self.fired.append, 'b')
+        cancelled = self.wheel.schedule(0.1, self.fired.append, 'c')
+        cancelled.cancel()
+        self.assertEqual(self.wheel.advance(), 0)
+        self.clock.now += 0.15
+        self.assertEqual(self.wheel.advance(), 1)
+        self.clock.now += 0.2
+        self.wheel.advance()
+        self.assertEqual(self.fired, ['b', 'a'])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_timers_beyond_a_turn_of_the_wheel(self):
+        self.wheel.schedule(2.0, self.fired.append, 'late')
+        self.wheel.schedule(0.3, self.fired.append, 'early')
+        self.clock.now += 1.0
+        self.wheel.advance()
+        self.assertEqual(self.fired, ['early'])
+        # Skipping several turns visits every slot once
+        self.clock.now += 5.0
+        self.wheel.advance()
+        self.assertEqual(self.fired, ['early', 'late'])